@@ -488,6 +488,58 @@ with st.sidebar:
 
     st.info("💡 **Tip**: Start by uploading your resume to unlock all features!")
 
+# LLM call metrics for this server process
+st.markdown("---")
+with st.expander("⚡ AI Performance", expanded=False):
+    try:
+        from utils.llm_utils import get_llm
+
+        summary = get_llm().get_metrics_summary()
+        pool = get_llm().get_http_pool_stats()
+    except Exception as e:
+        summary = pool = None
+        st.caption(f"LLM metrics unavailable: {e}")
+
+    if summary and summary["calls"]:
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("LLM Calls", summary["calls"], f"{summary['errors']} errors", delta_color="off")
+        metric_cols[1].metric("Cache Hit Rate", f"{summary['cache_hit_rate'] * 100:.0f}%")
+        metric_cols[2].metric(
+            "Latency p50 / p95",
+            f"{summary['latency_p50'] or 0:.1f}s / {summary['latency_p95'] or 0:.1f}s",
+        )
+        metric_cols[3].metric(
+            "Tokens (in / out)",
+            f"{summary['prompt_tokens']:,} / {summary['completion_tokens']:,}",
+            f"{summary['cached_prompt_tokens']:,} prompt tokens cached",
+            delta_color="off",
+        )
+        st.dataframe(
+            [
+                {
+                    "provider": name,
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "p50 (s)": stats["latency_p50"],
+                    "p95 (s)": stats["latency_p95"],
+                    "TTFT p50 (s)": stats["ttft_p50"],
+                    "fallback hops": stats["fallback_hops"],
+                    "hedged": stats["hedged"],
+                }
+                for name, stats in summary["by_provider"].items()
+            ],
+            use_container_width=True,
+        )
+    elif summary is not None:
+        st.caption("No LLM calls recorded yet in this session.")
+
+    if pool and pool["requests"]:
+        st.caption(
+            f"HTTP pool: {pool['open_connections']} open / {pool['idle_connections']} idle "
+            f"connections (max {pool['max_connections']}), "
+            f"{pool['reuse_rate'] * 100:.0f}% of requests reused a connection"
+        )
+
 # User Profile Collection Section
 st.markdown("---")
 with st.expander("👤 Complete Your Profile", expanded=False):
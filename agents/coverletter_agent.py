@@ -1,7 +1,28 @@
 from services.coverletter_gen import generate_cover_letter as _gen_cover_letter
+from services.coverletter_gen import (
+    generate_cover_letter_stream as _gen_cover_letter_stream,
+    generate_cover_letter_variants as _gen_cover_letter_variants,
+)
 
 
-def generate_cover_letter(parsed_resume, context):
+def _build_jd_text(context):
+    """Build the job description text passed to the cover letter service"""
+    company = context.get("company", "")
+    position = context.get("position", "")
+    job_description = context.get("job_description", "")
+    highlight_skills = context.get("highlight_skills", [])
+
+    return f"""
+Company: {company}
+Position: {position}
+
+{job_description if job_description else f"Position: {position} at {company}"}
+
+{f"Key skills to highlight: {', '.join(highlight_skills)}" if highlight_skills else ""}
+    """.strip()
+
+
+def generate_cover_letter(parsed_resume, context, regenerate=False):
     """
     Generate a personalized cover letter based on resume and job context
 
@@ -13,33 +34,52 @@ def generate_cover_letter(parsed_resume, context):
             - job_description: Full job description text
             - tone: Tone style (professional, enthusiastic, formal, creative)
             - highlight_skills: List of skills to emphasize
+        regenerate: Write a new letter instead of returning the cached one
     """
     try:
-        # Extract context
-        company = context.get("company", "")
-        position = context.get("position", "")
-        job_description = context.get("job_description", "")
         tone = context.get("tone", "professional")
-        highlight_skills = context.get("highlight_skills", [])
 
         # Build comprehensive job description text
-        jd_text = f"""
-Company: {company}
-Position: {position}
-
-{job_description if job_description else f"Position: {position} at {company}"}
-
-{f"Key skills to highlight: {', '.join(highlight_skills)}" if highlight_skills else ""}
-        """.strip()
+        jd_text = _build_jd_text(context)
 
         # Call the service function
-        cover_letter = _gen_cover_letter(parsed_resume, jd_text, tone)
+        cover_letter = _gen_cover_letter(parsed_resume, jd_text, tone, regenerate=regenerate)
         return cover_letter
     except Exception as e:
         print(f"Cover letter agent failed: {e}")
         return f"Error generating cover letter: {str(e)}"
 
 
+def generate_cover_letter_stream(parsed_resume, context, regenerate=False):
+    """
+    Stream a personalized cover letter as text deltas
+
+    Takes the same arguments as generate_cover_letter; suitable for st.write_stream.
+    """
+    tone = context.get("tone", "professional")
+    return _gen_cover_letter_stream(
+        parsed_resume, _build_jd_text(context), tone, regenerate=regenerate
+    )
+
+
+def generate_cover_letter_variants(parsed_resume, context, tones=None):
+    """
+    Generate the cover letter in several tones at once
+
+    Takes the same context as generate_cover_letter (its "tone" is ignored).
+    The tones are generated concurrently and cached, so switching between
+    them afterwards is instant.
+
+    Returns:
+        Dict of tone -> cover letter ("" for a tone that failed)
+    """
+    try:
+        return _gen_cover_letter_variants(parsed_resume, _build_jd_text(context), tones)
+    except Exception as e:
+        print(f"Cover letter agent failed: {e}")
+        return {}
+
+
 def generate_coverletter(parsed_resume, jd_text, tone="formal"):
     """
     Legacy function for backward compatibility
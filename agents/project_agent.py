@@ -5,30 +5,52 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.llm_utils import get_llm, generate_text
+from utils.llm_utils import get_llm, generate_json
+from utils.llm_structured import salvage_items, validate_json
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-def suggest_projects(skills_list, num_projects=5):
-    """
-    Generate project suggestions for given skills using AI
+# Schema of one suggested project (validated per item, so good items survive bad ones)
+PROJECT_SCHEMA = {
+    "type": "object",
+    "required": ["title", "description", "skills", "difficulty", "duration"],
+    "properties": {
+        "title": {"type": "string", "minLength": 3},
+        "description": {"type": "string", "minLength": 20},
+        "skills": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "difficulty": {"type": "string", "enum": ["Beginner", "Intermediate", "Advanced"]},
+        "duration": {"type": "string", "minLength": 1},
+    },
+}
 
-    Args:
-        skills_list: List of skills to create projects for
-        num_projects: Number of project suggestions to generate
+PROJECT_LIST_SCHEMA = {
+    "type": "object",
+    "required": ["projects"],
+    "properties": {"projects": {"type": "array", "items": PROJECT_SCHEMA}},
+}
 
-    Returns:
-        List of project dictionaries with title, description, skills, difficulty, duration
-    """
-    try:
-        if not skills_list:
-            return []
 
-        skills_str = ", ".join(skills_list)
+def _project_list_schema(count):
+    """PROJECT_LIST_SCHEMA asking for exactly `count` projects"""
+    projects = dict(PROJECT_LIST_SCHEMA["properties"]["projects"], minItems=count, maxItems=count)
+    return dict(PROJECT_LIST_SCHEMA, properties={"projects": projects})
+
 
-        prompt = f"""
+# Requests per call: the first asks for all projects, the rest only for the missing ones
+MAX_PROJECT_ATTEMPTS = 3
+
+
+def _build_project_prompt(skills_str, num_projects, exclude_titles=None):
+    """Build the JSON project suggestion prompt"""
+    exclude = ""
+    if exclude_titles:
+        exclude = (
+            "\nThese projects were already suggested; do NOT repeat them or make close variants:\n"
+            + "\n".join(f"- {title}" for title in exclude_titles) + "\n"
+        )
+    return f"""
 Generate {num_projects} unique and practical project ideas specifically using these technologies: {skills_str}
 
 IMPORTANT RULES:
@@ -36,47 +58,71 @@ IMPORTANT RULES:
 - Projects should be creative, unique, and portfolio-worthy
 - Make projects progressively challenging from beginner to advanced
 - Focus on real-world applications that demonstrate mastery of these specific skills
-
+{exclude}
 For each project, provide:
-1. Title: A clear, creative project name (not generic)
-2. Description: 2-3 sentences explaining what to build, key features, and why it's valuable for a portfolio
-3. Skills: List the specific technologies from the input list that will be used (you can combine multiple from: {skills_str})
-4. Difficulty: Beginner, Intermediate, or Advanced
-5. Duration: Estimated time to complete (e.g., "1-2 weeks", "3-4 weeks")
-
-Format each project as:
-PROJECT {{number}}
-Title: {{title}}
-Description: {{description}}
-Skills: {{skill1}}, {{skill2}}, {{skill3}}
-Difficulty: {{level}}
-Duration: {{time}}
-
-EXAMPLE FORMAT:
-PROJECT 1
-Title: Real-time Collaborative Code Editor
-Description: Build a web-based code editor where multiple users can edit code simultaneously with syntax highlighting and live cursors. Include user authentication, room management, and code execution features. Perfect for demonstrating real-time communication and full-stack skills.
-Skills: React, Node.js, Socket.io, MongoDB
-Difficulty: Advanced
-Duration: 3-4 weeks
+1. title: A clear, creative project name (not generic)
+2. description: 2-3 sentences explaining what to build, key features, and why it's valuable for a portfolio
+3. skills: List the specific technologies from the input list that will be used (you can combine multiple from: {skills_str})
+4. difficulty: "Beginner", "Intermediate" or "Advanced"
+5. duration: Estimated time to complete (e.g., "1-2 weeks", "3-4 weeks")
+
+Respond with JSON only, in this format:
+{{"projects": [
+  {{
+    "title": "Real-time Collaborative Code Editor",
+    "description": "Build a web-based code editor where multiple users can edit code simultaneously with syntax highlighting and live cursors. Include user authentication, room management, and code execution features. Perfect for demonstrating real-time communication and full-stack skills.",
+    "skills": ["React", "Node.js", "Socket.io", "MongoDB"],
+    "difficulty": "Advanced",
+    "duration": "3-4 weeks"
+  }}
+]}}
 
 Now generate {num_projects} unique projects using ONLY these technologies: {skills_str}
 """
 
-        llm = get_llm()
-        if llm.is_available():
-            # Use multi-model LLM with automatic fallback
-            response_text = generate_text(prompt, temperature=0.8, max_tokens=3000)
-            # Parse the response into structured projects
-            projects = _parse_project_response(response_text, skills_list)
-            
-            # Validate that projects were generated
-            if projects and len(projects) > 0:
-                return projects
-            else:
-                raise Exception("No projects generated from AI response")
-        else:
-            raise Exception("LLM not available. Please configure your API key.")
+
+_project_pool = None
+
+
+def get_project_pool():
+    """Shared suggestion pool (None when LLM_PROJECT_POOL_ENABLED is off or it cannot be opened)"""
+    global _project_pool
+    if _project_pool is None:
+        if os.getenv("LLM_PROJECT_POOL_ENABLED", "true").lower() not in ("1", "true", "yes"):
+            return None
+        try:
+            from utils.project_pool import ProjectSuggestionPool
+            _project_pool = ProjectSuggestionPool(generate_projects)
+        except Exception as e:
+            print(f"Failed to initialize project suggestion pool: {e}")
+            return None
+    return _project_pool
+
+
+def suggest_projects(skills_list, num_projects=5, use_pool=True):
+    """
+    Generate project suggestions for given skills using AI
+
+    Suggestions come from the shared pool of pre-generated variants for the
+    same skill set and count (see utils/project_pool.py), so repeated and
+    common skill sets rarely wait for a live LLM call.
+
+    Args:
+        skills_list: List of skills to create projects for
+        num_projects: Number of project suggestions to generate
+        use_pool: Serve from the suggestion pool (False always generates live)
+
+    Returns:
+        List of project dictionaries with title, description, skills, difficulty, duration
+    """
+    try:
+        if not skills_list:
+            return []
+
+        pool = get_project_pool() if use_pool else None
+        if pool is not None:
+            return pool.get(skills_list, num_projects)
+        return generate_projects(skills_list, num_projects)
 
     except Exception as e:
         print(f"Project suggestion failed: {e}")
@@ -90,6 +136,110 @@ Now generate {num_projects} unique projects using ONLY these technologies: {skil
         }]
 
 
+def generate_projects(skills_list, num_projects=5, priority="interactive"):
+    """
+    Generate project suggestions with a live LLM call, raising on failure
+
+    Projects are requested as JSON (structured output mode) and validated
+    one by one against PROJECT_SCHEMA. Valid projects are kept and, if some
+    were missing or invalid, only the missing number is requested again.
+
+    Args:
+        skills_list: List of skills to create projects for
+        num_projects: Number of project suggestions to generate
+        priority: "interactive" or "batch" (background pool refills)
+
+    Returns:
+        List of project dictionaries with title, description, skills, difficulty, duration
+    """
+    skills_str = ", ".join(skills_list)
+
+    llm = get_llm()
+    if not llm.is_available():
+        raise Exception("LLM not available. Please configure your API key.")
+
+    projects = []
+    for attempt in range(MAX_PROJECT_ATTEMPTS):
+        missing = num_projects - len(projects)
+        if missing <= 0:
+            break
+        if attempt:
+            print(f"Got {len(projects)} of {num_projects} valid projects; requesting {missing} more")
+        prompt = _build_project_prompt(skills_str, missing, [p["title"] for p in projects])
+        try:
+            # Creative call: bypass the response cache so every call yields new ideas
+            # Routed to a small, fast model (see utils/llm_task_routes.py)
+            data, response_text = generate_json(
+                prompt, _project_list_schema(missing), "project_suggestions",
+                task="project_suggestions", bypass_cache=True, priority=priority
+            )
+        except Exception as e:
+            if projects:
+                print(f"Project suggestion retry failed: {e}")
+                break
+            raise
+        titles = {p["title"].lower() for p in projects}
+        for project in _extract_projects(data, response_text, skills_list):
+            if project["title"].lower() not in titles:
+                titles.add(project["title"].lower())
+                projects.append(project)
+
+    # Validate that projects were generated
+    if projects:
+        return projects[:num_projects]
+    raise Exception("No projects generated from AI response")
+
+
+def _extract_projects(data, response_text, skills_list):
+    """
+    Valid projects from a structured response
+
+    Accepts {"projects": [...]}, a bare list of projects or a single
+    project object. Anything else (a string, a number, an object without
+    projects) falls back to the complete items of a truncated JSON array,
+    then to the legacy "Title: ..." text format, so a malformed response
+    still yields whatever projects it contains.
+    """
+    items = None
+    if isinstance(data, dict):
+        items = data.get("projects")
+        if items is None and "title" in data:
+            items = [data]
+        elif isinstance(items, dict):
+            items = [items]
+    elif isinstance(data, list):
+        items = data
+    if not isinstance(items, list) or not any(isinstance(item, dict) for item in items):
+        items = salvage_items(str(response_text))
+        if not items:
+            return _parse_project_response(str(response_text), skills_list)
+
+    projects = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        project = _normalize_project(item)
+        errors = validate_json(project, PROJECT_SCHEMA)
+        if errors:
+            print(f"Dropping invalid project suggestion: {'; '.join(errors)}")
+            continue
+        projects.append(project)
+    return projects
+
+
+def _normalize_project(item):
+    """Coerce near-miss values (e.g. "advanced", "React, Node.js") before validation"""
+    project = {key: item[key] for key in PROJECT_SCHEMA["properties"] if key in item}
+    for key in ("title", "description", "duration"):
+        if isinstance(project.get(key), str):
+            project[key] = project[key].strip()
+    if isinstance(project.get("skills"), str):
+        project["skills"] = [s.strip() for s in project["skills"].split(",") if s.strip()]
+    if isinstance(project.get("difficulty"), str):
+        project["difficulty"] = project["difficulty"].strip().capitalize()
+    return project
+
+
 def _parse_project_response(response_text, skills_list):
     """Parse AI response into structured project dictionaries"""
     projects = []
@@ -59,6 +59,12 @@ except Exception:
             "education": education,
         }
 
+# Content-hash parse cache (falls back to parsing on every call)
+try:
+    from utils.parse_cache import parse_resume_file
+except Exception:
+    parse_resume_file = None
+
 # Very small matcher fallback
 try:
     from services.resume_matcher import match_resume_to_jd
@@ -148,6 +154,10 @@ def parse_uploaded_resume(file) -> Tuple[Optional[str], Optional[dict]]:
         return None, None
     try:
         file_path = file.name
+        if parse_resume_file is not None:
+            # Every tab parses the upload again; the cache makes that a lookup
+            result = parse_resume_file(file_path)
+            return result["text"], result["parsed"]
         ext = os.path.splitext(file_path)[1].lower()
         if ext == '.pdf':
             text = parse_pdf(file_path)
@@ -11,7 +11,7 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from services.resume_parser import ResumeParser
+from utils.parse_cache import parse_uploaded_file
 from services.resume_rewriter import ResumeRewriter
 from utils.job_matcher import JobMatcher
 from utils.ats_scanner import ATSScanner
@@ -49,26 +49,11 @@ with st.sidebar:
     )
 
     if uploaded_file:
-        parser = ResumeParser()
-
+        # Cached by file content: reruns and other pages reuse the same parse
         with st.spinner("Parsing resume..."):
-            if uploaded_file.type == "application/pdf":
-                from services.pdf_parser import parse_pdf
-
-                st.session_state.resume_text = parse_pdf(uploaded_file)
-            elif (
-                uploaded_file.type
-                == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            ):
-                from services.docx_parser import parse_docx
-
-                st.session_state.resume_text = parse_docx(uploaded_file)
-            else:
-                st.session_state.resume_text = uploaded_file.read().decode("utf-8")
-
-            st.session_state.parsed_resume = parser.parse_resume(
-                st.session_state.resume_text
-            )
+            parse_result = parse_uploaded_file(uploaded_file)
+            st.session_state.resume_text = parse_result["text"]
+            st.session_state.parsed_resume = parse_result["parsed"]
             st.success("✅ Resume loaded successfully!")
 
     if st.session_state.resume_text:
@@ -415,23 +400,72 @@ else:
                 ["Mid-Level", "Senior", "Lead", "Manager", "Director", "Executive"],
             )
 
-        if st.button("Rewrite Resume", type="primary", key=f"rewrite_resume_{uuid.uuid4()}"):
+        chunked = st.checkbox(
+            "⚡ Rewrite sections in parallel",
+            help=(
+                "Faster for long resumes: summary, experience and projects are "
+                "rewritten section by section at the same time. Education, skills "
+                "and contact details are kept as they are."
+            ),
+        )
+
+        def _retry_rewrite():
+            st.session_state.retry_rewrite = True
+
+        if (
+            st.button("Rewrite Resume", type="primary", key=f"rewrite_resume_{uuid.uuid4()}")
+            or st.session_state.pop("retry_rewrite", False)
+        ):
             rewriter = ResumeRewriter()
 
-            with st.spinner("Rewriting resume..."):
+            st.markdown("### ✨ Rewritten Resume")
+            # Stream tokens as they arrive instead of waiting for the full rewrite
+            with st.container(height=400):
                 if rewrite_option == "Standard Optimization":
-                    rewritten = rewriter.rewrite_resume(st.session_state.parsed_resume)
+                    rewritten = st.write_stream(
+                        rewriter.rewrite_resume_stream(
+                            st.session_state.parsed_resume, chunked=chunked or None
+                        )
+                    )
                 elif rewrite_option == "Job-Specific Tailoring" and target_job:
-                    rewritten = rewriter.tailor_to_job(
-                        st.session_state.parsed_resume, target_job
+                    rewritten = st.write_stream(
+                        rewriter.tailor_to_job_stream(
+                            st.session_state.parsed_resume, target_job, chunked=chunked or None
+                        )
                     )
                 # Add other rewrite options here
                 else:
-                    rewritten = rewriter.rewrite_resume(st.session_state.parsed_resume)
+                    rewritten = st.write_stream(
+                        rewriter.rewrite_resume_stream(
+                            st.session_state.parsed_resume, chunked=chunked or None
+                        )
+                    )
 
-                st.markdown("### ✨ Rewritten Resume")
-                st.text_area("Result", rewritten, height=400)
+            # Per-bullet changes recorded by the rewrite (rendered as-is, not re-diffed)
+            rewrite_result = st.session_state.parsed_resume or {}
+            if rewrite_result.get("stream_error"):
+                st.warning(
+                    "⚠️ The rewrite was interrupted before it finished, so the text above "
+                    f"is incomplete and was not saved ({rewrite_result['stream_error']})."
+                )
+                st.button("🔁 Retry Rewrite", key="retry_rewrite_button", on_click=_retry_rewrite)
+            elif rewrite_result.get("changes") and not rewrite_result.get("no_changes_needed"):
+                counts = rewrite_result.get("change_counts", {})
+                with st.expander(
+                    f"🔍 What changed: {counts.get('modified', 0)} modified, "
+                    f"{counts.get('added', 0)} added, {counts.get('removed', 0)} removed",
+                    expanded=False,
+                ):
+                    for change in rewrite_result["changes"]:
+                        if change["type"] == "modified":
+                            st.markdown(f"✏️ ~~{change['before']}~~  \n➡️ {change['after']}")
+                        elif change["type"] == "added":
+                            st.markdown(f"➕ {change['after']}")
+                        else:
+                            st.markdown(f"➖ ~~{change['before']}~~")
 
+            # An interrupted rewrite is not offered for download or saving
+            if not rewrite_result.get("stream_error"):
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     st.download_button(
@@ -14,7 +14,10 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.color_scheme import get_unified_css
-from agents.coverletter_agent import generate_cover_letter
+from agents.coverletter_agent import (
+    generate_cover_letter_stream,
+    generate_cover_letter_variants,
+)
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -32,6 +35,8 @@ if "parsed" not in st.session_state:
     st.session_state.parsed = None
 if "cover_letter" not in st.session_state:
     st.session_state.cover_letter = None
+if "cover_letter_variants" not in st.session_state:
+    st.session_state.cover_letter_variants = {}
 if "projects" not in st.session_state:
     st.session_state.projects = None
 if "jd_for_cl" not in st.session_state:
@@ -118,6 +123,17 @@ with st.container():
             help="Specific skills you want to emphasize",
         )
 
+    # Build context
+    context = {
+        "company": company_name,
+        "position": job_title,
+        "job_description": job_description,
+        "tone": tone.lower(),
+        "highlight_skills": highlight_skills.split(",")
+        if highlight_skills
+        else [],
+    }
+
     # Generate button
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -129,27 +145,39 @@ with st.container():
             disabled=not can_generate,
             key=f"generate_cover_letter_{uuid.uuid4()}",
         ):
-            with st.spinner("🤖 AI is crafting your cover letter..."):
-                try:
-                    # Build context
-                    context = {
-                        "company": company_name,
-                        "position": job_title,
-                        "job_description": job_description,
-                        "tone": tone.lower(),
-                        "highlight_skills": highlight_skills.split(",")
-                        if highlight_skills
-                        else [],
-                    }
-
-                    cover_letter = generate_cover_letter(
-                        st.session_state.parsed, context
-                    )
-                    st.session_state.cover_letter = cover_letter
-                    st.success("✅ Cover letter generated!")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"❌ Error generating cover letter: {e}")
+            try:
+                # Render tokens as they arrive instead of blocking on a spinner
+                cover_letter = st.write_stream(
+                    generate_cover_letter_stream(st.session_state.parsed, context)
+                )
+                if not cover_letter:
+                    raise RuntimeError("No text was generated")
+                st.session_state.cover_letter = cover_letter
+                st.session_state.cover_letter_variants = {}
+                st.success("✅ Cover letter generated!")
+                st.rerun()
+            except Exception as e:
+                st.error(f"❌ Error generating cover letter (any text above is incomplete): {e}")
+
+        # All tones at once (concurrently); switching between them afterwards is instant
+        if st.button(
+            "🎨 Generate All Tones",
+            use_container_width=True,
+            disabled=not can_generate,
+            key=f"generate_all_tones_{uuid.uuid4()}",
+        ):
+            with st.spinner("Generating a cover letter in every tone..."):
+                variants = generate_cover_letter_variants(st.session_state.parsed, context)
+            variants = {t: letter for t, letter in variants.items() if letter}
+            if variants:
+                st.session_state.cover_letter_variants = variants
+                st.session_state.cover_letter_tone = (
+                    tone.lower() if tone.lower() in variants else next(iter(variants))
+                )
+                st.session_state.cover_letter = variants[st.session_state.cover_letter_tone]
+                st.rerun()
+            else:
+                st.error("❌ Error generating cover letters: no text was generated")
 
     if not can_generate:
         st.info(
@@ -161,6 +189,22 @@ with st.container():
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown("## 📄 Your Cover Letter")
 
+        if st.session_state.cover_letter_variants:
+
+            def _switch_tone():
+                st.session_state.cover_letter = st.session_state.cover_letter_variants[
+                    st.session_state.cover_letter_tone
+                ]
+
+            st.radio(
+                "Tone",
+                list(st.session_state.cover_letter_variants),
+                format_func=str.title,
+                horizontal=True,
+                key="cover_letter_tone",
+                on_change=_switch_tone,
+            )
+
         # Editable text area
         edited_cl = st.text_area(
             "Cover Letter (Editable)",
@@ -202,9 +246,30 @@ with st.container():
                 st.info("👆 Select and copy the text above")
 
         with col4:
-            if st.button("🔄 Regenerate", use_container_width=True, key=f"regenerate_cover_{uuid.uuid4()}"):
-                st.session_state.cover_letter = None
+            regenerate = st.button("🔄 Regenerate", use_container_width=True, key="regenerate_cover")
+
+        if regenerate:
+            # A new letter in the tone on screen, bypassing the cached one
+            regen_context = dict(
+                context,
+                tone=st.session_state.get("cover_letter_tone", context["tone"])
+                if st.session_state.cover_letter_variants
+                else context["tone"],
+            )
+            try:
+                cover_letter = st.write_stream(
+                    generate_cover_letter_stream(
+                        st.session_state.parsed, regen_context, regenerate=True
+                    )
+                )
+                if not cover_letter:
+                    raise RuntimeError("No text was generated")
+                st.session_state.cover_letter = cover_letter
+                if st.session_state.cover_letter_variants:
+                    st.session_state.cover_letter_variants[regen_context["tone"]] = cover_letter
                 st.rerun()
+            except Exception as e:
+                st.error(f"❌ Error regenerating cover letter (any text above is incomplete): {e}")
 
         # Tips
         st.markdown("<br>", unsafe_allow_html=True)
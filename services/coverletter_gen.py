@@ -1,29 +1,43 @@
 from dotenv import load_dotenv
+from collections import OrderedDict
 import os
 import sys
+import hashlib
+import logging
+import threading
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.llm_utils import generate_text
+from utils.llm_utils import (
+    generate_text,
+    generate_text_stream,
+    generate_many,
+    build_prompt,
+    LayeredPrompt,
+)
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 
 class LLMWrapper:
     """Thin wrapper that exposes .call(prompt) to match previous usage with multi-model support."""
 
-    def __init__(self, temperature: float = 0.3, max_tokens: int = 2048):
+    def __init__(self, temperature: float = None, max_tokens: int = None):
+        # None: use the "cover_letter" route of the LLM task routing table
         self.temperature = temperature
         self.max_tokens = max_tokens
 
-    def call(self, prompt: str, preferred_provider: str = None) -> str:
+    def call(self, prompt: str, preferred_provider: str = None, bypass_cache: bool = False) -> str:
         """
         Generate text using multi-model LLM with automatic fallback
         
         Args:
             prompt: The prompt to send to the LLM
             preferred_provider: Preferred provider (groq, gemini, openai, anthropic)
+            bypass_cache: Skip the LLM response cache (for a fresh letter)
         
         Returns:
             Generated text response
@@ -33,35 +47,219 @@ class LLMWrapper:
                 prompt, 
                 temperature=self.temperature, 
                 max_tokens=self.max_tokens,
-                preferred_provider=preferred_provider
+                preferred_provider=preferred_provider,
+                bypass_cache=bypass_cache,
+                hedge=True,
+                task="cover_letter"
             )
         except Exception as e:
             raise RuntimeError(f"LLM generation failed: {e}")
 
+    def stream(self, prompt: str, preferred_provider: str = None, bypass_cache: bool = False):
+        """
+        Stream generated text deltas using multi-model LLM with automatic fallback
+        
+        Args:
+            prompt: The prompt to send to the LLM
+            preferred_provider: Preferred provider (groq, gemini, openai, anthropic)
+            bypass_cache: Skip the LLM response cache (for a fresh letter)
+        
+        Returns:
+            Iterator of text deltas
+        """
+        return generate_text_stream(
+            prompt,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            preferred_provider=preferred_provider,
+            bypass_cache=bypass_cache,
+            task="cover_letter"
+        )
+
 
 # Create default wrapper instance
 llm = LLMWrapper()
 
 
-def generate_cover_letter(resume_json, jd_text, tone="formal"):
+# Tones offered by the Cover Letter page ("generate all tones" produces each)
+COVER_LETTER_TONES = ["professional", "enthusiastic", "formal", "creative"]
+
+
+class CoverLetterCache:
     """
-    Generate a tailored cover letter
+    In-memory LRU of generated cover letters keyed by (resume hash, JD hash, tone)
+
+    Lets the UI switch between tones instantly once a letter for that tone
+    exists. Size is set with LLM_COVER_LETTER_CACHE_SIZE.
     """
-    try:
-        rewritten_resume = resume_json.get(
-            "rewritten_text", resume_json.get("raw_text", "")
+
+    def __init__(self, max_entries=None):
+        self.max_entries = int(
+            max_entries if max_entries is not None
+            else os.getenv("LLM_COVER_LETTER_CACHE_SIZE", 128)
         )
-        prompt = f"""
-        Generate a {tone} cover letter for the following job description:
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
-        Job Description:
-        {jd_text}
+    @staticmethod
+    def key(resume_text, jd_text, tone):
+        def digest(text):
+            return hashlib.sha256((text or "").strip().encode("utf-8")).hexdigest()
 
-        Candidate Resume:
-        {rewritten_resume}
-        """
-        cover_letter = llm.call(prompt)
+        return (digest(resume_text), digest(jd_text), (tone or "").strip().lower())
+
+    def get(self, resume_text, jd_text, tone):
+        key = self.key(resume_text, jd_text, tone)
+        with self._lock:
+            letter = self._entries.get(key)
+            if letter is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return letter
+
+    def set(self, resume_text, jd_text, tone, letter):
+        if not letter:
+            return
+        key = self.key(resume_text, jd_text, tone)
+        with self._lock:
+            self._entries[key] = letter
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+cover_letter_cache = CoverLetterCache()
+
+
+def _resume_text_for_letter(resume_json):
+    return resume_json.get("rewritten_text", resume_json.get("raw_text", ""))
+
+
+def _tone_instruction(tone):
+    return (
+        f"Generate a {tone} cover letter for the job description above, "
+        "based on the candidate resume above."
+    )
+
+
+def _build_cover_letter_prompt(resume_json, jd_text, tone="formal"):
+    """Build the cover letter prompt from the (rewritten) resume and JD
+
+    Resume first, then JD, as a prefix shared with the other resume tasks;
+    the tone-specific instruction goes last.
+    """
+    return build_prompt(
+        _tone_instruction(tone),
+        resume_text=_resume_text_for_letter(resume_json),
+        job_description=jd_text,
+    )
+
+
+def generate_cover_letter(resume_json, jd_text, tone="formal", regenerate=False):
+    """
+    Generate a tailored cover letter
+
+    With regenerate=True a new letter is written even if one is cached for
+    this resume, JD and tone (the LLM response cache is bypassed too), and
+    it replaces the cached letter.
+    """
+    try:
+        resume_text = _resume_text_for_letter(resume_json)
+        if not regenerate:
+            cached = cover_letter_cache.get(resume_text, jd_text, tone)
+            if cached is not None:
+                return cached
+        prompt = _build_cover_letter_prompt(resume_json, jd_text, tone)
+        cover_letter = llm.call(prompt, bypass_cache=regenerate)
+        cover_letter_cache.set(resume_text, jd_text, tone, cover_letter)
         return cover_letter
     except Exception as e:
-        print(f"Cover letter generation failed: {e}")
+        log.error("Cover letter generation failed: %s", e)
         return ""
+
+
+def generate_cover_letter_stream(resume_json, jd_text, tone="formal", regenerate=False):
+    """
+    Stream a tailored cover letter as text deltas (e.g. for st.write_stream)
+
+    A letter already generated for this resume, JD and tone is yielded whole,
+    unless regenerate=True (see generate_cover_letter). If the LLM fails,
+    even after part of the letter was yielded, the error is re-raised and
+    nothing is cached, so callers never take a cut-off letter as finished.
+    """
+    resume_text = _resume_text_for_letter(resume_json)
+    if not regenerate:
+        cached = cover_letter_cache.get(resume_text, jd_text, tone)
+        if cached is not None:
+            yield cached
+            return
+    prompt = _build_cover_letter_prompt(resume_json, jd_text, tone)
+    chunks = []
+    try:
+        for delta in llm.stream(prompt, bypass_cache=regenerate):
+            chunks.append(delta)
+            yield delta
+    except Exception as e:
+        log.error("Cover letter generation failed after %d chunks: %s", len(chunks), e)
+        raise
+    cover_letter_cache.set(resume_text, jd_text, tone, "".join(chunks))
+
+
+def generate_cover_letter_variants(resume_json, jd_text, tones=None):
+    """
+    Generate one cover letter per tone, concurrently
+
+    The resume and JD are compacted once and shared, byte-identical, as the
+    prefix of every tone's prompt (so providers can serve it from their
+    prompt cache); only the closing tone instruction differs. Tones already
+    in the cover letter cache are not regenerated.
+
+    Args:
+        resume_json: Resume dict ('rewritten_text' or 'raw_text')
+        jd_text: Job description text
+        tones: Tones to generate (defaults to COVER_LETTER_TONES)
+
+    Returns:
+        Dict of tone -> cover letter ("" for a tone that failed)
+    """
+    tones = tones or COVER_LETTER_TONES
+    resume_text = _resume_text_for_letter(resume_json)
+    letters = {}
+    missing = []
+    for tone in tones:
+        cached = cover_letter_cache.get(resume_text, jd_text, tone)
+        if cached is not None:
+            letters[tone] = cached
+        else:
+            missing.append(tone)
+
+    if missing:
+        base = _build_cover_letter_prompt(resume_json, jd_text, missing[0])
+        prompts = [
+            LayeredPrompt(base.blocks, _tone_instruction(tone), base.compaction)
+            for tone in missing
+        ]
+        results = generate_many(
+            prompts,
+            temperature=llm.temperature,
+            max_tokens=llm.max_tokens,
+            max_concurrency=len(prompts),
+            task="cover_letter",
+        )
+        for tone, result in zip(missing, results):
+            if isinstance(result, Exception):
+                log.error("Cover letter generation failed (%s): %s", tone, result)
+                letters[tone] = ""
+                continue
+            letters[tone] = result
+            cover_letter_cache.set(resume_text, jd_text, tone, result)
+
+    return {tone: letters[tone] for tone in tones}
@@ -2,10 +2,12 @@ import os
 import tempfile
 import mimetypes
 import traceback
-from typing import Tuple, Dict, List
+from typing import Any, Tuple, Dict, List
 
 # local imports
-from services.pdf_parser import parse_pdf
+from services.pdf_parser import parse_pdf_pages
+from services.ocr_planner import plan_pdf_ocr, plan_docx_images
+from services.ocr_engine import get_ocr_engine
 # Note: avoid importing parse_docx from this module (self-import) as that
 # creates a circular import when other modules try to import parse_docx.
 # A lightweight helper `parse_docx` is provided at the end of this file.
@@ -59,45 +61,133 @@ def _ocr_image_bytes(img_bytes: bytes) -> str:
     Use MistralOCR to OCR a bytes object containing an image.
     Returns recognized text (may be empty string).
     """
-    # Prefer the in-module ocr_client if available
     if ocr_client is None:
         return ""
-    # write bytes to a temporary file and call extract_text which accepts a path
     try:
-        tmp = _save_bytes_to_tempfile(img_bytes, suffix=".png")
-        text = ocr_client.extract_text(tmp) or ""
-        try:
-            os.remove(tmp)
-        except Exception:
-            pass
-        return text
+        return ocr_client.extract_text_from_bytes(img_bytes) or ""
     except Exception as e:
         print("OCR on image bytes failed:", e)
         return ""
 
 
-def _extract_images_from_pdf(pdf_path: str) -> List[bytes]:
+def _ocr_images_bytes(images: List[bytes]) -> List[str]:
     """
-    Extract images from a PDF and return list of image bytes.
-    Requires PyMuPDF.
+    OCR several image byte strings in one batch.
+    Returns the recognized texts in the same order.
     """
-    images = []
-    if not HAS_FITZ:
-        return images
+    if ocr_client is None or not images:
+        return [""] * len(images)
     try:
-        doc = fitz.open(pdf_path)
-        for page_index in range(len(doc)):
-            page = doc[page_index]
-            image_list = page.get_images(full=True)
-            for img in image_list:
-                xref = img[0]
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
-                images.append(image_bytes)
-        return images
+        return [text or "" for text in ocr_client.extract_texts_from_bytes(images)]
     except Exception as e:
-        print("PDF image extraction failed:", e)
-        return images
+        print("OCR on image bytes failed:", e)
+        return [""] * len(images)
+
+
+def _ocr_pdf_selectively(
+    pdf_path: str, manifest: Dict, image_ocr: bool = True
+) -> Dict[int, Dict[str, Any]]:
+    """
+    OCR the pages and embedded images the OCR planner selects
+
+    Scanned pages are rendered and OCR'd whole; on pages with a usable text
+    layer only images large enough to hold text are OCR'd (each image once,
+    however many pages repeat it), unless image_ocr is False. The per-page
+    decisions are recorded in manifest["ocr_plan"].
+
+    Returns:
+        {page number: {"page": OCR text of the whole page or None,
+        "images": OCR texts of the page's images}} for pages with OCR output
+        (see _merge_pdf_pages)
+    """
+    if not HAS_FITZ:
+        return {}
+    results: Dict[int, Dict[str, Any]] = {}
+    doc = fitz.open(pdf_path)
+    try:
+        manifest["ocr_plan"] = plan_pdf_ocr(doc)
+        if not image_ocr:
+            for page_plan in manifest["ocr_plan"]:
+                if page_plan["ocr"] == "images":
+                    page_plan["ocr"] = "none"
+                    page_plan["reason"] = "image_ocr_disabled"
+                for image in page_plan["images"]:
+                    image["ocr"] = False
+        if ocr_client is None:
+            manifest["errors"].append("ocr_unavailable")
+            return results
+        # Whole scanned pages go to the OCR engine's process pool in one batch
+        scanned = [plan["page"] for plan in manifest["ocr_plan"] if plan["ocr"] == "page"]
+        page_texts = {}
+        engine = get_ocr_engine()
+        if scanned and engine.available and getattr(ocr_client, "backend", "") != "google_vision":
+            page_seconds: List[float] = []
+            page_texts = dict(zip(scanned, engine.ocr_pdf(pdf_path, scanned, page_seconds)))
+            manifest["page_ocr_seconds"] = [round(s, 4) for s in page_seconds]
+
+        # Everything else (images, scanned pages the engine cannot take) is
+        # collected as (page plan, whole page?, image bytes) and OCR'd as one batch
+        jobs = []
+        seen_xrefs = set()
+        for page_plan in manifest["ocr_plan"]:
+            page = doc[page_plan["page"]]
+            if page_plan["ocr"] == "page":
+                if page_plan["page"] in page_texts:
+                    jobs.append((page_plan, True, None))
+                else:
+                    jobs.append((page_plan, True, page.get_pixmap(dpi=engine.dpi).tobytes("png")))
+                continue
+            for image in page_plan["images"]:
+                if not image["ocr"] or (image["xref"] and image["xref"] in seen_xrefs):
+                    continue
+                if image["xref"]:
+                    seen_xrefs.add(image["xref"])
+                    img_bytes = doc.extract_image(image["xref"])["image"]
+                else:
+                    # Inline image without an xref: render its area instead
+                    clip = fitz.Rect(image["bbox"])
+                    img_bytes = page.get_pixmap(dpi=engine.dpi, clip=clip).tobytes("png")
+                jobs.append((page_plan, False, img_bytes))
+
+        batch = iter(_ocr_images_bytes([img for _, _, img in jobs if img is not None]))
+        for page_plan, whole_page, img_bytes in jobs:
+            ocr_text = next(batch) if img_bytes is not None else page_texts[page_plan["page"]]
+            if whole_page:
+                page_plan["ocr_chars"] = len(ocr_text.strip())
+                manifest["page_ocr_count"] += 1
+                if ocr_text.strip():
+                    results.setdefault(page_plan["page"], {"page": None, "images": []})
+                    results[page_plan["page"]]["page"] = ocr_text
+                continue
+            manifest["image_ocr_count"] += 1
+            if ocr_text:
+                results.setdefault(page_plan["page"], {"page": None, "images": []})
+                results[page_plan["page"]]["images"].append(ocr_text)
+                manifest["image_ocr_texts"].append(ocr_text)
+    finally:
+        doc.close()
+    return results
+
+
+def _merge_pdf_pages(page_texts: List[str], ocr: Dict[int, Dict[str, Any]]) -> str:
+    """
+    Text layer and OCR output of a PDF merged page by page
+
+    A page OCR'd whole (no usable text layer) contributes only its OCR text;
+    OCR text of images follows the text of the page the image is on, so the
+    document keeps its reading order.
+    """
+    pieces = []
+    for number in range(max(len(page_texts), max(ocr, default=-1) + 1)):
+        text = page_texts[number] if number < len(page_texts) else ""
+        page_ocr = ocr.get(number, {"page": None, "images": []})
+        if page_ocr["page"] is not None:
+            text = page_ocr["page"].strip() + "\n"
+        pieces.append(text)
+        for image_text in page_ocr["images"]:
+            if image_text.strip():
+                pieces.append("\n" + image_text.strip() + "\n\n")
+    return "".join(pieces)
 
 
 def _extract_images_from_docx(docx_path: str) -> List[bytes]:
@@ -162,10 +252,13 @@ def _textract_fallback(file_path: str) -> str:
         return ""
 
 
-def parse_document(file_path: str) -> Tuple[str, Dict]:
+def parse_document(file_path: str, image_ocr: bool = True) -> Tuple[str, Dict]:
     """
     Main entrypoint to parse a document file into text.
 
+    With image_ocr=False, embedded images are not OCR'd when the text layer
+    is usable; scanned PDF pages and near-empty DOCX files are still OCR'd.
+
     Returns:
       - combined_text (str): text extracted from document plus OCR of embedded images
       - manifest (dict): metadata about what was parsed (sources, counts, durations, errors)
@@ -174,6 +267,7 @@ def parse_document(file_path: str) -> Tuple[str, Dict]:
         "file_path": file_path,
         "sources": [],
         "image_ocr_count": 0,
+        "page_ocr_count": 0,
         "image_ocr_texts": [],
         "errors": [],
     }
@@ -185,27 +279,27 @@ def parse_document(file_path: str) -> Tuple[str, Dict]:
 
     try:
         if ext == ".pdf":
-            # primary PDF text extraction (PyMuPDF parser)
+            # primary PDF text extraction (PyMuPDF parser), page by page
+            page_texts: List[str] = []
             try:
-                pdf_text = parse_pdf(file_path) or ""
-                combined_text_chunks.append(pdf_text)
+                page_seconds = []
+                page_texts = parse_pdf_pages(file_path, timings=page_seconds)
                 manifest["sources"].append("pdf_text")
+                manifest["pdf_page_seconds"] = [round(s, 4) for s in page_seconds]
             except Exception as e:
                 manifest["errors"].append(f"pdf_text_error:{e}")
-            # extract images and OCR them
+            # OCR only the scanned pages and text-bearing images, merged into
+            # the text of the page they belong to
+            ocr = {}
             try:
-                images = _extract_images_from_pdf(file_path)
-                for img_bytes in images:
-                    ocr_text = _ocr_image_bytes(img_bytes)
-                    if ocr_text:
-                        combined_text_chunks.append(ocr_text)
-                        manifest["image_ocr_texts"].append(ocr_text)
-                manifest["image_ocr_count"] = len(images)
+                ocr = _ocr_pdf_selectively(file_path, manifest, image_ocr)
             except Exception as e:
                 manifest["errors"].append(f"pdf_image_extract_error:{e}")
+            combined_text_chunks.append(_merge_pdf_pages(page_texts, ocr))
 
         elif ext in [".docx", ".docm", ".dotx"]:
             # Extract text with python-docx (already in docx_parser) - best for docx
+            docx_text = ""
             try:
                 docx_text = parse_docx(file_path) or ""
                 combined_text_chunks.append(docx_text)
@@ -213,15 +307,24 @@ def parse_document(file_path: str) -> Tuple[str, Dict]:
             except Exception as e:
                 manifest["errors"].append(f"docx_text_error:{e}")
 
-            # extract images and OCR them
+            # extract images and OCR the ones that can hold text
             try:
                 images = _extract_images_from_docx(file_path)
-                for img_bytes in images:
-                    ocr_text = _ocr_image_bytes(img_bytes)
+                manifest["ocr_plan"] = plan_docx_images(docx_text, images)
+                if not image_ocr:
+                    for image_plan in manifest["ocr_plan"]:
+                        if image_plan["reason"] != "little_document_text":
+                            image_plan["ocr"] = False
+                selected = [
+                    img_bytes
+                    for img_bytes, image_plan in zip(images, manifest["ocr_plan"])
+                    if image_plan["ocr"]
+                ]
+                for ocr_text in _ocr_images_bytes(selected):
+                    manifest["image_ocr_count"] += 1
                     if ocr_text:
                         combined_text_chunks.append(ocr_text)
                         manifest["image_ocr_texts"].append(ocr_text)
-                manifest["image_ocr_count"] = len(images)
             except Exception as e:
                 manifest["errors"].append(f"docx_image_extract_error:{e}")
 
@@ -10,6 +10,8 @@ and logs an informational message.
 import logging
 import os
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -106,6 +108,82 @@ class MistralOCR:
             log.warning("Google Vision OCR failed: %s", e)
             return ""
 
+    def _ocr_with_gvision_batch(self, buffers: List[bytes]) -> List[str]:
+        """Google Vision text detection of several images, 16 per request"""
+        if not self._has_gvision:
+            log.debug("google-cloud-vision not available")
+            return [""] * len(buffers)
+        texts: List[str] = []
+        try:
+            client = self._vision.ImageAnnotatorClient()
+            feature = self._vision.Feature(type_=self._vision.Feature.Type.TEXT_DETECTION)
+            for start in range(0, len(buffers), 16):
+                requests = [
+                    self._vision.AnnotateImageRequest(
+                        image=self._vision.Image(content=bytes(b)), features=[feature]
+                    )
+                    for b in buffers[start:start + 16]
+                ]
+                response = client.batch_annotate_images(requests=requests)
+                for result in response.responses:
+                    if result.error.message:
+                        log.warning("Google Vision API error: %s", result.error.message)
+                        texts.append("")
+                    elif result.text_annotations:
+                        texts.append(result.text_annotations[0].description or "")
+                    else:
+                        texts.append("")
+        except Exception as e:
+            log.warning("Google Vision batch OCR failed: %s", e)
+        return texts + [""] * (len(buffers) - len(texts))
+
+    def extract_text_from_image(self, image) -> str:
+        """OCR an in-memory image: a PIL image, or encoded image bytes"""
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return self.extract_text_from_bytes(image)
+        if self.backend == "google_vision":
+            # Vision only accepts encoded images
+            buffer = BytesIO()
+            image.save(buffer, format="PNG")
+            return self._ocr_with_gvision_bytes(buffer.getvalue())
+        return self._ocr_with_tesseract_from_image(image)
+
+    def extract_text_from_bytes(self, data: bytes) -> str:
+        """OCR an encoded image (PNG, JPEG, TIFF, ...) held in memory, without a temp file"""
+        if self.backend == "google_vision":
+            return self._ocr_with_gvision_bytes(bytes(data))
+        if not self._has_pillow:
+            return ""
+        try:
+            img = self._PILImage.open(BytesIO(data))
+        except Exception as e:
+            log.warning("Pillow failed to open bytes: %s", e)
+            return ""
+        return self._ocr_with_tesseract_from_image(img)
+
+    def extract_texts_from_bytes(
+        self, buffers: List[bytes], max_workers: Optional[int] = None
+    ) -> List[str]:
+        """OCR several encoded images; returns their texts in the same order
+
+        Google Vision receives them in batch requests. Tesseract runs as one
+        subprocess per image, so images are spread over a thread pool of
+        max_workers (default OCR_WORKERS).
+        """
+        buffers = list(buffers)
+        if not buffers:
+            return []
+        if self.backend == "google_vision":
+            return self._ocr_with_gvision_batch(buffers)
+        workers = min(len(buffers), max(1, int(
+            max_workers if max_workers is not None
+            else os.getenv("OCR_WORKERS", min(4, os.cpu_count() or 1))
+        )))
+        if workers == 1:
+            return [self.extract_text_from_bytes(b) for b in buffers]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self.extract_text_from_bytes, buffers))
+
     def extract_text(self, file_path: str) -> str:
         """Extract text from a file path. Supports images and PDFs.
 
@@ -118,36 +196,31 @@ class MistralOCR:
 
         ext = os.path.splitext(file_path)[1].lower()
 
-        # Helper to OCR raw bytes via chosen backend
-        def ocr_bytes(b: bytes) -> str:
-            if self.backend == "google_vision":
-                return self._ocr_with_gvision_bytes(b)
-            # default to tesseract
-            if self._has_pillow:
+        # Tesseract on PDFs: render and OCR pages across the OCR engine's process pool
+        if ext == ".pdf" and self.backend != "google_vision":
+            from services.ocr_engine import get_ocr_engine
+
+            engine = get_ocr_engine()
+            if engine.available:
                 try:
-                    img = self._PILImage.open(BytesIO(b))
-                    return self._ocr_with_tesseract_from_image(img)
+                    page_texts = engine.ocr_pdf(file_path)
+                    return "\n\n".join(text for text in page_texts if text)
                 except Exception as e:
-                    log.warning("Pillow failed to open bytes: %s", e)
-                    return ""
-            return ""
+                    log.warning("PDF OCR via OCR engine failed: %s", e)
 
         # If PDF, try to render pages to images using fitz (PyMuPDF)
         if ext == ".pdf" and self._has_fitz:
             try:
                 doc = self._fitz.open(file_path)
-                page_texts = []
+                page_images = []
                 for p in doc:
                     try:
-                        pix = p.get_pixmap()
-                        img_bytes = pix.tobytes("png")
-                        text = ocr_bytes(img_bytes)
-                        if text:
-                            page_texts.append(text)
+                        page_images.append(p.get_pixmap().tobytes("png"))
                     except Exception as e:
                         log.debug("Failed rendering page for OCR: %s", e)
                         continue
-                return "\n\n".join(page_texts)
+                page_texts = self.extract_texts_from_bytes(page_images)
+                return "\n\n".join(text for text in page_texts if text)
             except Exception as e:
                 log.warning("PDF OCR via fitz failed: %s", e)
 
@@ -155,7 +228,7 @@ class MistralOCR:
         try:
             with open(file_path, "rb") as f:
                 b = f.read()
-            return ocr_bytes(b)
+            return self.extract_text_from_bytes(b)
         except Exception as e:
             log.warning("OCR read failed for %s: %s", file_path, e)
             return ""
@@ -0,0 +1,196 @@
+"""
+OCR engine
+Renders PDF pages and runs Tesseract on them across a process pool.
+
+Each worker opens the PDF itself for its batch of pages (and closes it
+again), renders each page to a grayscale pixmap and hands the raw sample
+buffer to Pillow/Tesseract, so no PNG is encoded or decoded and no image
+crosses a process boundary; only page text comes back.
+
+Settings (environment variables):
+  OCR_WORKERS     worker processes (default: CPU count, at most 4; 1 = in-process)
+  OCR_RENDER_DPI  resolution pages are rendered at (default 200)
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Iterable, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+log = logging.getLogger(__name__)
+
+try:
+    import fitz  # PyMuPDF
+
+    HAS_FITZ = True
+except Exception:
+    fitz = None
+    HAS_FITZ = False
+
+try:
+    import pytesseract  # type: ignore
+    from PIL import Image  # type: ignore
+
+    HAS_TESSERACT = True
+except Exception:
+    pytesseract = None
+    Image = None
+    HAS_TESSERACT = False
+
+
+def ocr_pixmap(pix) -> str:
+    """Tesseract text of a PyMuPDF pixmap, read straight from its sample buffer"""
+    mode = {1: "L", 3: "RGB", 4: "RGBA"}.get(pix.n)
+    if mode is None:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+        mode = "RGB"
+    image = Image.frombuffer(mode, (pix.width, pix.height), pix.samples, "raw", mode, pix.stride, 1)
+    return pytesseract.image_to_string(image) or ""
+
+
+def _render_and_ocr(page, dpi: int) -> Tuple[str, float]:
+    """Render a page to a grayscale pixmap and OCR it; returns (text, seconds)"""
+    started = time.perf_counter()
+    try:
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+        text = ocr_pixmap(pix)
+    except Exception as e:
+        log.warning("OCR of page %s failed: %s", page.number, e)
+        text = ""
+    return text, time.perf_counter() - started
+
+
+def _ocr_pages(file_path: str, page_numbers: List[int], dpi: int) -> List[Tuple[str, float]]:
+    """OCR a batch of pages in a worker process
+
+    The document is closed before returning, so no worker keeps the file
+    open (and the caller can delete it, also on Windows).
+    """
+    try:
+        doc = fitz.open(file_path)
+    except Exception as e:
+        log.warning("OCR worker could not open %s: %s", file_path, e)
+        return [("", 0.0)] * len(page_numbers)
+    results = []
+    try:
+        for number in page_numbers:
+            try:
+                page = doc[number]
+            except Exception as e:
+                log.warning("OCR worker could not open page %s: %s", number, e)
+                results.append(("", 0.0))
+                continue
+            results.append(_render_and_ocr(page, dpi))
+    finally:
+        doc.close()
+    return results
+
+
+class OCREngine:
+    """
+    Page-parallel Tesseract OCR for PDFs
+
+    The process pool is created on first use and kept for later documents,
+    so its start-up cost is paid once per server process.
+    """
+
+    def __init__(self, workers: Optional[int] = None, dpi: Optional[int] = None):
+        self.workers = max(1, int(
+            workers if workers is not None
+            else os.getenv("OCR_WORKERS", min(4, os.cpu_count() or 1))
+        ))
+        self.dpi = int(dpi if dpi is not None else os.getenv("OCR_RENDER_DPI", 200))
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """True when PyMuPDF, Pillow and pytesseract are all installed"""
+        return HAS_FITZ and HAS_TESSERACT
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def ocr_pdf(
+        self,
+        file_path: str,
+        pages: Optional[Iterable[int]] = None,
+        timings: Optional[List[float]] = None
+    ) -> List[str]:
+        """
+        OCR text of PDF pages, in page order
+
+        Args:
+            file_path: Path of the PDF
+            pages: Page numbers (0-based) to OCR; all pages when None
+            timings: Optional list that receives the render + OCR seconds of each page
+
+        Returns:
+            One text per requested page ("" for pages that failed)
+        """
+        if not self.available:
+            log.debug("PyMuPDF, Pillow or pytesseract not available")
+            return []
+        if pages is None:
+            with fitz.open(file_path) as doc:
+                pages = range(doc.page_count)
+        pages = list(pages)
+        if not pages:
+            return []
+
+        file_path = os.path.abspath(file_path)
+        if self.workers == 1 or len(pages) == 1:
+            results = self._ocr_in_process(file_path, pages)
+        else:
+            # One batch of pages per worker, each opening the document once
+            workers = min(self.workers, len(pages))
+            batches = [pages[i::workers] for i in range(workers)]
+            try:
+                batch_results = list(self._get_pool().map(
+                    _ocr_pages, [file_path] * workers, batches, [self.dpi] * workers
+                ))
+                by_page = {
+                    number: result
+                    for batch, batch_result in zip(batches, batch_results)
+                    for number, result in zip(batch, batch_result)
+                }
+                results = [by_page[number] for number in pages]
+            except Exception as e:
+                log.warning("OCR process pool failed, running in-process: %s", e)
+                self.shutdown()
+                results = self._ocr_in_process(file_path, pages)
+
+        if timings is not None:
+            timings.extend(seconds for _, seconds in results)
+        return [text for text, _ in results]
+
+    def _ocr_in_process(self, file_path: str, pages: List[int]) -> List[Tuple[str, float]]:
+        return _ocr_pages(file_path, pages, self.dpi)
+
+    def shutdown(self):
+        """Stop the worker processes (a new pool is started on next use)"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+_ocr_engine = None
+
+
+def get_ocr_engine() -> OCREngine:
+    """Process-wide OCR engine"""
+    global _ocr_engine
+    if _ocr_engine is None:
+        _ocr_engine = OCREngine()
+        atexit.register(_ocr_engine.shutdown)
+    return _ocr_engine
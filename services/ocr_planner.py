@@ -0,0 +1,183 @@
+"""
+OCR planner
+Decides, page by page and image by image, what actually needs OCR: scanned
+pages without a usable text layer, and embedded images large enough to hold
+text. Logos, icons and photos on pages that already have text are skipped.
+
+Thresholds (environment variables):
+  OCR_MIN_TEXT_DENSITY   usable characters per square inch below which a page
+                         has no usable text layer (default 2.0, ~190 chars on
+                         a letter page)
+  OCR_MIN_PAGE_COVERAGE  fraction of such a page covered by images for it to
+                         be treated as scanned and OCR'd whole (default 0.3)
+  OCR_MIN_IMAGE_COVERAGE fraction of a page with a text layer an embedded
+                         image must cover to be OCR'd on its own (default 0.15)
+  OCR_MIN_IMAGE_PIXELS   pixel area a DOCX image needs to be OCR'd (default
+                         120000, roughly 400x300)
+  OCR_MAX_BAD_GLYPHS     share of unmapped glyphs (U+FFFD, private use) above
+                         which a text layer counts as unusable (default 0.3)
+"""
+
+import os
+from typing import Dict, List, Any
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+    import fitz  # PyMuPDF
+
+    HAS_FITZ = True
+except Exception:
+    fitz = None
+    HAS_FITZ = False
+
+
+def _setting(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def count_glyphs(text: str) -> Dict[str, int]:
+    """Non-whitespace glyphs of a text layer, and how many have no usable character mapping"""
+    glyphs = bad = 0
+    for char in text:
+        if char.isspace():
+            continue
+        glyphs += 1
+        # Fonts without a ToUnicode map extract as U+FFFD or private-use characters
+        if char == "\ufffd" or "\ue000" <= char <= "\uf8ff":
+            bad += 1
+    return {"glyphs": glyphs, "bad_glyphs": bad}
+
+
+def _image_coverage(page, images: List[Dict[str, Any]]) -> float:
+    """Fraction of the page area covered by images (overlaps counted once per image, capped at 1)"""
+    page_area = abs(page.rect) or 1.0
+    covered = 0.0
+    for image in images:
+        covered += abs(fitz.Rect(image["bbox"]) & page.rect)
+    return min(1.0, covered / page_area)
+
+
+def plan_pdf_page(page) -> Dict[str, Any]:
+    """
+    OCR decision for one PyMuPDF page
+
+    Returns:
+        Dict with the page metrics (glyphs, bad_glyphs, text_density,
+        image_coverage), "ocr": "page" (render and OCR the whole page),
+        "images" (OCR only the listed images) or "none", a "reason", and
+        "images": [{"xref", "bbox", "width", "height", "coverage", "ocr"}]
+    """
+    min_density = _setting("OCR_MIN_TEXT_DENSITY", 2.0)
+    min_page_coverage = _setting("OCR_MIN_PAGE_COVERAGE", 0.3)
+    min_image_coverage = _setting("OCR_MIN_IMAGE_COVERAGE", 0.15)
+    max_bad_glyphs = _setting("OCR_MAX_BAD_GLYPHS", 0.3)
+
+    counts = count_glyphs(page.get_text())
+    usable = counts["glyphs"] - counts["bad_glyphs"]
+    square_inches = (abs(page.rect) or 1.0) / (72 * 72)
+    density = usable / square_inches
+
+    page_area = abs(page.rect) or 1.0
+    images = []
+    for info in page.get_image_info(xrefs=True):
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        images.append({
+            "xref": info.get("xref", 0),
+            "bbox": [round(v, 1) for v in bbox],
+            "width": info.get("width", 0),
+            "height": info.get("height", 0),
+            "coverage": round(abs(bbox) / page_area, 4),
+            "ocr": False,
+        })
+    coverage = _image_coverage(page, images)
+
+    plan = {
+        "glyphs": counts["glyphs"],
+        "bad_glyphs": counts["bad_glyphs"],
+        "text_density": round(density, 2),
+        "image_coverage": round(coverage, 4),
+        "images": images,
+    }
+
+    garbled = counts["glyphs"] > 0 and counts["bad_glyphs"] / counts["glyphs"] > max_bad_glyphs
+    if density < min_density or garbled:
+        if garbled or coverage >= min_page_coverage:
+            plan["ocr"] = "page"
+            plan["reason"] = "garbled_text_layer" if garbled else "scanned"
+        else:
+            plan["ocr"] = "none"
+            plan["reason"] = "blank"
+        return plan
+
+    for image in images:
+        image["ocr"] = image["coverage"] >= min_image_coverage
+    if any(image["ocr"] for image in images):
+        plan["ocr"] = "images"
+        plan["reason"] = "large_images"
+    else:
+        plan["ocr"] = "none"
+        plan["reason"] = "text_layer" if not images else "text_layer_small_images"
+    return plan
+
+
+def plan_pdf_ocr(doc) -> List[Dict[str, Any]]:
+    """OCR decisions for every page of an open PyMuPDF document (see plan_pdf_page)"""
+    plans = []
+    for number, page in enumerate(doc):
+        try:
+            plan = plan_pdf_page(page)
+        except Exception as e:
+            # Unknown layout: fall back to OCR of the whole page
+            plan = {"ocr": "page", "reason": f"plan_error:{e}", "images": []}
+        plan["page"] = number
+        plans.append(plan)
+    return plans
+
+
+def _image_pixels(img_bytes: bytes) -> int:
+    """Pixel area of an image blob, or 0 if its header cannot be read"""
+    try:
+        from docx.image.image import Image as DocxImage
+
+        image = DocxImage.from_blob(img_bytes)
+        return image.px_width * image.px_height
+    except Exception:
+        pass
+    try:
+        from io import BytesIO
+        from PIL import Image
+
+        with Image.open(BytesIO(img_bytes)) as image:
+            return image.width * image.height
+    except Exception:
+        return 0
+
+
+def plan_docx_images(text: str, images: List[bytes]) -> List[Dict[str, Any]]:
+    """
+    OCR decisions for the embedded images of a DOCX
+
+    DOCX files always have a text layer, so an image is only worth OCR when
+    it is big enough to contain text (OCR_MIN_IMAGE_PIXELS), or, when the
+    document has next to no text of its own, when it is not a tiny icon.
+    """
+    min_pixels = _setting("OCR_MIN_IMAGE_PIXELS", 120000)
+    counts = count_glyphs(text or "")
+    text_poor = counts["glyphs"] - counts["bad_glyphs"] < 200
+
+    plans = []
+    for index, img_bytes in enumerate(images):
+        pixels = _image_pixels(img_bytes)
+        if pixels >= min_pixels:
+            ocr, reason = True, "large_image"
+        elif text_poor and (pixels == 0 or pixels >= 10000):
+            ocr, reason = True, "little_document_text"
+        else:
+            ocr, reason = False, "small_image" if pixels else "unknown_size"
+        plans.append({"image": index, "pixels": pixels, "ocr": ocr, "reason": reason})
+    return plans
@@ -1,3 +1,10 @@
+
+import os
+import time
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 # Try to import PyMuPDF (fitz); fall back to pdfplumber if unavailable.
 try:
     import fitz  # PyMuPDF
@@ -13,30 +20,196 @@ except Exception:
     pdfplumber = None
     HAS_PDFPLUMBER = False
 
-def parse_pdf(file_path):
-    """  Extract text from a pdf using PyMuPDF (preferred) or pdfplumber as fallback """
+
+# Process pool shared by parse_pdf calls, created on first use
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    """Shared pool with `workers` processes (replaced if the count changes)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the worker processes (a new pool is started on next use)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# Don't leave worker processes behind when the interpreter exits
+atexit.register(shutdown_pool)
+
+
+def _pdf_workers(workers=None):
+    """Worker processes for parse_pdf (PDF_PARSE_WORKERS, default 1 = in-process)"""
+    return max(1, int(workers if workers is not None else os.getenv("PDF_PARSE_WORKERS", 1)))
+
+
+def _extract_page_range(file_path, start, stop):
+    """Text and extraction seconds of pages [start, stop); runs in a worker process"""
+    doc = fitz.open(file_path)
+    try:
+        pages = []
+        for number in range(start, min(stop, doc.page_count)):
+            started = time.perf_counter()
+            text = doc[number].get_text()
+            pages.append((text, time.perf_counter() - started))
+        return pages
+    finally:
+        doc.close()
+
+
+def _iter_pages(file_path, timings=None):
+    """Yield (backend, page text) pairs; see iter_pdf_pages"""
     if HAS_FITZ:
         try:
             doc = fitz.open(file_path)
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            return text
         except Exception as e:
             print(f"PDF parsing with PyMuPDF failed: {e}")
-            # fall through to try pdfplumber if available
+        else:
+            plumber = None
+            try:
+                for number in range(doc.page_count):
+                    started = time.perf_counter()
+                    try:
+                        backend, text = "pymupdf", doc.load_page(number).get_text()
+                    except Exception as e:
+                        # Keep going: this page from pdfplumber, the next ones from PyMuPDF again
+                        print(f"PDF parsing of page {number + 1} with PyMuPDF failed: {e}")
+                        if plumber is None and HAS_PDFPLUMBER:
+                            plumber = pdfplumber.open(file_path)
+                        backend, text = "pdfplumber", _plumber_page_text(plumber, number)
+                    if timings is not None:
+                        timings.append(time.perf_counter() - started)
+                    yield backend, text
+            finally:
+                if plumber is not None:
+                    plumber.close()
+                doc.close()
+            return
 
     if HAS_PDFPLUMBER:
         try:
-            pages = []
             with pdfplumber.open(file_path) as pdf:
                 for page in pdf.pages:
-                    pages.append(page.extract_text() or "")
-            return "\n".join(pages)
+                    started = time.perf_counter()
+                    text = page.extract_text() or ""
+                    if timings is not None:
+                        timings.append(time.perf_counter() - started)
+                    yield "pdfplumber", text
         except Exception as e:
             print(f"PDF parsing with pdfplumber failed: {e}")
-            return ""
+        return
 
     print("No PDF parser available: install 'PyMuPDF' (fitz) or 'pdfplumber'.")
-    return ""
-    
\ No newline at end of file
+
+
+def _plumber_page_text(pdf, number):
+    """Text of one page from an open pdfplumber document ("" if it fails too)"""
+    if pdf is None:
+        return ""
+    try:
+        return pdf.pages[number].extract_text() or ""
+    except Exception as e:
+        print(f"PDF parsing of page {number + 1} with pdfplumber failed: {e}")
+        return ""
+
+
+def iter_pdf_pages(file_path, timings=None):
+    """
+    Yield the text of each page of a pdf, one page at a time
+
+    Uses PyMuPDF (preferred) or pdfplumber. Only the current page is held in
+    memory. If `timings` is a list, the extraction seconds of every page are
+    appended to it.
+    """
+    for _, text in _iter_pages(file_path, timings):
+        yield text
+
+
+def _parse_pdf_parallel(file_path, workers, timings=None):
+    """
+    Page texts of a pdf extracted by a process pool, or None to parse in-process
+
+    Each worker opens its own document and extracts one contiguous page
+    range, so only page text crosses process boundaries. The pool is kept
+    for later calls. Short documents (under PDF_PARALLEL_MIN_PAGES pages)
+    are not worth the inter-process round trip.
+    """
+    try:
+        doc = fitz.open(file_path)
+        page_count = doc.page_count
+        doc.close()
+    except Exception as e:
+        print(f"PDF parsing with PyMuPDF failed: {e}")
+        return None
+    if page_count < max(2, int(os.getenv("PDF_PARALLEL_MIN_PAGES", 8))):
+        return None
+
+    workers = min(workers, page_count)
+    step = -(-page_count // workers)
+    ranges = [(start, start + step) for start in range(0, page_count, step)]
+    try:
+        results = list(_get_pool(workers).map(
+            _extract_page_range,
+            [file_path] * len(ranges),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges],
+        ))
+    except Exception as e:
+        print(f"Parallel PDF parsing failed, parsing in-process: {e}")
+        shutdown_pool()
+        return None
+
+    pages = [page for result in results for page in result]
+    if timings is not None:
+        timings.extend(seconds for _, seconds in pages)
+    return [text for text, _ in pages]
+
+
+def parse_pdf_pages(file_path, workers=None, timings=None):
+    """
+    Text of each page of a pdf, in page order (see parse_pdf)
+
+    Every page text ends with its own line break, so joining the list
+    gives the text of the whole document.
+    """
+    workers = _pdf_workers(workers)
+    if HAS_FITZ and workers > 1:
+        pages = _parse_pdf_parallel(file_path, workers, timings)
+        if pages is not None:
+            return pages
+
+    pages = []
+    for backend, text in _iter_pages(file_path, timings):
+        # pdfplumber page text has no trailing newline of its own
+        if backend == "pdfplumber" and not text.endswith("\n"):
+            text += "\n"
+        pages.append(text)
+    return pages
+
+
+def parse_pdf(file_path, workers=None, timings=None):
+    """
+    Extract text from a pdf using PyMuPDF (preferred) or pdfplumber as fallback
+
+    Args:
+        file_path: Path of the pdf
+        workers: Worker processes for page-parallel extraction of long pdfs
+            (PyMuPDF only; default PDF_PARSE_WORKERS, 1 = in-process)
+        timings: Optional list that receives the extraction seconds of every page
+    """
+    return "".join(parse_pdf_pages(file_path, workers, timings))
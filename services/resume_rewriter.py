@@ -1,36 +1,251 @@
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
+import logging
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.llm_utils import generate_text
+from utils.llm_utils import generate_text, generate_text_stream, build_prompt
+from utils.llm_compaction import estimate_tokens
 
 # Load env
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 
 def _call_llm(
-    prompt: str, temperature: float = 0.3, max_tokens: int = 2048, preferred_provider: str = None
+    prompt: str,
+    temperature: float = None,
+    max_tokens: int = None,
+    preferred_provider: str = None,
+    task: str = "rewrite",
 ) -> str:
     """Call multi-model LLM and return the text output.
 
     Inputs:
       - prompt: the instruction + input text
-      - temperature: creativity control
-      - max_tokens: maximum tokens to generate
+      - temperature: creativity control (defaults to the task's route)
+      - max_tokens: maximum tokens to generate (defaults to the task's route)
       - preferred_provider: preferred LLM provider (groq, gemini, openai, anthropic)
+      - task: routing table entry ("rewrite" or "tailor")
 
     Returns: generated text (str) or raises on failure.
     """
     try:
-        return generate_text(prompt, temperature, max_tokens, preferred_provider)
+        # Interactive page: hedge stalled provider calls to cut tail latency
+        return generate_text(
+            prompt, temperature, max_tokens, preferred_provider, hedge=True, task=task
+        )
     except Exception as e:
         raise RuntimeError(f"LLM generation failed: {e}")
 
 
-def rewrite_resume(resume_json: dict, instruction: str = None) -> dict:
+def _build_rewrite_prompt(
+    raw_text: str, instruction: str = None, job_description: str = None
+) -> str:
+    """Build the rewrite prompt.
+
+    The resume (and job description, when tailoring) go first as a stable,
+    provider-cacheable prefix; the task and any custom instruction go last.
+    """
+    task = (
+        "Rewrite the resume above to have impactful bullet points\n"
+        "with measurable metrics wherever possible. Keep each bullet concise and action-oriented.\n"
+        "If the resume is already well-written and optimized, you can make minor refinements "
+        "or return it as-is if no improvements are needed.\n\n"
+        "Output only the rewritten resume bullets."
+    )
+    if job_description:
+        task = "Tailor the resume to the job description above.\n" + task
+    if instruction:
+        task = f"{instruction}\n\n" + task
+    return build_prompt(task, resume_text=raw_text, job_description=job_description)
+
+
+# Sections rewritten in chunked mode; the top block (name, contact details),
+# education and skills are kept verbatim
+_CHUNK_REWRITE_SECTIONS = {"summary", "experience", "projects"}
+
+
+def _use_chunked(raw_text: str, chunked: bool = None) -> bool:
+    """Chunked mode when asked for, or (auto) when the resume is long.
+
+    Chunked mode leaves education, skills and contact details untouched, so
+    it is opt-in: LLM_REWRITE_CHUNK_MIN_TOKENS sets an auto threshold, and
+    is 0 (no auto) by default.
+    """
+    if chunked is not None:
+        return chunked
+    threshold = int(os.getenv("LLM_REWRITE_CHUNK_MIN_TOKENS", 0))
+    return threshold > 0 and estimate_tokens(raw_text) >= threshold
+
+
+def _split_rewrite_chunks(raw_text: str, chunk_tokens: int = None) -> list:
+    """Split a resume into chunks that can be rewritten independently.
+
+    Uses the section detection of `ATSResumeTemplates.detect_section`.
+    Each experience entry / project block is its own piece; adjacent
+    pieces of the same section are merged up to `chunk_tokens`
+    (LLM_REWRITE_CHUNK_TOKENS) so short entries share one call.
+
+    Returns: list of {"section", "text", "rewrite"} dicts in resume order.
+    """
+    from utils.ats_pdf_templates import ATSResumeTemplates
+
+    if chunk_tokens is None:
+        chunk_tokens = int(os.getenv("LLM_REWRITE_CHUNK_TOKENS", 400))
+    sections = []
+    for section, block in ATSResumeTemplates.split_sections(raw_text):
+        rewrite = section in _CHUNK_REWRITE_SECTIONS
+        last = sections[-1] if sections else None
+        if (
+            last
+            and last["section"] == section
+            and last["rewrite"] == rewrite
+            and (not rewrite or estimate_tokens(last["text"] + block) <= chunk_tokens)
+        ):
+            last["text"] += "\n\n" + block
+        else:
+            sections.append({"section": section, "text": block, "rewrite": rewrite})
+    return sections
+
+
+def _build_chunk_prompt(
+    section_text: str, instruction: str = None, job_description: str = None
+) -> str:
+    """Build the rewrite prompt for one resume chunk.
+
+    The job description (when tailoring) is the shared, cacheable prefix of
+    every chunk prompt; the chunk itself goes last.
+    """
+    task = (
+        "Rewrite the resume section below to have impactful bullet points\n"
+        "with measurable metrics wherever possible. Keep each bullet concise and action-oriented.\n"
+        "Keep the section heading, job titles, employers and dates unchanged. "
+        "If the section is already well-written, return it as-is.\n\n"
+        "Output only the rewritten section.\n\n"
+        f"Resume section:\n{section_text}"
+    )
+    if job_description:
+        task = "Tailor the resume section below to the job description above.\n" + task
+    if instruction:
+        task = f"{instruction}\n\n" + task
+    return build_prompt(task, job_description=job_description)
+
+
+def _rewrite_chunks(
+    sections: list, instruction: str = None, job_description: str = None
+):
+    """Rewrite chunks concurrently, yielding (chunk, rewritten text or None) in order.
+
+    None means the chunk's call failed and its original text should be kept.
+    LLM_REWRITE_CHUNK_CONCURRENCY bounds the number of calls in flight.
+    """
+    task = "tailor" if job_description else "rewrite"
+    workers = max(1, int(os.getenv("LLM_REWRITE_CHUNK_CONCURRENCY", 4)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _call_llm,
+                _build_chunk_prompt(section["text"], instruction, job_description),
+                task=task,
+            )
+            if section["rewrite"]
+            else None
+            for section in sections
+        ]
+        for section, future in zip(sections, futures):
+            if future is None:
+                yield section, section["text"]
+                continue
+            try:
+                rewritten = str(future.result()).strip()
+            except Exception as e:
+                log.warning("Rewrite of a %s chunk failed (%s); keeping original text", section["section"], e)
+                rewritten = ""
+            yield section, rewritten or None
+
+
+def _rewrite_chunked_stream(
+    resume_json: dict, sections: list, instruction: str = None, job_description: str = None
+):
+    """Yield the chunk-by-chunk rewrite in resume order and annotate `resume_json`.
+
+    Chunks are rewritten in parallel; each is yielded as soon as it and all
+    chunks before it are done. Failed chunks fall back to their original text.
+    """
+    raw_text = resume_json.get("raw_text", "")
+    resume_json["prompt_compaction"] = {}
+    pieces = []
+    failed = 0
+    for section, rewritten in _rewrite_chunks(sections, instruction, job_description):
+        if rewritten is None:
+            failed += 1
+            rewritten = section["text"]
+        piece = rewritten if not pieces else "\n\n" + rewritten
+        pieces.append(piece)
+        yield piece
+
+    rewritable = sum(1 for section in sections if section["rewrite"])
+    resume_json["rewrite_chunks"] = {"chunks": rewritable, "failed": failed}
+    rewritten_text = "".join(pieces)
+    if failed == rewritable:
+        log.warning("LLM not available for any chunk; returning original text as rewritten_text")
+        resume_json["no_changes_needed"] = True
+        resume_json["change_reason"] = "AI service unavailable - fallback to original"
+    else:
+        _annotate_changes(resume_json, raw_text, rewritten_text)
+    resume_json["rewritten_text"] = rewritten_text
+
+
+def _chunk_sections(raw_text: str, chunked: bool = None):
+    """Chunks to rewrite in chunked mode, or None to use a single prompt"""
+    if not _use_chunked(raw_text, chunked):
+        return None
+    sections = _split_rewrite_chunks(raw_text)
+    if sum(1 for section in sections if section["rewrite"]) < 2:
+        return None
+    return sections
+
+
+def _annotate_changes(resume_json: dict, raw_text: str, rewritten_text: str) -> None:
+    """Record whether the rewrite changed the resume, how much and where (in place).
+
+    Sets `similarity_percentage`, per-bullet `changes` records (added /
+    removed / modified, see utils.resume_diff) and `change_counts`, so pages
+    can render the diff without recomputing it.
+    """
+    from utils.resume_diff import diff_resume
+
+    diff = diff_resume(raw_text, rewritten_text)
+    resume_json["changes"] = diff["changes"]
+    resume_json["change_counts"] = diff["counts"]
+
+    # Check if AI returned essentially the same content
+    if not diff["changes"]:
+        log.info("Resume was already optimized - AI returned same content")
+        resume_json["no_changes_needed"] = True
+        resume_json["change_reason"] = "Resume is already well-optimized"
+    else:
+        similarity = diff["similarity"]
+        resume_json["no_changes_needed"] = False
+        resume_json["similarity_percentage"] = round(similarity * 100, 1)
+
+        if similarity > 0.9:
+            log.info("Minor refinements made (%.1f%% similar)", similarity * 100)
+        else:
+            log.info("Significant improvements made (%.1f%% different)", (1 - similarity) * 100)
+
+
+def rewrite_resume(
+    resume_json: dict,
+    instruction: str = None,
+    job_description: str = None,
+    chunked: bool = None,
+) -> dict:
     """Rewrite resume text with improved bullets and metrics using Gemini.
 
     Behavior:
@@ -38,69 +253,42 @@ def rewrite_resume(resume_json: dict, instruction: str = None) -> dict:
       - Produces `rewritten_text` on the returned dict
       - On failure, copies `raw_text` to `rewritten_text` and logs the error
       - Detects if AI returned the same content and marks it with metadata
+      - Records what was trimmed from the prompt in `prompt_compaction`
+      - In chunked mode, rewrites summary / experience / projects chunks in
+        parallel (chunk counts in `rewrite_chunks`); a failed chunk keeps its
+        text, and education, skills and contact details are kept as-is
 
     Args:
       - resume_json: Dictionary containing resume data with 'raw_text' key
       - instruction: Optional custom instruction for rewriting style/focus
+      - job_description: Optional job description to tailor the resume to
+      - chunked: Rewrite section chunks in parallel (None: only for resumes
+        over LLM_REWRITE_CHUNK_MIN_TOKENS, if set)
 
     Returns:
       - Dictionary with 'rewritten_text' and metadata about changes
     """
     try:
         raw_text = resume_json.get("raw_text", "")
+        sections = _chunk_sections(raw_text, chunked)
+        if sections is not None:
+            for _ in _rewrite_chunked_stream(resume_json, sections, instruction, job_description):
+                pass
+            return resume_json
 
-        # Build prompt with custom instruction if provided
-        if instruction:
-            prompt = (
-                f"{instruction}\n\n"
-                "Rewrite the following resume text to have impactful bullet points\n"
-                "with measurable metrics wherever possible. Keep each bullet concise and action-oriented.\n"
-                "If the resume is already well-written and optimized, you can make minor refinements "
-                "or return it as-is if no improvements are needed.\n\n"
-                f"Resume text:\n{raw_text}\n\n"
-                "Output only the rewritten resume bullets."
-            )
-        else:
-            prompt = (
-                "Rewrite the following resume text to have impactful bullet points\n"
-                "with measurable metrics wherever possible. Keep each bullet concise and action-oriented.\n"
-                "If the resume is already well-written and optimized, you can make minor refinements "
-                "or return it as-is if no improvements are needed.\n\n"
-                f"Resume text:\n{raw_text}\n\n"
-                "Output only the rewritten resume bullets."
-            )
+        prompt = _build_rewrite_prompt(raw_text, instruction, job_description)
+        resume_json["prompt_compaction"] = prompt.compaction
 
         try:
             # Use multi-model LLM to generate text
-            rewritten_text = _call_llm(prompt, temperature=0.3, max_tokens=2048)
-
-            # Check if AI returned essentially the same content
-            raw_clean = raw_text.strip().lower().replace(" ", "").replace("\n", "")
-            rewritten_clean = (
-                rewritten_text.strip().lower().replace(" ", "").replace("\n", "")
+            rewritten_text = _call_llm(
+                prompt, task="tailor" if job_description else "rewrite"
             )
-
-            if raw_clean == rewritten_clean:
-                print("✓ Resume was already optimized - AI returned same content")
-                resume_json["no_changes_needed"] = True
-                resume_json["change_reason"] = "Resume is already well-optimized"
-            else:
-                # Calculate similarity
-                from difflib import SequenceMatcher
-
-                similarity = SequenceMatcher(None, raw_clean, rewritten_clean).ratio()
-                resume_json["no_changes_needed"] = False
-                resume_json["similarity_percentage"] = round(similarity * 100, 1)
-
-                if similarity > 0.9:
-                    print(f"✓ Minor refinements made ({similarity * 100:.1f}% similar)")
-                else:
-                    print(
-                        f"✓ Significant improvements made ({(1 - similarity) * 100:.1f}% different)"
-                    )
+            resume_json["from_cache"] = bool(getattr(rewritten_text, "cache_hit", False))
+            _annotate_changes(resume_json, raw_text, rewritten_text)
         except Exception as llm_error:
             # Graceful fallback: return the original text unchanged
-            print(f"⚠ LLM not available ({llm_error}); returning original text as rewritten_text")
+            log.warning("LLM not available (%s); returning original text as rewritten_text", llm_error)
             rewritten_text = raw_text
             resume_json["no_changes_needed"] = True
             resume_json["change_reason"] = (
@@ -110,19 +298,79 @@ def rewrite_resume(resume_json: dict, instruction: str = None) -> dict:
         resume_json["rewritten_text"] = rewritten_text
         return resume_json
     except Exception as e:
-        print(f"❌ Resume rewriting failed: {e}")
+        log.error("Resume rewriting failed: %s", e)
         resume_json["rewritten_text"] = resume_json.get("raw_text", "")
         resume_json["no_changes_needed"] = True
         resume_json["change_reason"] = f"Error occurred: {str(e)}"
         return resume_json
 
 
+def rewrite_resume_stream(
+    resume_json: dict,
+    instruction: str = None,
+    job_description: str = None,
+    chunked: bool = None,
+):
+    """Stream the rewritten resume text as it is generated.
+
+    Yields text deltas suitable for `st.write_stream`. Once the stream is
+    exhausted, `rewritten_text` and the same change metadata as
+    `rewrite_resume` are set on `resume_json`. If the LLM fails before any
+    text arrives, the original text is yielded instead. If it fails midway,
+    the result is marked incomplete: `stream_error` is set, the cut-off text
+    is kept in `partial_text` and `rewritten_text` stays the original. In
+    chunked mode each rewritten chunk is yielded whole, in resume order.
+    """
+    resume_json.pop("stream_error", None)
+    resume_json.pop("partial_text", None)
+    raw_text = resume_json.get("raw_text", "")
+    sections = _chunk_sections(raw_text, chunked)
+    if sections is not None:
+        yield from _rewrite_chunked_stream(resume_json, sections, instruction, job_description)
+        return
+
+    prompt = _build_rewrite_prompt(raw_text, instruction, job_description)
+    resume_json["prompt_compaction"] = prompt.compaction
+    chunks = []
+    try:
+        for delta in generate_text_stream(
+            prompt, task="tailor" if job_description else "rewrite"
+        ):
+            chunks.append(delta)
+            yield delta
+    except Exception as llm_error:
+        if chunks:
+            log.warning("Resume rewrite stream interrupted (%s)", llm_error)
+            for key in ("changes", "change_counts", "similarity_percentage"):
+                resume_json.pop(key, None)
+            resume_json["stream_error"] = str(llm_error)
+            resume_json["partial_text"] = "".join(chunks)
+            resume_json["rewritten_text"] = raw_text
+            resume_json["no_changes_needed"] = False
+            resume_json["change_reason"] = "Rewrite interrupted - incomplete result discarded"
+            return
+        else:
+            log.warning("LLM not available (%s); returning original text as rewritten_text", llm_error)
+            resume_json["rewritten_text"] = raw_text
+            resume_json["no_changes_needed"] = True
+            resume_json["change_reason"] = (
+                "AI service unavailable - fallback to original"
+            )
+            yield raw_text
+            return
+
+    rewritten_text = "".join(chunks)
+    _annotate_changes(resume_json, raw_text, rewritten_text)
+    resume_json["rewritten_text"] = rewritten_text
+
+
 class ResumeRewriter:
     """Compatibility wrapper providing a class-based API expected by pages.
 
     Methods:
       - rewrite_resume(parsed_resume): returns rewritten text (string)
       - tailor_to_job(parsed_resume, job_description): tailor to JD
+      - rewrite_resume_stream / tailor_to_job_stream: same, yielding text deltas
     """
 
     def __init__(self):
@@ -135,7 +383,18 @@ class ResumeRewriter:
         return result.get("rewritten_text", parsed_resume.get("raw_text", ""))
 
     def tailor_to_job(self, parsed_resume: dict, job_description: str) -> str:
-        """Tailor resume to a job description by passing instruction to the rewrite function."""
-        instruction = f"Tailor the resume to the following job description:\n{job_description}"
-        result = rewrite_resume(parsed_resume, instruction=instruction)
+        """Tailor resume to a job description by passing it to the rewrite function."""
+        result = rewrite_resume(parsed_resume, job_description=job_description)
         return result.get("rewritten_text", parsed_resume.get("raw_text", ""))
+
+    def rewrite_resume_stream(self, parsed_resume: dict, chunked: bool = None):
+        """Stream rewritten resume text deltas (e.g. for st.write_stream)."""
+        return rewrite_resume_stream(parsed_resume, chunked=chunked)
+
+    def tailor_to_job_stream(
+        self, parsed_resume: dict, job_description: str, chunked: bool = None
+    ):
+        """Stream a resume tailored to a job description."""
+        return rewrite_resume_stream(
+            parsed_resume, job_description=job_description, chunked=chunked
+        )
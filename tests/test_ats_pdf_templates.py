@@ -0,0 +1,67 @@
+"""Tests for section detection in utils.ats_pdf_templates"""
+
+import pytest
+
+from utils.ats_pdf_templates import ATSResumeTemplates
+
+
+@pytest.mark.parametrize(
+    "line, section",
+    [
+        ("Experience", "experience"),
+        ("WORK EXPERIENCE", "experience"),
+        ("Relevant Experience", "experience"),
+        ("Technical skills:", "skills"),
+        ("## Education", "education"),
+        ("Projects", "projects"),
+        ("Academic Projects", "projects"),
+        ("PROFESSIONAL SUMMARY", "summary"),
+    ],
+)
+def test_detect_section_headers(line, section):
+    assert ATSResumeTemplates.detect_section(line) == section
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "Senior Project Manager",
+        "Skills Lead",
+        "Education Program Coordinator",
+        "Experience Design Lead",
+        "Expertise: Python, SQL",
+        "Led projects for five clients",
+        "5 years of experience in Python and SQL",
+    ],
+)
+def test_detect_section_ignores_job_titles_and_sentences(line):
+    assert ATSResumeTemplates.detect_section(line) is None
+
+
+def test_split_sections_keeps_job_title_in_its_section():
+    text = "\n".join([
+        "Experience",
+        "Acme Corp",
+        "Senior Project Manager",
+        "• Delivered the billing migration",
+        "",
+        "Skills",
+        "Python, SQL",
+    ])
+
+    sections = [section for section, _ in ATSResumeTemplates.split_sections(text)]
+
+    assert sections == ["experience", "skills"]
+
+
+def test_projects_render_in_every_template():
+    text = "Projects\nResumeBot\n• Parses resumes\n\nEducation\nBSc Computer Science"
+    templates = ATSResumeTemplates()
+    assert templates.parse_resume_content(text)["projects"] == ["ResumeBot\n• Parses resumes"]
+    for create in (
+        templates.create_modern_template,
+        templates.create_classic_template,
+        templates.create_executive_template,
+        templates.create_tech_template,
+    ):
+        assert create(text).getvalue().startswith(b"%PDF")
@@ -0,0 +1,62 @@
+"""Tests for utils.llm_compaction"""
+
+from utils.llm_compaction import compact_text, estimate_tokens
+
+HEADER = "Jane Doe | jane.doe@example.com | Resume"
+
+
+def _paged_resume():
+    """Three-page resume with the same running header at the top of every page"""
+    pages = [
+        ["SUMMARY", "Data engineer building batch and streaming pipelines."],
+        ["EXPERIENCE", "Acme Corp - Data Engineer"]
+        + [f"• Built ingestion job {i} processing millions of events per day" for i in range(10)],
+        ["EDUCATION", "BSc Computer Science, State University"],
+    ]
+    lines = []
+    for page in pages:
+        lines.append(HEADER)
+        lines.extend(page)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def test_repeated_page_header_is_removed_before_truncating():
+    text = _paged_resume()
+    # Just enough room for the resume with a single copy of the header
+    budget = estimate_tokens(text.replace(HEADER + "\n", "", 2))
+
+    compacted, report = compact_text(text, budget)
+
+    assert report["duplicate_lines"] == 2
+    assert report["truncated_lines"] == 0
+    assert compacted.count(HEADER) == 1
+    assert "BSc Computer Science, State University" in compacted
+
+
+def test_repeated_page_header_is_kept_under_budget():
+    text = _paged_resume()
+
+    compacted, report = compact_text(text, estimate_tokens(text) + 100)
+
+    assert report["duplicate_lines"] == 0
+    assert compacted.count(HEADER) == 3
+
+
+def test_identical_bullets_under_different_roles_are_kept():
+    bullet = "• Mentored two junior engineers through their first year"
+    text = "\n".join([
+        "EXPERIENCE",
+        "Acme Corp - Senior Engineer",
+        bullet,
+        "",
+        "PROJECTS",
+        "Open source maintainer",
+        bullet,
+        "x" * 400,
+    ])
+
+    compacted, report = compact_text(text, estimate_tokens(text) - 10)
+
+    assert report["duplicate_lines"] == 0
+    assert compacted.count(bullet) == 2
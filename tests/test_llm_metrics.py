@@ -0,0 +1,28 @@
+"""Tests for utils.llm_metrics"""
+
+import time
+
+from utils.llm_metrics import LLMMetrics, build_call_record
+
+
+def test_cancelled_stream_record_is_not_ok():
+    record = build_call_record("rewrite", time.time(), stream=True, cancelled=True)
+    assert record["status"] == "cancelled"
+    assert record["ttft"] is None
+
+
+def test_error_takes_precedence_over_cancelled():
+    record = build_call_record("rewrite", time.time(), error=Exception("boom"), cancelled=True)
+    assert record["status"] == "error"
+
+
+def test_summary_counts_cancelled_calls_separately():
+    metrics = LLMMetrics(sinks="memory")
+    start = time.time()
+    metrics.emit(build_call_record("rewrite", start, stream=True, ttft=0.2, cancelled=True))
+    metrics.emit(build_call_record("rewrite", start, stream=True, ttft=0.1))
+    summary = metrics.summary()
+    assert summary["calls"] == 2
+    assert summary["cancelled"] == 1
+    assert summary["errors"] == 0
+    assert summary["ttft_p50"] is not None
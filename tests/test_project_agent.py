@@ -0,0 +1,35 @@
+"""Tests for parsing project suggestions in agents.project_agent"""
+
+import json
+
+import pytest
+
+from agents.project_agent import _extract_projects
+
+PROJECT = {
+    "title": "Resume Parser API",
+    "description": "A REST API that extracts structured data from resumes.",
+    "skills": ["Python", "FastAPI"],
+    "difficulty": "Intermediate",
+    "duration": "2 weeks",
+}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"projects": [PROJECT]},
+        [PROJECT],
+        PROJECT,
+        {"projects": PROJECT},
+    ],
+)
+def test_extract_projects_accepts_list_shapes(data):
+    assert _extract_projects(data, json.dumps(data), ["Python"]) == [PROJECT]
+
+
+@pytest.mark.parametrize("data", ["just some text", 42, {"ideas": "none"}, {"projects": "n/a"}])
+def test_extract_projects_falls_back_for_non_project_json(data):
+    text = "Title: Resume Parser API\nDescription: Extracts data from resumes"
+    projects = _extract_projects(data, text, ["Python"])
+    assert [project["title"] for project in projects] == ["Resume Parser API"]
@@ -0,0 +1,19 @@
+"""Tests for utils.resume_diff"""
+
+from utils.resume_diff import diff_resume
+
+
+def test_tied_candidates_pair_with_the_earliest():
+    original = "Led a team of five engineers"
+    rewritten = "Led a team of five engineers on payments\nLed a team of five engineers on platform"
+    changes = diff_resume(original, rewritten)["changes"]
+    assert [c["type"] for c in changes] == ["modified", "added"]
+    assert changes[0]["new_line"] == 1
+    assert changes[1]["after"].endswith("platform")
+
+
+def test_dissimilar_lines_are_removed_and_added():
+    result = diff_resume("Managed vendor contracts", "Built Kafka streaming pipelines")
+    assert result["counts"]["removed"] == 1
+    assert result["counts"]["added"] == 1
+    assert result["counts"]["modified"] == 0
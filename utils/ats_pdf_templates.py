@@ -23,6 +23,39 @@ import re
 class ATSResumeTemplates:
     """Professional ATS-optimized resume templates"""
 
+    # Common section headers
+    SECTION_KEYWORDS = {
+        # Before education, so "Academic Projects" is a projects header
+        "projects": [
+            "projects",
+            "personal projects",
+            "academic projects",
+            "portfolio",
+        ],
+        "summary": [
+            "summary",
+            "professional summary",
+            "profile",
+            "objective",
+            "about",
+            "about me",
+        ],
+        "experience": [
+            "experience",
+            "work experience",
+            "employment",
+            "professional experience",
+            "work history",
+        ],
+        "education": ["education", "academic", "qualifications"],
+        "skills": [
+            "skills",
+            "technical skills",
+            "core competencies",
+            "expertise",
+        ],
+    }
+
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
@@ -134,6 +167,7 @@ class ATSResumeTemplates:
             "summary": "",
             "experience": [],
             "education": [],
+            "projects": [],
             "skills": [],
             "other_sections": [],
         }
@@ -144,31 +178,6 @@ class ATSResumeTemplates:
         current_section = None
         current_content = []
 
-        # Common section headers
-        section_keywords = {
-            "summary": [
-                "summary",
-                "professional summary",
-                "profile",
-                "objective",
-                "about",
-            ],
-            "experience": [
-                "experience",
-                "work experience",
-                "employment",
-                "professional experience",
-                "work history",
-            ],
-            "education": ["education", "academic", "qualifications"],
-            "skills": [
-                "skills",
-                "technical skills",
-                "core competencies",
-                "expertise",
-            ],
-        }
-
         for line in lines:
             line_stripped = line.strip()
 
@@ -176,39 +185,166 @@ class ATSResumeTemplates:
                 continue
 
             # Check if this is a section header
-            is_section = False
-            line_lower = line_stripped.lower()
-
-            for section_type, keywords in section_keywords.items():
-                if any(keyword in line_lower for keyword in keywords):
-                    # Save previous section
-                    if current_section and current_content:
-                        if current_section == "summary":
-                            sections["summary"] = "\n".join(current_content)
-                        elif current_section in ["experience", "education"]:
-                            sections[current_section].append("\n".join(current_content))
-                        elif current_section == "skills":
-                            sections["skills"].extend(current_content)
-
-                    current_section = section_type
-                    current_content = []
-                    is_section = True
-                    break
-
-            if not is_section and current_section:
+            section_type = self.detect_section(line_stripped)
+            if section_type:
+                # Save previous section
+                if current_section and current_content:
+                    if current_section == "summary":
+                        sections["summary"] = "\n".join(current_content)
+                    elif current_section in ["experience", "education", "projects"]:
+                        sections[current_section].append("\n".join(current_content))
+                    elif current_section == "skills":
+                        sections["skills"].extend(current_content)
+
+                current_section = section_type
+                current_content = []
+            elif current_section:
                 current_content.append(line_stripped)
 
         # Save final section
         if current_section and current_content:
             if current_section == "summary":
                 sections["summary"] = "\n".join(current_content)
-            elif current_section in ["experience", "education"]:
+            elif current_section in ["experience", "education", "projects"]:
                 sections[current_section].append("\n".join(current_content))
             elif current_section == "skills":
                 sections["skills"].extend(current_content)
 
         return sections
 
+    # Longest line (in words) that can be a section header
+    MAX_HEADER_WORDS = 4
+
+    # Words that may sit between capitalized words of a title-case header
+    _HEADER_CONNECTORS = {"and", "&", "of", "the", "/", "-"}
+
+    @classmethod
+    def detect_section(cls, line):
+        """
+        Section type ("projects", "summary", "experience", "education",
+        "skills") if the line is a section header, else None
+
+        A header is a short line (at most MAX_HEADER_WORDS words) that is
+        just a keyword ("Experience"), or contains one and looks like a
+        header: all caps ("WORK HISTORY & SKILLS"), ends in a colon
+        ("Technical skills:") or is title case ending in the keyword
+        ("Relevant Experience"). Job titles such as "Senior Project
+        Manager" or "Skills Lead" and sentences are not headers.
+        """
+        name = line.strip().strip("#*•").strip()
+        has_colon = name.endswith(":")
+        name = name.rstrip(":").strip()
+        name_lower = name.lower()
+        words = name.split()
+        if not words or len(words) > cls.MAX_HEADER_WORDS:
+            return None
+        all_caps = name.isupper()
+        title_case = all(
+            word[0].isupper() or word.lower() in cls._HEADER_CONNECTORS for word in words
+        )
+        for section_type, keywords in cls.SECTION_KEYWORDS.items():
+            for keyword in keywords:
+                if keyword not in name_lower:
+                    continue
+                if (
+                    name_lower == keyword
+                    or all_caps
+                    or has_colon
+                    or (title_case and name_lower.endswith(keyword))
+                ):
+                    return section_type
+        return None
+
+    @classmethod
+    def split_sections(cls, text):
+        """
+        Split resume text into blocks, tagged with their section type
+
+        Uses the same header detection (detect_section) as
+        parse_resume_content, but keeps every line: each blank-line separated
+        block (e.g. one experience entry or project) becomes its own block, a
+        header stays with the block below it, and text before the first
+        header is tagged None.
+        Joining the blocks with blank lines restores the resume.
+        Returns: list of (section_type, block_text) tuples in order
+        """
+        blocks = []
+        current_section = None
+        current_lines = []
+
+        def flush():
+            if current_lines:
+                blocks.append((current_section, "\n".join(current_lines)))
+
+        for line in text.split("\n"):
+            line = line.rstrip()
+            if not line.strip():
+                flush()
+                current_lines = []
+                continue
+            section_type = cls.detect_section(line)
+            if section_type:
+                flush()
+                current_section = section_type
+                current_lines = []
+            current_lines.append(line)
+        flush()
+
+        # A header on its own line, followed by a blank line, belongs to the block below it
+        merged = []
+        for section_type, block in blocks:
+            if (
+                merged
+                and merged[-1][0] == section_type
+                and "\n" not in merged[-1][1]
+                and cls.detect_section(merged[-1][1])
+            ):
+                merged[-1] = (section_type, merged[-1][1] + "\n" + block)
+            else:
+                merged.append((section_type, block))
+        return merged
+
+    def _add_projects(
+        self,
+        story,
+        projects,
+        heading,
+        heading_style,
+        rule=None,
+        title_style=None,
+        bullet="•",
+        space_after=0.08,
+    ):
+        """
+        Append the projects section to a template's story
+
+        Args:
+            projects: Project entries from parse_resume_content
+            heading: Section heading text, in the template's voice
+            heading_style: Paragraph style of the heading
+            rule: HRFlowable arguments for a rule under the heading (None: no rule)
+            title_style: Style of each entry's first line (None: body text)
+            bullet: Bullet character used by the template
+            space_after: Space after each entry, in inches
+        """
+        if not projects:
+            return
+        story.append(Paragraph(heading, heading_style))
+        if rule:
+            story.append(HRFlowable(width="100%", **rule))
+        for project in projects:
+            lines = [line for line in project.split("\n") if line.strip()]
+            for index, line in enumerate(lines):
+                if index == 0 and title_style is not None:
+                    story.append(Paragraph(line, title_style))
+                elif line.startswith("•") or line.startswith("-"):
+                    story.append(
+                        Paragraph(f"{bullet} {line[1:].strip()}", self.styles["BulletPoint"])
+                    )
+                else:
+                    story.append(Paragraph(line, self.styles["ResumeBody"]))
+            story.append(Spacer(1, space_after * inch))
+
     def create_modern_template(
         self, text, name="Professional", contact_info=None, filename=None
     ):
@@ -298,6 +434,17 @@ class ATSResumeTemplates:
 
                     story.append(Spacer(1, 0.1 * inch))
 
+        # Projects
+        self._add_projects(
+            story,
+            sections["projects"],
+            "PROJECTS",
+            self.styles["SectionHeading"],
+            rule={"thickness": 1, "color": colors.HexColor("#2E86AB"), "spaceAfter": 8},
+            title_style=self.styles["JobTitle"],
+            space_after=0.1,
+        )
+
         # Education
         if sections["education"]:
             story.append(Paragraph("EDUCATION", self.styles["SectionHeading"]))
@@ -430,6 +577,15 @@ class ATSResumeTemplates:
                             story.append(Paragraph(line, self.styles["ResumeBody"]))
                 story.append(Spacer(1, 0.1 * inch))
 
+        self._add_projects(
+            story,
+            sections["projects"],
+            "PROJECTS",
+            classic_section_style,
+            rule={"thickness": 2, "color": colors.black, "spaceAfter": 6},
+            space_after=0.1,
+        )
+
         if sections["education"]:
             story.append(Paragraph("EDUCATION", classic_section_style))
             story.append(
@@ -549,6 +705,8 @@ class ATSResumeTemplates:
                             story.append(Paragraph(line, self.styles["ResumeBody"]))
                 story.append(Spacer(1, 0.08 * inch))
 
+        self._add_projects(story, sections["projects"], "KEY PROJECTS", exec_section_style)
+
         if sections["education"]:
             story.append(Paragraph("EDUCATION & CREDENTIALS", exec_section_style))
             for edu in sections["education"]:
@@ -685,6 +843,15 @@ class ATSResumeTemplates:
                             story.append(Paragraph(line, self.styles["ResumeBody"]))
                 story.append(Spacer(1, 0.08 * inch))
 
+        self._add_projects(
+            story,
+            sections["projects"],
+            "// PROJECTS",
+            tech_section_style,
+            rule={"thickness": 1, "color": colors.HexColor("#06A77D"), "spaceAfter": 8},
+            bullet="▹",
+        )
+
         if sections["education"]:
             story.append(Paragraph("// EDUCATION", tech_section_style))
             story.append(
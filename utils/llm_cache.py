@@ -0,0 +1,188 @@
+"""
+LLM Response Cache
+Persistent, content-addressed cache for MultiModelLLM responses backed by SQLite
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+DEFAULT_CACHE_PATH = os.path.join("data", "cache", "llm_responses.db")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so that whitespace-only differences share a cache key"""
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in prompt.strip().splitlines()]
+    return "\n".join(lines)
+
+
+def make_cache_key(
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    provider: str
+) -> str:
+    """
+    Build a content-addressed cache key
+
+    Args:
+        prompt: The prompt sent to the LLM (normalized before hashing)
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+        provider: Provider/model signature, e.g. "groq/llama-3.3-70b-versatile"
+
+    Returns:
+        SHA-256 hex digest identifying the request
+    """
+    payload = json.dumps(
+        {
+            "prompt": normalize_prompt(prompt),
+            "temperature": round(float(temperature), 3),
+            "max_tokens": int(max_tokens),
+            "provider": provider,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    On-disk LLM response cache with TTL expiry and LRU size eviction
+
+    Safe to share between threads (Streamlit sessions); every operation opens
+    a short-lived SQLite connection under a lock.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None
+    ):
+        self.path = path or os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.ttl_seconds = int(
+            ttl_seconds if ttl_seconds is not None
+            else os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+        )
+        self.max_entries = int(
+            max_entries if max_entries is not None
+            else os.getenv("LLM_CACHE_MAX_ENTRIES", 2000)
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection for one transaction: committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        """Create the cache table if it does not exist"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    provider TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+                "ON responses(last_access)"
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response
+
+        Returns:
+            Dict with 'response' and 'provider' keys, or None on miss/expiry
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, provider, created_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, provider, created_at = row
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+            return {"response": response, "provider": provider}
+
+    def set(self, key: str, response: str, provider: str = ""):
+        """Store a response and evict expired / least recently used entries"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, provider, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, provider, response, now, now),
+            )
+            if self.ttl_seconds > 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?",
+                    (now - self.ttl_seconds,),
+                )
+            if self.max_entries > 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE key NOT IN ("
+                    "SELECT key FROM responses ORDER BY last_access DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        with self._lock, self._connect() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,315 @@
+"""
+Prompt Compaction
+Per-provider token estimates and a compaction stage that fits resume and job
+description text into a prompt token budget, reporting what was dropped
+"""
+
+import os
+import re
+import math
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Average characters per token for each provider's tokenizer on English prose
+CHARS_PER_TOKEN = {
+    "groq": 4.0,
+    "openai": 4.0,
+    "gemini": 4.0,
+    "anthropic": 3.5,
+    "fake": 4.0,
+}
+
+# Lines that carry no content for the model (page furniture, job-board chrome)
+_COMMON_BOILERPLATE = [
+    r"^page \d+( of \d+)?$",
+    r"^-*\s*page \d+\s*-*$",
+    r"^\d+\s*(/|of)\s*\d+$",
+]
+_RESUME_BOILERPLATE = _COMMON_BOILERPLATE + [
+    r"^references (are )?available (up)?on request\.?$",
+    r"^curriculum vitae$",
+    r"^resume$",
+    r"^i hereby declare\b.*",
+]
+_JD_BOILERPLATE = _COMMON_BOILERPLATE + [
+    r".*\bequal (employment )?opportunity employer\b.*",
+    r".*\breasonable accommodations?\b.*",
+    r"^(apply|apply now|apply today|easy apply|save|save job|share|share this job)$",
+    r"^report (this )?job$",
+    r"^show (more|less)$",
+    r"^see more$",
+    r"^(posted|reposted) .*\bago$",
+    r"^\d+\+? (applicants|applications)$",
+]
+
+# Sections dropped first when over budget, lowest value first
+_RESUME_LOW_VALUE_SECTIONS = [
+    "references",
+    "declaration",
+    "personal details",
+    "personal information",
+    "hobbies",
+    "interests",
+    "hobbies and interests",
+    "extracurricular activities",
+    "extra-curricular activities",
+]
+_JD_LOW_VALUE_SECTIONS = [
+    "equal opportunity",
+    "how to apply",
+    "benefits",
+    "perks",
+    "perks and benefits",
+    "what we offer",
+    "about us",
+    "about the company",
+    "who we are",
+    "our culture",
+]
+_KNOWN_HEADINGS = set(_RESUME_LOW_VALUE_SECTIONS + _JD_LOW_VALUE_SECTIONS + [
+    "summary", "professional summary", "profile", "objective", "experience",
+    "work experience", "professional experience", "employment", "work history",
+    "education", "skills", "technical skills", "core competencies", "projects",
+    "certifications", "awards", "achievements", "publications", "languages",
+    "responsibilities", "requirements", "qualifications", "preferred qualifications",
+    "about the role", "role", "what you'll do", "what you will do", "nice to have",
+])
+
+# Repeated lines shorter than this (e.g. "Python") may be legitimate content
+_MIN_DUPLICATE_LINE_LENGTH = 12
+
+# Longest line that can be a running page header/footer ("Name | email | Resume")
+_MAX_RUNNING_LINE_LENGTH = 80
+
+_BULLET_PREFIXES = ("-", "*", "•", "▪", "·", "◦", "‣", "–")
+
+
+@lru_cache(maxsize=1)
+def _tiktoken_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str, provider_type: Optional[str] = None) -> int:
+    """
+    Estimate how many tokens `text` costs with a provider
+
+    Uses tiktoken for OpenAI when it is installed, otherwise the provider's
+    characters-per-token ratio. Without a provider the most conservative
+    ratio is used, since the prompt may be served by any of them.
+    """
+    if not text:
+        return 0
+    if provider_type == "openai":
+        encoding = _tiktoken_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+    ratio = CHARS_PER_TOKEN.get(provider_type, min(CHARS_PER_TOKEN.values()))
+    return math.ceil(len(text) / ratio)
+
+
+def get_prompt_token_budget() -> int:
+    """Prompt token budget from LLM_PROMPT_TOKEN_BUDGET (0 disables trimming)"""
+    return int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", 6000))
+
+
+def _heading_of(line: str) -> Optional[str]:
+    """Return the normalized heading if `line` looks like a section heading"""
+    stripped = line.strip().strip("#*").strip()
+    name = stripped.rstrip(":").strip().lower()
+    if not name or len(name) > 40 or len(name.split()) > 5:
+        return None
+    if name in _KNOWN_HEADINGS:
+        return name
+    if stripped.isupper() and any(c.isalpha() for c in stripped):
+        return name
+    return None
+
+
+def _split_sections(lines: List[str]) -> List[Tuple[Optional[str], List[str]]]:
+    """Group lines under their section heading (None for text before the first one)"""
+    sections: List[Tuple[Optional[str], List[str]]] = [(None, [])]
+    for line in lines:
+        heading = _heading_of(line)
+        if heading is not None:
+            sections.append((heading, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [section for section in sections if section[1]]
+
+
+def _dedupe_sections(
+    sections: List[Tuple[Optional[str], List[str]]], report: Dict[str, Any]
+) -> List[Tuple[Optional[str], List[str]]]:
+    """Drop lines repeated within the same section, counting them in report["duplicate_lines"]"""
+    deduped = []
+    for heading, section_lines in sections:
+        kept, seen = [], set()
+        for line in section_lines:
+            key = " ".join(line.split()).lower()
+            if len(key) >= _MIN_DUPLICATE_LINE_LENGTH:
+                if key in seen:
+                    report["duplicate_lines"] += 1
+                    continue
+                seen.add(key)
+            kept.append(line)
+        deduped.append((heading, kept))
+    return deduped
+
+
+def _dedupe_running_lines(
+    sections: List[Tuple[Optional[str], List[str]]], report: Dict[str, Any]
+) -> List[Tuple[Optional[str], List[str]]]:
+    """
+    Drop short non-bullet lines repeated across sections, keeping the first
+
+    These are the running headers and footers of PDF / OCR pages, which
+    land in whatever section each page break falls in. Bullets are left
+    alone, so identical bullets under different roles survive.
+    """
+    deduped, seen = [], set()
+    for heading, section_lines in sections:
+        kept = []
+        for line in section_lines:
+            key = " ".join(line.split()).lower()
+            if (
+                _MIN_DUPLICATE_LINE_LENGTH <= len(key) <= _MAX_RUNNING_LINE_LENGTH
+                and not key.startswith(_BULLET_PREFIXES)
+            ):
+                if key in seen:
+                    report["duplicate_lines"] += 1
+                    continue
+                seen.add(key)
+            kept.append(line)
+        deduped.append((heading, kept))
+    return deduped
+
+
+def _join(lines: List[str]) -> str:
+    return "\n".join(lines).strip()
+
+
+def compact_text(
+    text: str,
+    token_budget: Optional[int] = None,
+    kind: str = "resume",
+    provider_type: Optional[str] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Shrink resume or job description text before it goes into a prompt
+
+    Always removes boilerplate lines and collapses blank runs. Only if the
+    text is over `token_budget` are repeated lines removed: any line
+    repeated within a section, then short non-bullet lines repeated across
+    sections (running page headers/footers); identical bullets under
+    different roles are kept. If it is still over, whole low-value
+    sections (references, hobbies, benefits, EEO statements, ...) are
+    dropped, and as a last resort lines are cut from the end.
+
+    Args:
+        text: Resume or job description text
+        token_budget: Maximum tokens for this text (None or <= 0: no trimming)
+        kind: "resume" or "job_description", selects boilerplate and section rules
+        provider_type: Provider to estimate tokens for (None: conservative)
+
+    Returns:
+        (compacted_text, report) where report lists what was removed
+    """
+    original_tokens = estimate_tokens(text, provider_type)
+    report: Dict[str, Any] = {
+        "original_tokens": original_tokens,
+        "tokens": original_tokens,
+        "duplicate_lines": 0,
+        "boilerplate_lines": 0,
+        "dropped_sections": [],
+        "truncated_lines": 0,
+    }
+    if not text:
+        return text, report
+
+    is_jd = kind == "job_description"
+    boilerplate = [re.compile(p, re.IGNORECASE) for p in (_JD_BOILERPLATE if is_jd else _RESUME_BOILERPLATE)]
+
+    lines = []
+    previous_blank = False
+    for line in text.splitlines():
+        line = line.rstrip()
+        key = " ".join(line.split()).lower()
+        if not key:
+            # Collapse runs of blank lines
+            if not previous_blank and lines:
+                lines.append("")
+            previous_blank = True
+            continue
+        previous_blank = False
+        if any(pattern.match(key) for pattern in boilerplate):
+            report["boilerplate_lines"] += 1
+            continue
+        lines.append(line)
+
+    compacted = _join(lines)
+    tokens = estimate_tokens(compacted, provider_type)
+
+    if token_budget and token_budget > 0 and tokens > token_budget:
+        sections = _dedupe_sections(_split_sections(lines), report)
+        lines = [line for _, section_lines in sections for line in section_lines]
+        compacted = _join(lines)
+        tokens = estimate_tokens(compacted, provider_type)
+
+    if token_budget and token_budget > 0 and tokens > token_budget:
+        sections = _dedupe_running_lines(sections, report)
+        lines = [line for _, section_lines in sections for line in section_lines]
+        compacted = _join(lines)
+        tokens = estimate_tokens(compacted, provider_type)
+
+    if token_budget and token_budget > 0 and tokens > token_budget:
+        for low_value in (_JD_LOW_VALUE_SECTIONS if is_jd else _RESUME_LOW_VALUE_SECTIONS):
+            if tokens <= token_budget:
+                break
+            for index, (heading, _) in enumerate(sections):
+                if heading and (heading == low_value or heading.startswith(low_value)):
+                    report["dropped_sections"].append(heading)
+                    del sections[index]
+                    lines = [line for _, section_lines in sections for line in section_lines]
+                    compacted = _join(lines)
+                    tokens = estimate_tokens(compacted, provider_type)
+                    break
+
+        # Still over budget: keep the top of the text (most recent / most relevant first)
+        while tokens > token_budget and lines:
+            overflow_chars = int((tokens - token_budget) * CHARS_PER_TOKEN.get(provider_type, 3.5))
+            cut = 0
+            while lines and cut < max(overflow_chars, 1):
+                cut += len(lines.pop()) + 1
+                report["truncated_lines"] += 1
+            compacted = _join(lines)
+            tokens = estimate_tokens(compacted, provider_type)
+
+    report["tokens"] = tokens
+    return compacted, report
+
+
+def describe_compaction(report: Dict[str, Any]) -> str:
+    """One-line human readable summary of a compaction report"""
+    parts = []
+    if report.get("duplicate_lines"):
+        parts.append(f"{report['duplicate_lines']} repeated lines")
+    if report.get("boilerplate_lines"):
+        parts.append(f"{report['boilerplate_lines']} boilerplate lines")
+    if report.get("dropped_sections"):
+        parts.append("sections: " + ", ".join(report["dropped_sections"]))
+    if report.get("truncated_lines"):
+        parts.append(f"{report['truncated_lines']} trailing lines")
+    if not parts:
+        return "nothing removed"
+    return (
+        f"removed {'; '.join(parts)} "
+        f"({report['original_tokens']} -> {report['tokens']} tokens)"
+    )
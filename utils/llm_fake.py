@@ -0,0 +1,259 @@
+"""
+Fake LLM Provider
+Record real provider traffic and replay it offline for benchmarking and load tests
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Optional, Dict, Any, Iterator
+from dotenv import load_dotenv
+
+from utils.llm_cache import make_cache_key
+
+load_dotenv()
+
+
+DEFAULT_RECORDING_PATH = os.path.join("data", "cache", "llm_recordings.jsonl")
+
+_SYNTHETIC_WORDS = (
+    "led designed built optimized delivered improved scalable python data "
+    "pipeline team customers latency reduced increased automated platform "
+    "analytics cloud service api dashboard reliability growth revenue users "
+    "migrated streamlined launched mentored architecture performance model"
+).split()
+
+
+def recording_key(prompt: str, temperature: float, max_tokens: int) -> str:
+    """Key a recorded request independently of which real provider served it"""
+    return make_cache_key(prompt, temperature, max_tokens, provider="")
+
+
+def _synthetic_words(rng: random.Random, min_length: int, count: int) -> str:
+    """At least `count` random words, and at least `min_length` characters"""
+    words = [rng.choice(_SYNTHETIC_WORDS) for _ in range(count)]
+    while len(" ".join(words)) < min_length:
+        words.append(rng.choice(_SYNTHETIC_WORDS))
+    return " ".join(words)
+
+
+def _synthetic_value(schema: Dict[str, Any], rng: random.Random) -> Any:
+    """
+    Random value satisfying the JSON Schema subset used by the agents
+
+    Objects get every listed property, arrays minItems (or 3, capped by
+    maxItems) items, strings an enum member or enough words for minLength.
+    """
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "string")
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    if kind == "object" or "properties" in schema:
+        properties = schema.get("properties", {})
+        names = list(properties) + [n for n in schema.get("required", []) if n not in properties]
+        return {name: _synthetic_value(properties.get(name, {}), rng) for name in names}
+    if kind == "array":
+        count = schema.get("minItems", min(3, schema.get("maxItems", 3)))
+        items = schema.get("items", {})
+        return [_synthetic_value(items, rng) for _ in range(count)]
+    if kind == "integer":
+        return rng.randint(schema.get("minimum", 1), schema.get("maximum", 10))
+    if kind == "number":
+        return round(rng.uniform(schema.get("minimum", 0), schema.get("maximum", 100)), 2)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    min_length = schema.get("minLength", 0)
+    text = _synthetic_words(rng, min_length, 4 if min_length < 20 else 12)
+    return text.capitalize() if min_length < 20 else text.capitalize() + "."
+
+
+class FakeLLMBackend:
+    """
+    Record/replay backend behind the built-in "fake" provider type
+
+    Modes (LLM_FAKE_MODE):
+      - record: real providers serve requests and every successful
+        request/response pair is appended to LLM_FAKE_RECORDING_PATH (JSONL)
+      - replay: the fake provider replaces real providers and serves recorded
+        responses, or deterministic synthetic text for unseen prompts (JSON
+        matching the schema for structured prompts, see with_json_schema)
+
+    Replay latency is drawn from LLM_FAKE_LATENCY_DISTRIBUTION (normal,
+    lognormal or recorded) with LLM_FAKE_LATENCY_MEAN_MS / _JITTER_MS, and
+    LLM_FAKE_ERROR_RATE of calls raise a simulated provider error.
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        path: Optional[str] = None,
+        latency_distribution: Optional[str] = None,
+        latency_mean_ms: Optional[float] = None,
+        latency_jitter_ms: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        seed: Optional[int] = None
+    ):
+        self.mode = (mode or os.getenv("LLM_FAKE_MODE", "off")).lower()
+        self.path = path or os.getenv("LLM_FAKE_RECORDING_PATH", DEFAULT_RECORDING_PATH)
+        self.latency_distribution = (
+            latency_distribution or os.getenv("LLM_FAKE_LATENCY_DISTRIBUTION", "normal")
+        ).lower()
+        self.latency_mean_ms = float(
+            latency_mean_ms if latency_mean_ms is not None
+            else os.getenv("LLM_FAKE_LATENCY_MEAN_MS", 800)
+        )
+        self.latency_jitter_ms = float(
+            latency_jitter_ms if latency_jitter_ms is not None
+            else os.getenv("LLM_FAKE_LATENCY_JITTER_MS", 300)
+        )
+        self.error_rate = float(
+            error_rate if error_rate is not None else os.getenv("LLM_FAKE_ERROR_RATE", 0.0)
+        )
+        self._rng = random.Random(
+            int(seed if seed is not None else os.getenv("LLM_FAKE_SEED", 42))
+        )
+        self._lock = threading.Lock()
+        self.recordings: Dict[str, Dict[str, Any]] = {}
+        self.served = {"recorded": 0, "synthetic": 0, "errors": 0}
+        if self.mode == "replay":
+            self._load_recordings()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load_recordings(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.recordings[entry["key"]] = entry
+
+    def record(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response: str,
+        provider: str = "",
+        model: str = "",
+        latency: Optional[float] = None
+    ):
+        """Append one request/response pair to the recording file"""
+        entry = {
+            "key": recording_key(prompt, temperature, max_tokens),
+            "prompt": prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "provider": provider,
+            "model": model,
+            "response": response,
+            "latency": round(latency, 3) if latency is not None else None,
+            "recorded_at": time.time(),
+        }
+        directory = os.path.dirname(self.path)
+        with self._lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self.recordings[entry["key"]] = entry
+
+    def _synthetic_text(self, prompt: str, max_tokens: int) -> str:
+        """Deterministic pseudo-resume text derived from the prompt hash"""
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16], 16)
+        rng = random.Random(seed)
+        n_words = max(8, min(max_tokens, 60 + len(prompt) // 20))
+        lines, line = [], []
+        for _ in range(n_words):
+            line.append(rng.choice(_SYNTHETIC_WORDS))
+            if len(line) >= rng.randint(8, 14):
+                lines.append("• " + " ".join(line).capitalize() + ".")
+                line = []
+        if line:
+            lines.append("• " + " ".join(line).capitalize() + ".")
+        return "\n".join(lines)
+
+    def _synthetic_json(self, prompt: str, schema: Dict[str, Any]) -> str:
+        """Deterministic JSON document matching `schema`, for structured prompts"""
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16], 16)
+        return json.dumps(_synthetic_value(schema, random.Random(seed)))
+
+    def _plan(self, prompt: str, temperature: float, max_tokens: int):
+        """Pick the response text, latency and whether this call fails"""
+        entry = self.recordings.get(recording_key(prompt, temperature, max_tokens))
+        with self._lock:
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if self.latency_distribution == "recorded" and entry and entry.get("latency") is not None:
+                latency = entry["latency"]
+            elif self.latency_distribution == "lognormal":
+                mean = max(self.latency_mean_ms, 1.0) / 1000.0
+                sigma = self.latency_jitter_ms / max(self.latency_mean_ms, 1.0)
+                latency = self._rng.lognormvariate(0, sigma) * mean
+            else:
+                latency = self._rng.gauss(self.latency_mean_ms, self.latency_jitter_ms) / 1000.0
+            if fail:
+                self.served["errors"] += 1
+            elif entry:
+                self.served["recorded"] += 1
+            else:
+                self.served["synthetic"] += 1
+        if entry:
+            text = entry["response"]
+        elif getattr(prompt, "json_schema", None) is not None:
+            # Structured prompt (see utils.llm_utils.with_json_schema): answer in JSON
+            text = self._synthetic_json(prompt, prompt.json_schema)
+        else:
+            text = self._synthetic_text(prompt, max_tokens)
+        return text, max(0.0, latency), fail
+
+    def generate(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        text, latency, fail = self._plan(prompt, temperature, max_tokens)
+        time.sleep(latency)
+        if fail:
+            raise Exception("Fake provider simulated error (503 Service Unavailable)")
+        return text
+
+    async def agenerate(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        text, latency, fail = self._plan(prompt, temperature, max_tokens)
+        await asyncio.sleep(latency)
+        if fail:
+            raise Exception("Fake provider simulated error (503 Service Unavailable)")
+        return text
+
+    def stream(self, prompt: str, temperature: float, max_tokens: int) -> Iterator[str]:
+        """Yield the response word by word, spreading the latency across tokens"""
+        text, latency, fail = self._plan(prompt, temperature, max_tokens)
+        words = text.split(" ")
+        # Spend a third of the latency before the first token, the rest while streaming
+        time.sleep(latency / 3)
+        if fail:
+            raise Exception("Fake provider simulated error (503 Service Unavailable)")
+        per_word = (latency * 2 / 3) / max(1, len(words))
+        for i, word in enumerate(words):
+            time.sleep(per_word)
+            yield word if i == 0 else " " + word
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "recordings": len(self.recordings),
+            **self.served,
+        }
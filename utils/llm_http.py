@@ -0,0 +1,215 @@
+"""
+LLM HTTP Transport
+Shared keep-alive connection pools for the provider SDK clients, with
+per-task timeouts and pool statistics
+"""
+
+import os
+import asyncio
+import weakref
+import importlib
+import threading
+import importlib.util
+from typing import Optional, Dict, Any
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Read timeouts (seconds) per task; override with LLM_HTTP_READ_TIMEOUT_<TASK>
+DEFAULT_TASK_TIMEOUTS = {
+    "default": 60.0,
+    "rewrite": 90.0,
+    "cover_letter": 90.0,
+    "project_suggestions": 120.0,
+}
+
+
+def http_package_for(sdk) -> str:
+    """Name of the httpx package an SDK module is built on ("httpx" or a fork such as "httpx2")"""
+    default_client = getattr(sdk, "DefaultHttpxClient", None)
+    for cls in getattr(default_client, "__mro__", ()):
+        package = cls.__module__.split(".")[0]
+        if package.startswith("httpx"):
+            return package
+    return "httpx"
+
+
+def _env_flag(name: str, default: str) -> Optional[bool]:
+    value = os.getenv(name, default).lower()
+    if value == "auto":
+        return None
+    return value in ("1", "true", "yes")
+
+
+class SharedHTTPClients:
+    """
+    One httpx connection pool shared by every HTTP-based provider SDK client
+
+    Groq, OpenAI and Anthropic clients are built on the same httpx.Client
+    (and one httpx.AsyncClient per event loop), so TLS connections are kept
+    alive and reused across providers, sessions and threads instead of each
+    SDK client opening its own pool. SDKs that vendor a fork of httpx (e.g.
+    httpx2) get one shared pool per package. Gemini's SDK manages its own
+    transport and only gets the per-task timeout.
+
+    Configuration:
+      - LLM_HTTP_MAX_CONNECTIONS / LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: pool size
+      - LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: how long idle connections are kept
+      - LLM_HTTP2: auto (on if the h2 package is installed), true or false
+      - LLM_HTTP_CONNECT_TIMEOUT_SECONDS: connect timeout for every task
+      - LLM_HTTP_READ_TIMEOUT_<TASK>: read timeout for one task type
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        connect_timeout: Optional[float] = None
+    ):
+        self.max_connections = int(
+            max_connections or os.getenv("LLM_HTTP_MAX_CONNECTIONS", 20)
+        )
+        self.max_keepalive_connections = int(
+            max_keepalive_connections or os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 10)
+        )
+        self.keepalive_expiry = float(
+            keepalive_expiry if keepalive_expiry is not None
+            else os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS", 30)
+        )
+        if http2 is None:
+            http2 = _env_flag("LLM_HTTP2", "auto")
+        if http2 is None:
+            http2 = importlib.util.find_spec("h2") is not None
+        self.http2 = http2
+        self.connect_timeout = float(
+            connect_timeout if connect_timeout is not None
+            else os.getenv("LLM_HTTP_CONNECT_TIMEOUT_SECONDS", 5)
+        )
+        self._clients: Dict[str, Any] = {}
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._connections_seen = weakref.WeakSet()
+        self._requests = 0
+        self._connections_opened = 0
+
+    def read_timeout(self, task: str = "default", max_seconds: Optional[float] = None) -> float:
+        """Read timeout in seconds for a task type, optionally capped (e.g. by a request deadline)"""
+        value = os.getenv(f"LLM_HTTP_READ_TIMEOUT_{task.upper()}")
+        if value:
+            timeout = float(value)
+        else:
+            timeout = DEFAULT_TASK_TIMEOUTS.get(task, DEFAULT_TASK_TIMEOUTS["default"])
+        if max_seconds is not None:
+            timeout = max(0.1, min(timeout, max_seconds))
+        return timeout
+
+    def timeout_for(
+        self, task: str = "default", package: str = "httpx", max_seconds: Optional[float] = None
+    ):
+        """Timeout object to pass as the SDK's per-request `timeout`"""
+        httpx = importlib.import_module(package)
+        read = self.read_timeout(task, max_seconds)
+        return httpx.Timeout(read, connect=min(self.connect_timeout, read))
+
+    def _limits(self, httpx):
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def _count_request(self, request):
+        with self._lock:
+            self._requests += 1
+
+    def _count_connections(self, pool):
+        """Count connections the pool has not handed out before"""
+        for connection in list(getattr(pool, "connections", []) or []):
+            with self._lock:
+                if connection not in self._connections_seen:
+                    self._connections_seen.add(connection)
+                    self._connections_opened += 1
+
+    def client(self, package: str = "httpx"):
+        """The shared blocking client of an httpx package"""
+        client = self._clients.get(package)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(package)
+                if client is None:
+                    httpx = importlib.import_module(package)
+
+                    def _on_response(response):
+                        self._count_connections(self._pool_of(client))
+
+                    client = httpx.Client(
+                        limits=self._limits(httpx),
+                        http2=self.http2,
+                        timeout=self.timeout_for(package=package),
+                        event_hooks={"request": [self._count_request], "response": [_on_response]},
+                    )
+                    self._clients[package] = client
+        return client
+
+    def async_client(self, package: str = "httpx"):
+        """The shared async client of an httpx package for the running event loop"""
+        loop = asyncio.get_running_loop()
+        clients = self._async_clients.setdefault(loop, {})
+        client = clients.get(package)
+        if client is None:
+            httpx = importlib.import_module(package)
+
+            async def _on_request(request):
+                self._count_request(request)
+
+            async def _on_response(response):
+                self._count_connections(self._pool_of(client))
+
+            client = httpx.AsyncClient(
+                limits=self._limits(httpx),
+                http2=self.http2,
+                timeout=self.timeout_for(package=package),
+                event_hooks={"request": [_on_request], "response": [_on_response]},
+            )
+            clients[package] = client
+        return client
+
+    @staticmethod
+    def _pool_of(client):
+        """The httpcore connection pool behind an httpx client, if reachable"""
+        return getattr(getattr(client, "_transport", None), "_pool", None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration, current connections and how often connections were reused"""
+        open_connections = idle = http2_connections = 0
+        clients = list(self._clients.values())
+        for loop_clients in list(self._async_clients.values()):
+            clients += list(loop_clients.values())
+        for client in clients:
+            for connection in list(getattr(self._pool_of(client), "connections", []) or []):
+                try:
+                    if connection.is_closed():
+                        continue
+                    open_connections += 1
+                    idle += 1 if connection.is_idle() else 0
+                    http2_connections += 1 if "HTTP/2" in connection.info() else 0
+                except Exception:
+                    continue
+        with self._lock:
+            requests, opened = self._requests, self._connections_opened
+        return {
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "keepalive_expiry": self.keepalive_expiry,
+            "http2": self.http2,
+            "pools": len(clients),
+            "requests": requests,
+            "connections_opened": opened,
+            "reuse_rate": round(1 - opened / requests, 3) if requests else 0.0,
+            "open_connections": open_connections,
+            "idle_connections": idle,
+            "http2_connections": http2_connections,
+        }
@@ -0,0 +1,214 @@
+"""
+LLM Call Instrumentation
+Per-call records (provider, tokens, latency, TTFT, fallback hops, cache status)
+with pluggable sinks and an aggregate summary
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+DEFAULT_METRICS_PATH = os.path.join("data", "reports", "llm_calls.jsonl")
+
+
+def _percentile(values: List[float], percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100.0 * (len(ordered) - 1))))
+    return round(ordered[index], 3)
+
+
+class MemorySink:
+    """Keeps the most recent call records in a ring buffer"""
+
+    def __init__(self, size: Optional[int] = None):
+        self.records = deque(maxlen=int(size or os.getenv("LLM_METRICS_BUFFER_SIZE", 1000)))
+        self._lock = threading.Lock()
+
+    def emit(self, record: Dict[str, Any]):
+        with self._lock:
+            self.records.append(record)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.records)
+
+
+class JSONLSink:
+    """Appends every call record as one JSON line"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("LLM_METRICS_JSONL_PATH", DEFAULT_METRICS_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def emit(self, record: Dict[str, Any]):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+class OpenTelemetrySink:
+    """
+    Exports each call as an OpenTelemetry span plus latency/token metrics
+
+    Requires opentelemetry-api (and an SDK/exporter configured by the app);
+    raises ImportError if it is not installed.
+    """
+
+    def __init__(self):
+        from opentelemetry import trace, metrics
+
+        self._tracer = trace.get_tracer("resumemasterai.llm")
+        meter = metrics.get_meter("resumemasterai.llm")
+        self._latency = meter.create_histogram("llm.call.duration", unit="s")
+        self._tokens = meter.create_counter("llm.call.tokens")
+
+    def emit(self, record: Dict[str, Any]):
+        attributes = {
+            key: value for key, value in record.items()
+            if isinstance(value, (str, bool, int, float)) and value is not None
+        }
+        start_ns = int(record["timestamp"] * 1e9)
+        span = self._tracer.start_span("llm.generate", start_time=start_ns, attributes=attributes)
+        span.end(end_time=start_ns + int((record.get("latency") or 0) * 1e9))
+        labels = {
+            "provider": record.get("provider") or "",
+            "task": record.get("task") or "",
+            "status": record.get("status") or "",
+        }
+        self._latency.record(record.get("latency") or 0.0, labels)
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if record.get(kind):
+                self._tokens.add(record[kind], {**labels, "kind": kind})
+
+
+class LLMMetrics:
+    """
+    Collects one record per LLM call and fans it out to the configured sinks
+
+    Sinks are chosen with LLM_METRICS_SINKS (comma separated: memory, jsonl,
+    otel). The in-memory ring buffer is always kept so summary() works.
+    """
+
+    def __init__(self, sinks: Optional[str] = None):
+        self.memory = MemorySink()
+        self.sinks = [self.memory]
+        names = (sinks if sinks is not None else os.getenv("LLM_METRICS_SINKS", "memory"))
+        for name in [n.strip().lower() for n in names.split(",") if n.strip()]:
+            try:
+                if name == "jsonl":
+                    self.sinks.append(JSONLSink())
+                elif name in ("otel", "opentelemetry"):
+                    self.sinks.append(OpenTelemetrySink())
+            except Exception as e:
+                print(f"Failed to initialize LLM metrics sink '{name}': {e}")
+
+    def add_sink(self, sink):
+        """Register a custom sink (any object with an emit(record) method)"""
+        self.sinks.append(sink)
+
+    def emit(self, record: Dict[str, Any]):
+        for sink in self.sinks:
+            try:
+                sink.emit(record)
+            except Exception as e:
+                print(f"LLM metrics sink failed: {e}")
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent call records, newest last"""
+        return self.memory.snapshot()[-limit:]
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate the buffered records overall and per provider / task"""
+        records = self.memory.snapshot()
+
+        def _aggregate(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+            calls = len(items)
+            errors = sum(1 for r in items if r["status"] == "error")
+            cancelled = sum(1 for r in items if r["status"] == "cancelled")
+            hits = sum(1 for r in items if r["cache"] == "hit")
+            latencies = [r["latency"] for r in items if r["status"] == "ok" and r["cache"] != "hit"]
+            ttfts = [r["ttft"] for r in items if r.get("ttft") is not None and r["cache"] != "hit"]
+            return {
+                "calls": calls,
+                "errors": errors,
+                "error_rate": round(errors / calls, 3) if calls else 0.0,
+                "cancelled": cancelled,
+                "cache_hits": hits,
+                "cache_hit_rate": round(hits / calls, 3) if calls else 0.0,
+                "coalesced": sum(1 for r in items if r.get("coalesced")),
+                "hedged": sum(1 for r in items if r.get("hedged")),
+                "fallback_hops": sum(max(0, (r.get("attempts") or 1) - 1) for r in items),
+                "retries": sum(r.get("retries") or 0 for r in items),
+                "latency_p50": _percentile(latencies, 50),
+                "latency_p95": _percentile(latencies, 95),
+                "ttft_p50": _percentile(ttfts, 50),
+                "prompt_tokens": sum(r.get("prompt_tokens") or 0 for r in items),
+                "completion_tokens": sum(r.get("completion_tokens") or 0 for r in items),
+                "cached_prompt_tokens": sum(r.get("cached_prompt_tokens") or 0 for r in items),
+            }
+
+        by_provider: Dict[str, List[Dict[str, Any]]] = {}
+        by_task: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_provider.setdefault(record.get("provider") or "none", []).append(record)
+            by_task.setdefault(record.get("task") or "default", []).append(record)
+
+        return {
+            **_aggregate(records),
+            "since": records[0]["timestamp"] if records else None,
+            "by_provider": {name: _aggregate(items) for name, items in by_provider.items()},
+            "by_task": {name: _aggregate(items) for name, items in by_task.items()},
+        }
+
+
+def build_call_record(
+    task: str,
+    start: float,
+    response=None,
+    error: Optional[Exception] = None,
+    cache_status: str = "miss",
+    stream: bool = False,
+    ttft: Optional[float] = None,
+    cancelled: bool = False
+) -> Dict[str, Any]:
+    """
+    Build the record for one generate call from its LLMResponse (or error)
+
+    `cancelled` marks a stream the consumer stopped before it finished; its
+    response, if any, holds only the text streamed so far.
+    """
+    latency = time.time() - start
+    status = "error" if error is not None else ("cancelled" if cancelled else "ok")
+    usage = getattr(response, "usage", None) or {}
+    cache_hit = bool(getattr(response, "cache_hit", False))
+    return {
+        "timestamp": start,
+        "task": task,
+        "provider": getattr(response, "provider", None),
+        "model": getattr(response, "model", None),
+        "status": status,
+        "error": str(error)[:500] if error is not None else None,
+        "latency": round(latency, 4),
+        "ttft": round(ttft, 4) if ttft is not None else (round(latency, 4) if status == "ok" else None),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "cached_prompt_tokens": usage.get("cached_prompt_tokens"),
+        "attempts": getattr(response, "attempts", None) if response is not None else None,
+        "retries": getattr(response, "retries", 0) if response is not None else None,
+        "cache": "hit" if cache_hit else cache_status,
+        "coalesced": bool(getattr(response, "coalesced", False)),
+        "hedged": bool(getattr(response, "hedged", False)),
+        "stream": stream,
+    }
@@ -0,0 +1,328 @@
+"""
+LLM Rate Limiter
+Per-provider RPM/TPM token buckets with a priority-ordered wait queue
+"""
+
+import os
+import re
+import time
+import heapq
+import sqlite3
+import itertools
+import threading
+from contextlib import closing
+from typing import Optional, Dict, Any, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Lower value is served first
+PRIORITIES = {
+    "interactive": 0,
+    "batch": 1,
+}
+
+DEFAULT_RATE_LIMIT_PATH = os.path.join("data", "cache", "llm_ratelimit.db")
+
+
+def estimate_output_tokens(max_tokens: int) -> int:
+    """
+    Expected completion length charged up front for TPM accounting
+
+    Responses rarely use their whole max_tokens, so only a share of it
+    (LLM_RATE_LIMIT_OUTPUT_RATIO, default 0.3, at least 256 tokens) is
+    charged; the difference to the reported usage is settled afterwards
+    with ProviderScheduler.reconcile.
+    """
+    ratio = float(os.getenv("LLM_RATE_LIMIT_OUTPUT_RATIO", 0.3))
+    return min(int(max_tokens), max(256, int(max_tokens * ratio)))
+
+
+def estimate_request_tokens(prompt: str, max_tokens: int, provider_type: Optional[str] = None) -> int:
+    """Rough token cost of a request for TPM accounting, using the provider's token estimate"""
+    from utils.llm_compaction import estimate_tokens
+    return estimate_tokens(prompt, provider_type) + estimate_output_tokens(max_tokens)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether a provider SDK error is an HTTP 429 / quota response"""
+    status = getattr(error, "status_code", None) or getattr(
+        getattr(error, "response", None), "status_code", None
+    )
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "resource exhausted" in message
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Read a Retry-After hint (seconds) from a provider SDK error, if present"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if value:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                pass
+    match = re.search(r"retry (?:after|in) (\d+(?:\.\d+)?)\s*s", str(error).lower())
+    if match:
+        return float(match.group(1))
+    return None
+
+
+class MemoryBucketStore:
+    """Token bucket state held in this process (shared across threads)"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, requests: Dict[str, Tuple[float, float, float]]) -> float:
+        """
+        Atomically take tokens from several buckets
+
+        Args:
+            requests: bucket name -> (amount, capacity, refill_per_second)
+
+        Returns:
+            0.0 if every bucket had capacity and tokens were taken, otherwise
+            the seconds to wait before retrying (nothing is taken)
+        """
+        now = time.time()
+        with self._lock:
+            levels = {}
+            wait = 0.0
+            for name, (amount, capacity, rate) in requests.items():
+                tokens, updated = self._buckets.get(name, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated) * rate)
+                levels[name] = tokens
+                if tokens < amount:
+                    wait = max(wait, (amount - tokens) / rate if rate > 0 else 60.0)
+            if wait == 0.0:
+                for name, (amount, _, _) in requests.items():
+                    levels[name] -= amount
+            for name, tokens in levels.items():
+                self._buckets[name] = (tokens, now)
+            return wait
+
+    def adjust(self, name: str, amount: float, capacity: float, rate: float):
+        """Take `amount` more tokens from a bucket (negative gives tokens back) without waiting"""
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(name, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            self._buckets[name] = (min(capacity, tokens - amount), now)
+
+
+class SQLiteBucketStore:
+    """Token bucket state in a local SQLite file, shared across processes"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("LLM_RATE_LIMIT_PATH", DEFAULT_RATE_LIMIT_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+
+    def take(self, requests: Dict[str, Tuple[float, float, float]]) -> float:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                levels = {}
+                wait = 0.0
+                for name, (amount, capacity, rate) in requests.items():
+                    row = conn.execute(
+                        "SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)
+                    ).fetchone()
+                    tokens, updated = row if row else (capacity, now)
+                    tokens = min(capacity, tokens + (now - updated) * rate)
+                    levels[name] = tokens
+                    if tokens < amount:
+                        wait = max(wait, (amount - tokens) / rate if rate > 0 else 60.0)
+                if wait == 0.0:
+                    for name, (amount, _, _) in requests.items():
+                        levels[name] -= amount
+                for name, tokens in levels.items():
+                    conn.execute(
+                        "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                        (name, tokens, now),
+                    )
+                conn.execute("COMMIT")
+                return wait
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+    def adjust(self, name: str, amount: float, capacity: float, rate: float):
+        """Take `amount` more tokens from a bucket (negative gives tokens back) without waiting"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)
+                ).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                tokens = min(capacity, tokens + (now - updated) * rate)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (name, min(capacity, tokens - amount), now),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+
+class ProviderScheduler:
+    """
+    Makes requests wait for provider capacity instead of failing over
+
+    Each provider can have a requests-per-minute and a tokens-per-minute
+    budget, read from <PROVIDER>_RPM / <PROVIDER>_TPM (e.g. GROQ_RPM=30).
+    Waiting requests form a priority queue per provider: only the head of
+    the queue takes tokens, so interactive requests overtake batch ones.
+    Set LLM_RATE_LIMIT_BACKEND=sqlite to share the budgets across processes.
+    """
+
+    def __init__(self, store=None, max_wait_seconds: Optional[float] = None):
+        if store is None:
+            backend = os.getenv("LLM_RATE_LIMIT_BACKEND", "memory").lower()
+            store = SQLiteBucketStore() if backend == "sqlite" else MemoryBucketStore()
+        self.store = store
+        self.max_wait_seconds = float(
+            max_wait_seconds if max_wait_seconds is not None
+            else os.getenv("LLM_RATE_LIMIT_MAX_WAIT_SECONDS", 30)
+        )
+        self._limits: Dict[str, Dict[str, float]] = {}
+        self._queues: Dict[str, list] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._paused_until: Dict[str, float] = {}
+        self._waited: Dict[str, float] = {}
+
+    def configure(self, provider: str, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        """Set (or clear with None) a provider's RPM / TPM budgets"""
+        self._limits[provider] = {"rpm": rpm or 0, "tpm": tpm or 0}
+
+    def limits_for(self, provider: str) -> Dict[str, float]:
+        if provider not in self._limits:
+            prefix = provider.upper()
+            self.configure(
+                provider,
+                rpm=float(os.getenv(f"{prefix}_RPM", 0) or 0),
+                tpm=float(os.getenv(f"{prefix}_TPM", 0) or 0),
+            )
+        return self._limits[provider]
+
+    def _bucket_requests(self, provider: str, tokens: int) -> Dict[str, Tuple[float, float, float]]:
+        limits = self.limits_for(provider)
+        requests = {}
+        if limits["rpm"] > 0:
+            requests[f"{provider}:rpm"] = (1, limits["rpm"], limits["rpm"] / 60.0)
+        if limits["tpm"] > 0:
+            amount = min(tokens, limits["tpm"])
+            requests[f"{provider}:tpm"] = (amount, limits["tpm"], limits["tpm"] / 60.0)
+        return requests
+
+    def acquire(
+        self,
+        provider: str,
+        tokens: int = 0,
+        priority: str = "interactive",
+        timeout: Optional[float] = None
+    ) -> bool:
+        """
+        Block until `provider` has capacity for one request of `tokens` tokens
+
+        Returns:
+            True once capacity was taken, False if it did not free up within
+            `timeout` (defaults to LLM_RATE_LIMIT_MAX_WAIT_SECONDS)
+        """
+        requests = self._bucket_requests(provider, tokens)
+        if not requests and self._paused_until.get(provider, 0.0) <= time.time():
+            return True
+
+        timeout = self.max_wait_seconds if timeout is None else timeout
+        deadline = time.time() + timeout
+        ticket = (PRIORITIES.get(priority, PRIORITIES["batch"]), next(self._sequence))
+        start = time.time()
+
+        with self._condition:
+            queue = self._queues.setdefault(provider, [])
+            heapq.heappush(queue, ticket)
+            try:
+                while True:
+                    wait = None
+                    if queue[0] == ticket:
+                        wait = self._paused_until.get(provider, 0.0) - time.time()
+                        if wait <= 0:
+                            wait = self.store.take(requests) if requests else 0.0
+                        if wait <= 0:
+                            self._waited[provider] = self._waited.get(provider, 0.0) + time.time() - start
+                            return True
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(min(wait, remaining) if wait else remaining)
+            finally:
+                queue.remove(ticket)
+                heapq.heapify(queue)
+                self._condition.notify_all()
+
+    def reconcile(self, provider: str, estimated_tokens: int, actual_tokens: Optional[int]):
+        """
+        Settle a request's TPM charge against the usage the provider reported
+
+        Overruns are taken from the bucket (it may go negative, delaying the
+        next requests); unused estimate is given back.
+        """
+        limits = self.limits_for(provider)
+        if limits["tpm"] <= 0 or actual_tokens is None:
+            return
+        charged = min(estimated_tokens, limits["tpm"])
+        difference = actual_tokens - charged
+        if difference:
+            self.store.adjust(f"{provider}:tpm", difference, limits["tpm"], limits["tpm"] / 60.0)
+            with self._condition:
+                self._condition.notify_all()
+
+    def throttle(self, provider: str, seconds: float):
+        """Pause a provider after it returned 429, so queued requests wait it out"""
+        with self._condition:
+            self._paused_until[provider] = max(
+                self._paused_until.get(provider, 0.0), time.time() + seconds
+            )
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Configured budgets, queue depth and total time spent waiting per provider"""
+        now = time.time()
+        with self._condition:
+            return {
+                provider: {
+                    **limits,
+                    "queued": len(self._queues.get(provider, [])),
+                    "paused_for": round(max(0.0, self._paused_until.get(provider, 0.0) - now), 1),
+                    "total_wait_seconds": round(self._waited.get(provider, 0.0), 2),
+                }
+                for provider, limits in self._limits.items()
+            }
@@ -0,0 +1,153 @@
+"""
+LLM Retry Policy
+Classifies provider errors as transient or permanent and computes
+decorrelated-jitter backoff for retries on the same provider
+"""
+
+import os
+import re
+import time
+import random
+import asyncio
+from typing import Optional
+from dotenv import load_dotenv
+
+from utils.llm_ratelimit import is_rate_limit_error, get_retry_after
+
+load_dotenv()
+
+
+# Worth retrying on the same provider after a short wait
+TRANSIENT_ERRORS = {"rate_limit", "overloaded", "network"}
+
+_OVERLOADED_STATUS = {500, 502, 503, 504, 529}
+_AUTH_STATUS = {401, 403}
+_INVALID_STATUS = {400, 404, 413, 422}
+
+_OVERLOADED_MESSAGES = re.compile(
+    r"\b(500|502|503|504|529)\b|overloaded|service unavailable|bad gateway|"
+    r"internal server error|server error|temporarily unavailable"
+)
+_NETWORK_MESSAGES = re.compile(
+    r"timed? ?out|deadline exceeded|connection (error|reset|refused|aborted)|"
+    r"remote (end|host) closed|network is unreachable"
+)
+_AUTH_MESSAGES = re.compile(r"invalid (api|x-api)[ _-]?key|unauthori[sz]ed|authentication|permission denied")
+_INVALID_MESSAGES = re.compile(
+    r"model .*(not found|does not exist|decommissioned)|invalid model|"
+    r"context length|maximum context|too many tokens|invalid request|bad request"
+)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    for status in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "code", None),
+    ):
+        try:
+            if status is not None:
+                return int(status)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classify a provider SDK error
+
+    Returns one of:
+      - rate_limit: 429 / quota exhausted (transient, honour Retry-After)
+      - overloaded: 5xx / 529 overloaded (transient)
+      - network: timeouts and connection failures (transient)
+      - auth: bad or missing API key, no permission (permanent)
+      - invalid_request: bad model name, oversize prompt, malformed request (permanent)
+      - unknown: anything else (not retried on the same provider)
+    """
+    if is_rate_limit_error(error):
+        return "rate_limit"
+    status = _status_code(error)
+    if status in _OVERLOADED_STATUS:
+        return "overloaded"
+    if status in _AUTH_STATUS:
+        return "auth"
+    if status in _INVALID_STATUS:
+        return "invalid_request"
+
+    name = type(error).__name__.lower()
+    message = str(error).lower()
+    if (
+        isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError))
+        or "timeout" in name
+        or "connection" in name
+        or _NETWORK_MESSAGES.search(message)
+    ):
+        return "network"
+    if _OVERLOADED_MESSAGES.search(message):
+        return "overloaded"
+    if "authentication" in name or "permission" in name or _AUTH_MESSAGES.search(message):
+        return "auth"
+    if "badrequest" in name or "notfound" in name or _INVALID_MESSAGES.search(message):
+        return "invalid_request"
+    return "unknown"
+
+
+def is_transient_error(error: Exception) -> bool:
+    return classify_error(error) in TRANSIENT_ERRORS
+
+
+class RetryPolicy:
+    """
+    Bounded retries with decorrelated jitter
+
+    Each delay is drawn uniformly from [base, 3 x previous delay], capped at
+    max_delay, which spreads retries from concurrent requests apart instead
+    of having them hit a recovering provider in lockstep. A Retry-After hint
+    from the provider always takes precedence.
+
+    Configured with LLM_RETRY_MAX_RETRIES (per provider), LLM_RETRY_BASE_DELAY_SECONDS
+    and LLM_RETRY_MAX_DELAY_SECONDS.
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ):
+        self.max_retries = int(
+            max_retries if max_retries is not None else os.getenv("LLM_RETRY_MAX_RETRIES", 2)
+        )
+        self.base_delay = float(
+            base_delay if base_delay is not None else os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", 0.5)
+        )
+        self.max_delay = float(
+            max_delay if max_delay is not None else os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", 8)
+        )
+
+    def next_delay(self, previous: Optional[float] = None) -> float:
+        """Seconds to wait before the next retry, given the previous delay"""
+        upper = max(self.base_delay, (previous or self.base_delay) * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+    def delay_for(self, error: Exception, previous: Optional[float] = None) -> float:
+        """Retry-After if the provider sent one, otherwise the next jittered delay"""
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            return retry_after
+        return self.next_delay(previous)
+
+
+def get_request_deadline(seconds: Optional[float] = None) -> Optional[float]:
+    """Absolute deadline (time.time()) for a request; LLM_REQUEST_DEADLINE_SECONDS by default, 0 for none"""
+    if seconds is None:
+        seconds = float(os.getenv("LLM_REQUEST_DEADLINE_SECONDS", 120))
+    return time.time() + seconds if seconds > 0 else None
+
+
+def time_left(deadline: Optional[float]) -> Optional[float]:
+    """Seconds until `deadline`, or None if there is no deadline"""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.time())
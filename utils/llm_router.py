@@ -0,0 +1,279 @@
+"""
+LLM Provider Router
+Latency-aware provider ordering with health tracking and circuit breakers
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderHealth:
+    """
+    Rolling health record for a single provider
+
+    Tracks EWMA latency and error rate, plus a closed/open/half-open circuit
+    breaker: the circuit opens after `failure_threshold` consecutive failures,
+    lets a single probe through after `cooldown_seconds`, and closes again
+    when that probe succeeds.
+    """
+
+    def __init__(self, name: str, alpha: float, failure_threshold: int, cooldown_seconds: float):
+        self.name = name
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.last_error = ""
+        self.recent_latencies = deque(maxlen=50)
+
+    def current_state(self, now: float) -> str:
+        """Return the breaker state, moving open -> half_open once the cooldown has passed"""
+        if self.state == OPEN and now - self.opened_at >= self.cooldown_seconds:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        return self.state
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.error_rate = (1 - self.alpha) * self.error_rate
+        self._observe_latency(latency)
+        self.state = CLOSED
+        self.probe_in_flight = False
+
+    def record_cancelled(self, elapsed: float):
+        """A hedged call was abandoned after `elapsed` seconds; its true latency is at least that"""
+        self._observe_latency(elapsed)
+        self.probe_in_flight = False
+
+    def _observe_latency(self, latency: float):
+        self.recent_latencies.append(latency)
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Return the given percentile (0-100) of recent latencies, or None without samples"""
+        if not self.recent_latencies:
+            return None
+        ordered = sorted(self.recent_latencies)
+        index = min(len(ordered) - 1, int(round(percentile / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def record_failure(self, error: str = ""):
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        self.last_error = error[:300]
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.time()
+        self.probe_in_flight = False
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "state": self.current_state(now),
+            "ewma_latency": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": (
+                round(max(0.0, self.cooldown_seconds - (now - self.opened_at)), 1)
+                if self.state == OPEN else 0.0
+            ),
+            "last_error": self.last_error,
+        }
+
+
+class ProviderRouter:
+    """
+    Orders providers for each request by health and observed latency
+
+    Providers with a closed circuit are ranked by EWMA latency (providers
+    without samples keep their configured priority, after measured ones).
+    Half-open providers get one probe request at a time and open providers
+    are skipped without waiting on them. Every `explore_every`-th request is
+    sent to the least-sampled healthy provider first so the latency ranking
+    stays current.
+    """
+
+    def __init__(
+        self,
+        alpha: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        cooldown_seconds: Optional[float] = None,
+        explore_every: Optional[int] = None
+    ):
+        self.alpha = float(alpha if alpha is not None else os.getenv("LLM_ROUTER_EWMA_ALPHA", 0.3))
+        self.failure_threshold = int(
+            failure_threshold if failure_threshold is not None
+            else os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", 3)
+        )
+        self.cooldown_seconds = float(
+            cooldown_seconds if cooldown_seconds is not None
+            else os.getenv("LLM_CIRCUIT_COOLDOWN_SECONDS", 30)
+        )
+        self.explore_every = int(
+            explore_every if explore_every is not None
+            else os.getenv("LLM_ROUTER_EXPLORE_EVERY", 20)
+        )
+        self._health: Dict[str, ProviderHealth] = {}
+        self._routed = 0
+        self._lock = threading.Lock()
+
+    def _get(self, name: str) -> ProviderHealth:
+        health = self._health.get(name)
+        if health is None:
+            health = ProviderHealth(name, self.alpha, self.failure_threshold, self.cooldown_seconds)
+            self._health[name] = health
+        return health
+
+    def order(
+        self,
+        providers: List[Dict[str, Any]],
+        preferred_provider: Optional[str] = None,
+        count_request: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the providers to try for one request, best first
+
+        Args:
+            providers: Configured provider dicts, in static priority order
+            preferred_provider: Provider name to try first if its circuit allows
+            count_request: Count this call towards exploration (False when the
+                order is only being inspected)
+        """
+        now = time.time()
+        with self._lock:
+            explore = False
+            if count_request:
+                self._routed += 1
+                explore = self.explore_every > 0 and self._routed % self.explore_every == 0
+            healthy, probes = [], []
+            for index, provider in enumerate(providers):
+                health = self._get(provider["name"])
+                state = health.current_state(now)
+                if state == CLOSED:
+                    healthy.append((index, provider, health))
+                elif state == HALF_OPEN and not health.probe_in_flight:
+                    probes.append((index, provider, health))
+
+        healthy.sort(key=lambda item: (
+            item[2].ewma_latency is None,
+            item[2].ewma_latency or 0.0,
+            item[0],
+        ))
+        if explore and len(healthy) > 1:
+            least_sampled = min(healthy, key=lambda item: (item[2].requests, item[0]))
+            healthy.remove(least_sampled)
+            healthy.insert(0, least_sampled)
+        result = [provider for _, provider, _ in healthy + probes]
+        if preferred_provider:
+            result.sort(key=lambda p: 0 if p["name"] == preferred_provider else 1)
+        return result
+
+    def allow_request(self, name: str) -> bool:
+        """
+        Check the circuit right before calling a provider
+
+        Closed circuits always allow; a half-open circuit allows exactly one
+        probe until its outcome is recorded; open circuits refuse.
+        """
+        now = time.time()
+        with self._lock:
+            health = self._get(name)
+            state = health.current_state(now)
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not health.probe_in_flight:
+                health.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, name: str, latency: float):
+        with self._lock:
+            self._get(name).record_success(latency)
+
+    def record_failure(self, name: str, error: str = ""):
+        with self._lock:
+            self._get(name).record_failure(error)
+
+    def release_probe(self, name: str):
+        """Give back a half-open probe slot without recording an outcome"""
+        with self._lock:
+            self._get(name).probe_in_flight = False
+
+    def record_cancelled(self, name: str, elapsed: float):
+        with self._lock:
+            self._get(name).record_cancelled(elapsed)
+
+    def latency_percentile(self, name: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """Recent latency percentile for a provider, or None with fewer than `min_samples` samples"""
+        with self._lock:
+            health = self._get(name)
+            if len(health.recent_latencies) < min_samples:
+                return None
+            return health.latency_percentile(percentile)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider health snapshot"""
+        now = time.time()
+        with self._lock:
+            return {name: health.to_dict(now) for name, health in self._health.items()}
+
+
+class HedgeBudget:
+    """
+    Caps hedged (duplicate) requests to a fraction of traffic per task
+
+    A task may fire a hedge while hedges_fired < ratio * requests + burst,
+    so sustained extra spend stays at roughly `ratio` of the task's calls.
+    """
+
+    def __init__(self, ratio: Optional[float] = None, burst: Optional[int] = None):
+        self.ratio = float(ratio if ratio is not None else os.getenv("LLM_HEDGE_BUDGET_RATIO", 0.1))
+        self.burst = int(burst if burst is not None else os.getenv("LLM_HEDGE_BUDGET_BURST", 2))
+        self._requests: Dict[str, int] = {}
+        self._hedges: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, task: str):
+        with self._lock:
+            self._requests[task] = self._requests.get(task, 0) + 1
+
+    def try_acquire(self, task: str) -> bool:
+        """Reserve one hedge for `task` if its budget allows"""
+        with self._lock:
+            allowance = self.ratio * self._requests.get(task, 0) + self.burst
+            if self._hedges.get(task, 0) + 1 > allowance:
+                return False
+            self._hedges[task] = self._hedges.get(task, 0) + 1
+            return True
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                task: {"requests": count, "hedges": self._hedges.get(task, 0)}
+                for task, count in self._requests.items()
+            }
@@ -0,0 +1,115 @@
+"""
+LLM Structured Output
+JSON parsing and schema validation for responses requested in JSON mode,
+keeping whatever complete items a malformed or truncated response contains
+"""
+
+import re
+import json
+from typing import Any, Dict, List, Optional
+
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+def _strip_fences(text: str) -> str:
+    return _FENCE.sub("", (text or "").strip())
+
+
+def parse_json(text: str) -> Optional[Any]:
+    """
+    Parse a JSON response, tolerating code fences and prose around it
+
+    Returns None if no complete JSON value can be read.
+    """
+    text = _strip_fences(text)
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    # Only the outermost value: an inner object of a truncated response is not the answer
+    match = re.search(r"[{\[]", text)
+    if match is None:
+        return None
+    try:
+        return json.JSONDecoder().raw_decode(text, match.start())[0]
+    except ValueError:
+        return None
+
+
+def salvage_items(text: str) -> List[Dict[str, Any]]:
+    """
+    Complete objects inside the first JSON array of a response that does not parse
+
+    A response cut off by max_tokens loses its closing brackets, but every
+    item before the cut is still valid JSON and worth keeping.
+    """
+    text = _strip_fences(text)
+    start = text.find("[")
+    if start < 0:
+        return []
+    decoder = json.JSONDecoder()
+    items, index = [], start + 1
+    while True:
+        index = text.find("{", index)
+        if index < 0:
+            break
+        try:
+            item, end = decoder.raw_decode(text, index)
+        except ValueError:
+            break
+        if isinstance(item, dict):
+            items.append(item)
+        index = end
+    return items
+
+
+def validate_json(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Check a value against a JSON schema
+
+    Supports the subset used for LLM output schemas: type, properties,
+    required, items, enum, minItems/maxItems and minLength.
+
+    Returns:
+        List of error messages (empty when the value is valid)
+    """
+    errors: List[str] = []
+    expected = schema.get("type")
+    if expected:
+        python_type = _JSON_TYPES.get(expected)
+        # bool is an int in Python but not a JSON number
+        if python_type and (
+            not isinstance(value, python_type)
+            or (isinstance(value, bool) and expected in ("integer", "number"))
+        ):
+            return [f"{path}: expected {expected}, got {type(value).__name__}"]
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+    if isinstance(value, str) and len(value.strip()) < schema.get("minLength", 0):
+        errors.append(f"{path}: shorter than {schema['minLength']} characters")
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing '{key}'")
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate_json(value[key], subschema, f"{path}.{key}"))
+    if isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            errors.append(f"{path}: fewer than {schema['minItems']} items")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path}: more than {schema['maxItems']} items")
+        if "items" in schema:
+            for index, item in enumerate(value):
+                errors.extend(validate_json(item, schema["items"], f"{path}[{index}]"))
+    return errors
@@ -0,0 +1,82 @@
+"""
+LLM Task Routing
+Per-task choice of provider, model size, max_tokens and temperature
+"""
+
+import os
+import json
+from typing import Optional, Dict, Any
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Built-in routes. "tier" picks the provider's large (its configured *_MODEL)
+# or small (fast/cheap *_SMALL_MODEL) model; "models" pins a model per
+# provider; "provider" sets the preferred provider.
+DEFAULT_TASK_ROUTES: Dict[str, Dict[str, Any]] = {
+    "default": {"tier": "large", "temperature": 0.7, "max_tokens": 2048},
+    "rewrite": {"tier": "large", "temperature": 0.3, "max_tokens": 2048},
+    "tailor": {"tier": "large", "temperature": 0.3, "max_tokens": 2048},
+    "cover_letter": {"tier": "large", "temperature": 0.3, "max_tokens": 2048},
+    "project_suggestions": {"tier": "small", "temperature": 0.8, "max_tokens": 3000},
+}
+
+# Small/fast model per provider: (env var, default)
+SMALL_MODELS = {
+    "groq": ("GROQ_SMALL_MODEL", "llama-3.1-8b-instant"),
+    "gemini": ("GENAI_SMALL_MODEL", "gemini-1.5-flash-8b"),
+    "openai": ("OPENAI_SMALL_MODEL", "gpt-4o-mini"),
+    "anthropic": ("ANTHROPIC_SMALL_MODEL", "claude-3-haiku-20240307"),
+}
+
+
+class TaskRoutes:
+    """
+    Routing table keyed by task name
+
+    Routes are the built-in DEFAULT_TASK_ROUTES, overridden per task by the
+    JSON file at LLM_TASK_ROUTES_PATH, e.g.:
+
+        {
+          "project_suggestions": {"provider": "groq", "tier": "small"},
+          "cover_letter": {"models": {"openai": "gpt-4o"}, "max_tokens": 1200}
+        }
+
+    Unknown tasks use the "default" route.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Dict[str, Any]]] = None, path: Optional[str] = None):
+        self.routes = {task: dict(route) for task, route in DEFAULT_TASK_ROUTES.items()}
+        path = path or os.getenv("LLM_TASK_ROUTES_PATH")
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.update(json.load(f))
+            except Exception as e:
+                print(f"Failed to load LLM task routes from {path}: {e}")
+        if routes:
+            self.update(routes)
+
+    def update(self, routes: Dict[str, Dict[str, Any]]):
+        """Merge route settings into the table, per task"""
+        for task, route in routes.items():
+            self.routes.setdefault(task, {}).update(route)
+
+    def route(self, task: Optional[str]) -> Dict[str, Any]:
+        """Settings for a task, falling back to the default route for missing keys"""
+        return {**self.routes["default"], **self.routes.get(task or "default", {})}
+
+    def model_for(self, task: Optional[str], provider_type: str) -> Optional[str]:
+        """Model a provider should use for a task (None: the provider's configured model)"""
+        route = self.route(task)
+        pinned = (route.get("models") or {}).get(provider_type)
+        if pinned:
+            return pinned
+        if route.get("tier") == "small" and provider_type in SMALL_MODELS:
+            env_var, default = SMALL_MODELS[provider_type]
+            return os.getenv(env_var, default)
+        return None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {task: self.route(task) for task in self.routes}
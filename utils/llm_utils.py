@@ -4,183 +4,1691 @@ Supports Groq, Google Gemini, and other providers with automatic fallback
 """
 
 import os
-from typing import Optional, Dict, Any, List
+import json
+import time
+import importlib.util
+import asyncio
+import weakref
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Union, Iterator
 from dotenv import load_dotenv
 
+from utils.llm_compaction import estimate_tokens
+from utils.llm_retry import time_left
+
 load_dotenv()
 
 
+class LLMResponse(str):
+    """
+    Generated text returned by MultiModelLLM
+
+    Behaves exactly like a str so existing callers are unaffected, while
+    carrying metadata about how the response was produced.
+    """
+
+    def __new__(
+        cls,
+        text: str,
+        provider: str = "",
+        cache_hit: bool = False,
+        coalesced: bool = False,
+        model: Optional[str] = None,
+        usage: Optional[Dict[str, int]] = None
+    ):
+        obj = super().__new__(cls, text or "")
+        obj.provider = provider
+        obj.cache_hit = cache_hit
+        obj.coalesced = coalesced
+        obj.model = model
+        # {"prompt_tokens", "completion_tokens", "cached_prompt_tokens"} as reported by the SDK
+        obj.usage = usage
+        # Providers tried for this response (1 = no fallback) and whether it was hedged
+        obj.attempts = 1
+        obj.hedged = False
+        # Same-provider retries after transient errors (429 / 5xx / timeouts)
+        obj.retries = 0
+        return obj
+
+
+class LayeredPrompt(str):
+    """
+    A prompt laid out as stable context blocks followed by the task instruction
+
+    The full text (blocks, then instruction) is what every provider receives,
+    so it behaves like a plain str. Because the large blocks (resume, then
+    job description) always come first and byte-identical, follow-up tasks
+    on the same resume share a prompt prefix that providers can serve from
+    their prompt cache. Build one with build_prompt().
+    
+    A prompt with a json_schema (see with_json_schema()) is sent in each
+    provider's structured output mode.
+    """
+    
+    json_schema: Optional[Dict[str, Any]] = None
+    schema_name: str = "result"
+
+    def __new__(cls, blocks: List[str], instruction: str, compaction: Optional[Dict[str, Any]] = None):
+        obj = super().__new__(cls, "".join(blocks) + instruction)
+        obj.blocks = list(blocks)
+        obj.instruction = instruction
+        # Per-block compaction reports ({"resume": {...}, "job_description": {...}})
+        obj.compaction = compaction or {}
+        return obj
+
+
+def build_prompt(
+    instruction: str,
+    resume_text: Optional[str] = None,
+    job_description: Optional[str] = None,
+    token_budget: Optional[int] = None
+) -> LayeredPrompt:
+    """
+    Build a prompt with the resume and job description as a cacheable prefix
+    
+    The resume and job description are compacted first (repeated OCR
+    header/footer lines and boilerplate removed) and, if the prompt would
+    exceed the token budget, their lowest-value sections are trimmed. What
+    was removed is reported on the returned prompt's .compaction.
+    
+    Args:
+        instruction: The task instruction; refer to "the resume above" /
+            "the job description above" since it is placed last
+        resume_text: Resume text, placed first
+        job_description: Job description, placed after the resume
+        token_budget: Maximum prompt tokens (defaults to LLM_PROMPT_TOKEN_BUDGET;
+            0 disables trimming)
+    
+    Returns:
+        A LayeredPrompt (a str) that can be passed to generate_text & co
+    """
+    from utils.llm_compaction import compact_text, describe_compaction, get_prompt_token_budget
+    if token_budget is None:
+        token_budget = get_prompt_token_budget()
+    instruction = instruction.strip()
+    
+    resume_text = (resume_text or "").strip()
+    job_description = (job_description or "").strip()
+    resume_budget = jd_budget = None
+    if token_budget > 0:
+        # Headers and the instruction are not compactable; share the rest,
+        # giving the job description at least a third when both are too long
+        available = max(0, token_budget - estimate_tokens(instruction) - 20)
+        jd_tokens = estimate_tokens(job_description)
+        jd_budget = min(jd_tokens, max(available - estimate_tokens(resume_text), available // 3))
+        resume_budget = available - jd_budget
+    
+    compaction = {}
+    blocks = []
+    if resume_text:
+        resume_text, compaction["resume"] = compact_text(resume_text, resume_budget, "resume")
+        blocks.append(f"Candidate Resume:\n{resume_text}\n\n")
+    if job_description:
+        job_description, compaction["job_description"] = compact_text(
+            job_description, jd_budget, "job_description"
+        )
+        blocks.append(f"Job Description:\n{job_description}\n\n")
+    
+    for name, report in compaction.items():
+        if report["dropped_sections"] or report["truncated_lines"]:
+            print(f"✂ Prompt {name} trimmed to fit token budget: {describe_compaction(report)}")
+    return LayeredPrompt(blocks, instruction, compaction)
+
+
+def with_json_schema(prompt: str, schema: Dict[str, Any], name: str = "result") -> LayeredPrompt:
+    """
+    Request a JSON object matching `schema` instead of free text
+    
+    Groq and OpenAI get JSON mode, Gemini a JSON response MIME type and
+    Anthropic a forced tool call whose input schema is `schema` (the tool
+    input is returned as the response text). The prompt should still
+    describe the expected JSON, since JSON mode does not enforce the schema.
+    """
+    if isinstance(prompt, LayeredPrompt):
+        structured = LayeredPrompt(prompt.blocks, prompt.instruction, prompt.compaction)
+    else:
+        structured = LayeredPrompt([], prompt)
+    structured.json_schema = schema
+    structured.schema_name = name
+    return structured
+
+
+def _openai_json_kwargs(prompt: str) -> Dict[str, Any]:
+    """Extra chat.completions arguments for a structured prompt (Groq / OpenAI)"""
+    if getattr(prompt, "json_schema", None) is None:
+        return {}
+    return {"response_format": {"type": "json_object"}}
+
+
+def _gemini_json_kwargs(prompt: str) -> Dict[str, Any]:
+    """Extra GenerationConfig arguments for a structured prompt"""
+    if getattr(prompt, "json_schema", None) is None:
+        return {}
+    return {"response_mime_type": "application/json"}
+
+
+def _anthropic_tool_kwargs(prompt: str) -> Dict[str, Any]:
+    """Extra messages.create arguments forcing a tool call with the prompt's schema"""
+    schema = getattr(prompt, "json_schema", None)
+    if schema is None:
+        return {}
+    return {
+        "tools": [{
+            "name": prompt.schema_name,
+            "description": f"Record the {prompt.schema_name} as structured data",
+            "input_schema": schema,
+        }],
+        "tool_choice": {"type": "tool", "name": prompt.schema_name},
+    }
+
+
+def _anthropic_text(response) -> str:
+    """Response text, or the forced tool call's input as JSON"""
+    for block in response.content:
+        if getattr(block, "type", None) == "tool_use":
+            return json.dumps(block.input)
+    return "".join(getattr(block, "text", "") for block in response.content)
+
+
+def _anthropic_content(prompt: str) -> Union[str, List[Dict[str, Any]]]:
+    """Message content for Anthropic, with a cache breakpoint after each stable block"""
+    blocks = getattr(prompt, "blocks", None)
+    if not blocks:
+        return prompt
+    # Anthropic allows at most 4 cache breakpoints per request; merge extra leading blocks
+    if len(blocks) > 4:
+        blocks = ["".join(blocks[:-3])] + blocks[-3:]
+    content = [
+        {"type": "text", "text": block, "cache_control": {"type": "ephemeral"}}
+        for block in blocks
+    ]
+    if prompt.instruction:
+        content.append({"type": "text", "text": prompt.instruction})
+    return content
+
+
+def _usage_from_response(response) -> Optional[Dict[str, int]]:
+    """Read prompt/completion (and cached prompt) token counts from any provider SDK response"""
+    if response is None:
+        return None
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        # OpenAI / Groq use prompt_tokens / completion_tokens, Anthropic input / output
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+        if prompt_tokens is None:
+            # Anthropic counts cache reads/writes separately from input_tokens
+            cached_tokens = getattr(usage, "cache_read_input_tokens", None)
+            prompt_tokens = getattr(usage, "input_tokens", None)
+            if prompt_tokens is not None:
+                prompt_tokens += (cached_tokens or 0) + (
+                    getattr(usage, "cache_creation_input_tokens", None) or 0
+                )
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        if completion_tokens is None:
+            completion_tokens = getattr(usage, "output_tokens", None)
+    else:
+        # Gemini
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return None
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        completion_tokens = getattr(usage, "candidates_token_count", None)
+        cached_tokens = getattr(usage, "cached_content_token_count", None)
+    if prompt_tokens is None and completion_tokens is None:
+        return None
+    return {
+        "prompt_tokens": prompt_tokens or 0,
+        "completion_tokens": completion_tokens or 0,
+        "cached_prompt_tokens": cached_tokens if isinstance(cached_tokens, int) else 0,
+    }
+
+
+def _estimate_usage(prompt: str, text: str) -> Dict[str, int]:
+    """Approximate token usage for providers that do not report it"""
+    return {
+        "prompt_tokens": estimate_tokens(prompt, "fake"),
+        "completion_tokens": estimate_tokens(text, "fake"),
+    }
+
+
+class _Flight:
+    """One in-flight call shared by every caller with the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight requests into one underlying call
+
+    The first caller for a key runs the function; callers arriving with the
+    same key while it runs wait and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Flight] = {}
+        self._async_calls: Dict[tuple, asyncio.Future] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn):
+        """
+        Run fn() once per key across concurrent callers
+        
+        Returns:
+            (result, shared) where shared is True for callers that reused
+            another caller's in-flight call
+        """
+        with self._lock:
+            flight = self._calls.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = _Flight()
+                self._calls[key] = flight
+                leader = True
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            flight.done.set()
+
+    async def do_async(self, key: str, coro_fn):
+        """Async version of do(); coalesces callers on the same event loop"""
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            future = self._async_calls.get(loop_key)
+            if future is not None:
+                self.coalesced += 1
+        if future is not None:
+            return await asyncio.shield(future), True
+        
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._async_calls[loop_key] = future
+        try:
+            result = await coro_fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._async_calls.pop(loop_key, None)
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        with self._lock:
+            return len(self._calls) + len(self._async_calls)
+
+
 class MultiModelLLM:
     """
     Unified interface for multiple LLM providers with automatic fallback
     """
     
-    def __init__(self):
+    def __init__(self, use_cache: Optional[bool] = None):
         self.providers = []
+        self.cache = None
+        self.fake = None
+        self._client_lock = threading.Lock()
+        from utils.llm_http import SharedHTTPClients
+        self.http = SharedHTTPClients()
         self._init_providers()
+        from utils.llm_router import ProviderRouter, HedgeBudget
+        from utils.llm_ratelimit import ProviderScheduler
+        self.router = ProviderRouter()
+        self.scheduler = ProviderScheduler()
+        self.single_flight = SingleFlight()
+        from utils.llm_retry import RetryPolicy
+        self.retry_policy = RetryPolicy()
+        from utils.llm_task_routes import TaskRoutes
+        self.task_routes = TaskRoutes()
+        self._model_variants: Dict[tuple, Dict[str, Any]] = {}
+        self.hedge_budget = HedgeBudget()
+        self.hedge_enabled = os.getenv("LLM_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+        self.hedge_default_delay = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", 8))
+        self.hedge_min_delay = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", 0.5))
+        from utils.llm_metrics import LLMMetrics
+        self.metrics = LLMMetrics()
+        if use_cache is None:
+            use_cache = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+        if use_cache:
+            self._init_cache()
+    
+    def _init_cache(self):
+        """Initialize the persistent response cache"""
+        try:
+            from utils.llm_cache import LLMResponseCache
+            self.cache = LLMResponseCache()
+        except Exception as e:
+            print(f"Failed to initialize LLM response cache: {e}")
+            self.cache = None
     
     def _init_providers(self):
-        """Initialize available LLM providers in priority order"""
+        """
+        Register configured LLM providers in priority order
         
-        # 1. Try Groq (fast and reliable)
-        groq_key = os.getenv("GROQ_API_KEY")
-        if groq_key:
-            try:
-                from groq import Groq
+        Only configuration is recorded here; each SDK is imported and its
+        client constructed the first time that provider is selected (see
+        _get_client), so importing this module stays cheap.
+        
+        With LLM_FAKE_MODE=replay only the built-in fake provider(s) are
+        registered; with LLM_FAKE_MODE=record real traffic is also recorded.
+        """
+        fake_mode = os.getenv("LLM_FAKE_MODE", "off").lower()
+        if fake_mode in ("record", "replay"):
+            from utils.llm_fake import FakeLLMBackend
+            self.fake = FakeLLMBackend(mode=fake_mode)
+        if fake_mode == "replay":
+            # Several fake providers let fallback, routing and hedging be exercised offline
+            for i in range(max(1, int(os.getenv("LLM_FAKE_PROVIDER_COUNT", 1)))):
                 self.providers.append({
-                    "name": "groq",
-                    "client": Groq(api_key=groq_key),
-                    "model": os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"),
-                    "type": "groq"
+                    "name": "fake" if i == 0 else f"fake{i + 1}",
+                    "model": "fake-replay",
+                    "type": "fake",
+                    "client": None,
                 })
-            except Exception as e:
-                print(f"Failed to initialize Groq: {e}")
+            return
+        
+        # 1. Try Groq (fast and reliable)
+        self._register_provider(
+            "groq", "groq", os.getenv("GROQ_API_KEY"),
+            os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+        )
         
         # 2. Try Google Gemini
-        google_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
-        if google_key:
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=google_key)
-                self.providers.append({
-                    "name": "gemini",
-                    "client": genai,
-                    "model": os.getenv("GENAI_MODEL", "gemini-1.5-flash"),
-                    "type": "gemini"
-                })
-            except Exception as e:
-                print(f"Failed to initialize Gemini: {e}")
+        self._register_provider(
+            "gemini", "google.generativeai",
+            os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"),
+            os.getenv("GENAI_MODEL", "gemini-1.5-flash")
+        )
         
         # 3. Try OpenAI (if key is available)
-        openai_key = os.getenv("OPENAI_API_KEY")
-        if openai_key:
-            try:
-                from openai import OpenAI
-                self.providers.append({
-                    "name": "openai",
-                    "client": OpenAI(api_key=openai_key),
-                    "model": os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-                    "type": "openai"
-                })
-            except Exception as e:
-                print(f"Failed to initialize OpenAI: {e}")
+        self._register_provider(
+            "openai", "openai", os.getenv("OPENAI_API_KEY"),
+            os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        )
         
         # 4. Try Anthropic Claude (if key is available)
-        anthropic_key = os.getenv("ANTHROPIC_API_KEY")
-        if anthropic_key:
-            try:
-                from anthropic import Anthropic
-                self.providers.append({
-                    "name": "anthropic",
-                    "client": Anthropic(api_key=anthropic_key),
-                    "model": os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307"),
-                    "type": "anthropic"
-                })
-            except Exception as e:
-                print(f"Failed to initialize Anthropic: {e}")
+        self._register_provider(
+            "anthropic", "anthropic", os.getenv("ANTHROPIC_API_KEY"),
+            os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
+        )
+    
+    def _register_provider(self, name: str, sdk_module: str, api_key: Optional[str], model: str):
+        """Record a provider if its API key is set and its SDK is installed (without importing it)"""
+        if not api_key:
+            return
+        try:
+            if importlib.util.find_spec(sdk_module) is None:
+                print(f"Failed to initialize {name}: SDK '{sdk_module}' is not installed")
+                return
+        except Exception as e:
+            print(f"Failed to initialize {name}: {e}")
+            return
+        self.providers.append({
+            "name": name,
+            "api_key": api_key,
+            "model": model,
+            "type": name,
+            "client": None,
+        })
+    
+    def _get_client(self, provider: Dict[str, Any]):
+        """
+        Import the provider SDK and construct its client on first use
+        
+        SDK retries are disabled (max_retries=0): utils/llm_retry.py is the only
+        retry layer, so 429s reach the router/scheduler and deadlines hold.
+        """
+        provider = provider.get("base", provider)
+        if provider.get("client") is not None:
+            return provider["client"]
+        from utils.llm_http import http_package_for
+        with self._client_lock:
+            if provider.get("client") is not None:
+                return provider["client"]
+            if provider["type"] == "groq":
+                import groq
+                provider["http_package"] = http_package_for(groq)
+                client = groq.Groq(
+                    api_key=provider["api_key"],
+                    http_client=self.http.client(provider["http_package"]),
+                    max_retries=0
+                )
+            elif provider["type"] == "gemini":
+                import google.generativeai as genai
+                genai.configure(api_key=provider["api_key"])
+                client = genai
+            elif provider["type"] == "openai":
+                import openai
+                provider["http_package"] = http_package_for(openai)
+                client = openai.OpenAI(
+                    api_key=provider["api_key"],
+                    http_client=self.http.client(provider["http_package"]),
+                    max_retries=0
+                )
+            elif provider["type"] == "anthropic":
+                import anthropic
+                provider["http_package"] = http_package_for(anthropic)
+                client = anthropic.Anthropic(
+                    api_key=provider["api_key"],
+                    http_client=self.http.client(provider["http_package"]),
+                    max_retries=0
+                )
+            else:
+                raise Exception(f"Unknown provider type: {provider['type']}")
+            provider["client"] = client
+            return client
+    
+    def _get_gemini_model(self, provider: Dict[str, Any], model_name: Optional[str] = None):
+        """Return a cached GenerativeModel instead of building one per call"""
+        genai = self._get_client(provider)
+        model_name = model_name or provider["model"]
+        models = provider.get("base", provider).setdefault("gemini_models", {})
+        model = models.get(model_name)
+        if model is None:
+            model = genai.GenerativeModel(model_name)
+            models[model_name] = model
+        return model
     
     def generate_content(
         self, 
         prompt: str, 
-        temperature: float = 0.7,
-        max_tokens: int = 2048,
-        preferred_provider: Optional[str] = None
-    ) -> str:
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        preferred_provider: Optional[str] = None,
+        bypass_cache: bool = False,
+        hedge: Optional[bool] = None,
+        task: str = "default",
+        priority: str = "interactive",
+        deadline_seconds: Optional[float] = None
+    ) -> LLMResponse:
         """
         Generate content using available LLM providers with automatic fallback
         
         Args:
             prompt: The prompt to send to the LLM
-            temperature: Sampling temperature (0.0 to 1.0)
-            max_tokens: Maximum tokens to generate
-            preferred_provider: Preferred provider name (groq, gemini, openai, anthropic)
+            temperature: Sampling temperature (0.0 to 1.0; defaults to the task's route)
+            max_tokens: Maximum tokens to generate (defaults to the task's route)
+            preferred_provider: Preferred provider name (groq, gemini, openai, anthropic;
+                defaults to the task's route)
+            bypass_cache: Skip the response cache (use for creative calls that
+                should produce a fresh answer every time)
+            hedge: Send a backup request to the next provider if the first one is
+                slower than its recent latency percentile (defaults to LLM_HEDGE_ENABLED)
+            task: Task name; selects the route (model size, limits) in the task
+                routing table and is used for the hedging budget and call metrics
+            priority: "interactive" or "batch"; interactive requests are served
+                first when a provider's rate limit makes requests queue
+            deadline_seconds: Overall time budget for the request across retries
+                and fallbacks (defaults to LLM_REQUEST_DEADLINE_SECONDS)
+        
+        Returns:
+            Generated text response (an LLMResponse; check .cache_hit / .coalesced /
+            .provider / .usage)
+        """
+        temperature, max_tokens, preferred_provider = self._resolve_task(
+            task, temperature, max_tokens, preferred_provider
+        )
+        start = time.time()
+        try:
+            response = self._generate_content(
+                prompt, temperature, max_tokens, preferred_provider,
+                bypass_cache, hedge, task, priority, deadline_seconds
+            )
+        except Exception as e:
+            self._emit_metrics(task, start, error=e, bypass_cache=bypass_cache)
+            raise
+        self._emit_metrics(task, start, response, bypass_cache=bypass_cache)
+        return response
+    
+    def _generate_content(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        preferred_provider: Optional[str],
+        bypass_cache: bool,
+        hedge: Optional[bool],
+        task: str,
+        priority: str,
+        deadline_seconds: Optional[float] = None
+    ) -> LLMResponse:
+        from utils.llm_retry import get_request_deadline
+        providers_to_try = self._providers_for_request(preferred_provider, task)
+        
+        cache_key, cached = self._cache_lookup(
+            prompt, temperature, max_tokens, providers_to_try, bypass_cache
+        )
+        if cached is not None:
+            return cached
+        
+        def _generate() -> LLMResponse:
+            deadline = get_request_deadline(deadline_seconds)
+            if self.hedge_enabled if hedge is None else hedge:
+                routed = self._route(providers_to_try, preferred_provider)
+                future = asyncio.run_coroutine_threadsafe(
+                    self._with_deadline(
+                        self._generate_hedged_async(
+                            routed, prompt, temperature, max_tokens, task, priority, deadline
+                        ),
+                        deadline,
+                    ),
+                    _get_background_loop(),
+                )
+                response = future.result()
+                self._cache_store(cache_key, response, response.provider)
+                return response
+            
+            errors = []
+            for provider in self._route(providers_to_try, preferred_provider):
+                if deadline is not None and time.time() >= deadline:
+                    errors.append("request deadline exceeded")
+                    break
+                try:
+                    response = self._call_provider(
+                        provider, prompt, temperature, max_tokens, priority, task, deadline
+                    )
+                    response.attempts = len(errors) + 1
+                    self._cache_store(cache_key, response, provider["name"])
+                    return response
+                except Exception as e:
+                    errors.append(f"{provider['name']}: {str(e)}")
+                    continue
+            
+            # All providers failed
+            raise Exception(f"All LLM providers failed. Errors: {'; '.join(errors)}")
+        
+        # Creative calls want a fresh answer each time, so they are not coalesced
+        if bypass_cache:
+            return _generate()
+        
+        flight_key = cache_key or self._request_key(
+            prompt, temperature, max_tokens, providers_to_try
+        )
+        response, shared = self.single_flight.do(flight_key, _generate)
+        if shared:
+            return LLMResponse(response, response.provider, coalesced=True, model=response.model)
+        return response
+    
+    def _call_provider(
+        self,
+        provider: Dict[str, Any],
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        priority: str = "interactive",
+        task: str = "default",
+        deadline: Optional[float] = None
+    ) -> LLMResponse:
+        """
+        Call one provider with rate limiting, retries, circuit breaking and health tracking
+        
+        Waits for the provider's RPM/TPM capacity first. Transient failures
+        (429, 5xx / overloaded, timeouts) are retried on the same provider
+        with decorrelated-jitter backoff, honouring Retry-After; a 429 also
+        pauses the provider so queued requests wait it out. Permanent
+        failures (bad key, invalid model or request) are raised right away
+        so the caller moves on to the next provider.
+        """
+        from utils.llm_ratelimit import estimate_request_tokens
+        name = provider["name"]
+        tokens = estimate_request_tokens(prompt, max_tokens, provider["type"])
+        delay = None
+        for attempt in range(self.retry_policy.max_retries + 1):
+            self._acquire_capacity(name, tokens, priority, deadline)
+            start = time.time()
+            try:
+                response = self._generate_with_provider(
+                    provider, prompt, temperature, max_tokens, task, deadline
+                )
+            except Exception as e:
+                kind, delay = self._retry_delay(name, e, attempt, delay, deadline)
+                if delay is None:
+                    raise
+                if kind != "rate_limit":
+                    time.sleep(delay)
+                continue
+            self.router.record_success(name, time.time() - start)
+            self._reconcile_capacity(name, tokens, response)
+            self._record(provider, prompt, temperature, max_tokens, response, time.time() - start)
+            response.retries = attempt
+            return response
+    
+    async def _call_provider_async(
+        self,
+        provider: Dict[str, Any],
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        priority: str = "interactive",
+        task: str = "default",
+        deadline: Optional[float] = None
+    ) -> LLMResponse:
+        """Async version of _call_provider; a cancelled call is recorded as a latency lower bound"""
+        from utils.llm_ratelimit import estimate_request_tokens
+        name = provider["name"]
+        tokens = estimate_request_tokens(prompt, max_tokens, provider["type"])
+        delay = None
+        for attempt in range(self.retry_policy.max_retries + 1):
+            await asyncio.to_thread(self._acquire_capacity, name, tokens, priority, deadline)
+            start = time.time()
+            try:
+                response = await self._generate_with_provider_async(
+                    provider, prompt, temperature, max_tokens, task, deadline
+                )
+            except asyncio.CancelledError:
+                self.router.record_cancelled(name, time.time() - start)
+                raise
+            except Exception as e:
+                kind, delay = self._retry_delay(name, e, attempt, delay, deadline)
+                if delay is None:
+                    raise
+                if kind != "rate_limit":
+                    await asyncio.sleep(delay)
+                continue
+            self.router.record_success(name, time.time() - start)
+            self._reconcile_capacity(name, tokens, response)
+            self._record(provider, prompt, temperature, max_tokens, response, time.time() - start)
+            response.retries = attempt
+            return response
+    
+    def _acquire_capacity(
+        self, name: str, tokens: int, priority: str, deadline: Optional[float] = None
+    ):
+        """
+        Check the provider's circuit breaker, then wait for its rate-limit capacity
+        
+        The circuit is checked first so requests to a failing provider do not
+        use up its budget; a half-open probe slot is given back if no
+        capacity frees up. Raises if either refuses.
+        """
+        from utils.llm_retry import time_left
+        if not self.router.allow_request(name):
+            raise Exception("circuit open")
+        remaining = time_left(deadline)
+        timeout = None if remaining is None else min(self.scheduler.max_wait_seconds, remaining)
+        if not self.scheduler.acquire(name, tokens, priority, timeout=timeout):
+            self.router.release_probe(name)
+            raise Exception("rate limited: no capacity within the wait window")
+    
+    def _reconcile_capacity(self, name: str, tokens: int, response: "LLMResponse"):
+        """Settle the TPM charge of a completed request against its reported usage"""
+        usage = getattr(response, "usage", None)
+        if usage:
+            self.scheduler.reconcile(
+                name, tokens, usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+            )
+    
+    def _retry_delay(
+        self,
+        name: str,
+        error: Exception,
+        attempt: int,
+        previous_delay: Optional[float],
+        deadline: Optional[float] = None
+    ):
+        """
+        Record a failed attempt and decide whether to retry on the same provider
         
         Returns:
-            Generated text response
+            (error_kind, delay): seconds to wait before retrying, or None to
+            give up on this provider. For a 429 the provider is paused in the
+            scheduler for `delay`, so the caller should not sleep as well.
+        """
+        from utils.llm_retry import classify_error, TRANSIENT_ERRORS
+        kind = classify_error(error)
+        delay = None
+        if kind in TRANSIENT_ERRORS and attempt < self.retry_policy.max_retries:
+            delay = self.retry_policy.delay_for(error, previous_delay)
+            if deadline is not None and time.time() + delay >= deadline:
+                delay = None
+        if delay is None:
+            self.router.record_failure(name, str(error))
+            return kind, None
+        # A transient blip that is retried does not count against the circuit breaker
+        self.router.release_probe(name)
+        if kind == "rate_limit":
+            self.scheduler.throttle(name, delay)
+        return kind, delay
+    
+    def _record(
+        self,
+        provider: Dict[str, Any],
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        text: str,
+        latency: float
+    ):
+        """Append a real provider response to the fake provider's recording (record mode only)"""
+        if self.fake is None or not self.fake.recording or provider["type"] == "fake":
+            return
+        try:
+            self.fake.record(
+                prompt, temperature, max_tokens, text,
+                provider=provider["name"], model=provider["model"], latency=latency
+            )
+        except Exception as e:
+            print(f"LLM recording failed: {e}")
+    
+    def _resolve_task(
+        self,
+        task: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        preferred_provider: Optional[str]
+    ):
+        """Fill request settings the caller left unset from the task's route"""
+        route = self.task_routes.route(task)
+        return (
+            route["temperature"] if temperature is None else temperature,
+            route["max_tokens"] if max_tokens is None else max_tokens,
+            preferred_provider or route.get("provider"),
+        )
+    
+    def _provider_for_model(self, provider: Dict[str, Any], model: Optional[str]) -> Dict[str, Any]:
+        """
+        The provider configured to call `model`
+        
+        Variants share the base provider's name (so routing, rate limits and
+        health stay per provider) and its SDK clients; only "model" differs.
         """
+        if not model or model == provider["model"]:
+            return provider
+        key = (provider["name"], model)
+        variant = self._model_variants.get(key)
+        if variant is None:
+            variant = {**provider, "model": model, "base": provider}
+            self._model_variants[key] = variant
+        return variant
+    
+    def _providers_for_request(
+        self, preferred_provider: Optional[str] = None, task: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Return providers in the order they should be tried, set to the task's model"""
         if not self.providers:
             raise Exception("No LLM providers available. Please configure API keys.")
         
         # Reorder providers if preferred provider is specified
-        providers_to_try = self.providers.copy()
+        providers_to_try = [
+            self._provider_for_model(provider, self.task_routes.model_for(task, provider["type"]))
+            for provider in self.providers
+        ]
         if preferred_provider:
             providers_to_try.sort(
                 key=lambda p: 0 if p["name"] == preferred_provider else 1
             )
-        
-        errors = []
-        for provider in providers_to_try:
-            try:
-                return self._generate_with_provider(
-                    provider, prompt, temperature, max_tokens
-                )
-            except Exception as e:
-                errors.append(f"{provider['name']}: {str(e)}")
-                continue
-        
-        # All providers failed
-        raise Exception(f"All LLM providers failed. Errors: {'; '.join(errors)}")
+        return providers_to_try
+    
+    def _route(
+        self, providers: List[Dict[str, Any]], preferred_provider: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Order providers by health and latency, skipping tripped circuits"""
+        routed = self.router.order(providers, preferred_provider)
+        if not routed:
+            raise Exception(
+                "All LLM providers are temporarily unavailable (circuit open). "
+                f"Provider stats: {self.router.stats()}"
+            )
+        return routed
+    
+    def _cache_lookup(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        providers: List[Dict[str, Any]],
+        bypass_cache: bool = False
+    ):
+        """Return (cache_key, cached LLMResponse or None); key is None when not caching"""
+        if self.cache is None or bypass_cache:
+            return None, None
+        cache_key = self._request_key(prompt, temperature, max_tokens, providers)
+        try:
+            cached = self.cache.get(cache_key)
+        except Exception as e:
+            print(f"LLM cache lookup failed: {e}")
+            return cache_key, None
+        if cached is None:
+            return cache_key, None
+        return cache_key, LLMResponse(cached["response"], cached["provider"], cache_hit=True)
+    
+    def _request_key(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        providers: List[Dict[str, Any]]
+    ) -> str:
+        """Content hash identifying a request (shared by the cache and single-flight)"""
+        from utils.llm_cache import make_cache_key
+        schema = getattr(prompt, "json_schema", None)
+        if schema is not None:
+            # The same text in structured output mode is a different request
+            prompt = f"{prompt}\n[json_schema:{json.dumps(schema, sort_keys=True)}]"
+        return make_cache_key(
+            prompt, temperature, max_tokens, self._provider_signature(providers)
+        )
+    
+    def _cache_store(self, cache_key: Optional[str], text: str, provider_name: str):
+        """Store a fresh response in the cache (no-op when not caching)"""
+        if cache_key is None or not text:
+            return
+        try:
+            self.cache.set(cache_key, text, provider_name)
+        except Exception as e:
+            print(f"LLM cache write failed: {e}")
+    
+    @staticmethod
+    def _provider_signature(providers: List[Dict[str, Any]]) -> str:
+        """Describe the provider/model chain a request will be served by"""
+        return ",".join(f"{p['name']}/{p['model']}" for p in providers)
     
     def _generate_with_provider(
         self, 
         provider: Dict[str, Any], 
         prompt: str, 
         temperature: float,
-        max_tokens: int
-    ) -> str:
-        """Generate content with a specific provider"""
+        max_tokens: int,
+        task: str = "default",
+        deadline: Optional[float] = None
+    ) -> LLMResponse:
+        """Generate content with a specific provider, within the task's request timeout"""
         
-        if provider["type"] == "groq":
-            response = provider["client"].chat.completions.create(
+        if provider["type"] in ("groq", "openai"):
+            response = self._get_client(provider).chat.completions.create(
                 model=provider["model"],
                 messages=[{"role": "user", "content": prompt}],
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                timeout=self._request_timeout(provider, task, deadline),
+                **_openai_json_kwargs(prompt)
+            )
+            return self._make_response(
+                provider, response.choices[0].message.content, _usage_from_response(response)
             )
-            return response.choices[0].message.content
         
         elif provider["type"] == "gemini":
-            model = provider["client"].GenerativeModel(provider["model"])
-            generation_config = provider["client"].GenerationConfig(
+            model = self._get_gemini_model(provider)
+            generation_config = self._get_client(provider).GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+                **_gemini_json_kwargs(prompt)
+            )
+            response = model.generate_content(
+                prompt,
+                generation_config=generation_config,
+                request_options={"timeout": self.http.read_timeout(task, time_left(deadline))}
+            )
+            return self._make_response(provider, response.text, _usage_from_response(response))
+        
+        elif provider["type"] == "anthropic":
+            response = self._get_client(provider).messages.create(
+                model=provider["model"],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": _anthropic_content(prompt)}],
+                timeout=self._request_timeout(provider, task, deadline),
+                **_anthropic_tool_kwargs(prompt)
+            )
+            return self._make_response(
+                provider, _anthropic_text(response), _usage_from_response(response)
+            )
+        
+        elif provider["type"] == "fake":
+            text = self.fake.generate(prompt, temperature, max_tokens)
+            return self._make_response(provider, text, _estimate_usage(prompt, text))
+        
+        else:
+            raise Exception(f"Unknown provider type: {provider['type']}")
+    
+    def _request_timeout(
+        self, provider: Dict[str, Any], task: str, deadline: Optional[float] = None
+    ):
+        """Per-request timeout for a task (capped by the request deadline), for the provider's SDK"""
+        return self.http.timeout_for(
+            task, provider.get("base", provider).get("http_package", "httpx"), time_left(deadline)
+        )
+    
+    @staticmethod
+    def _make_response(
+        provider: Dict[str, Any], text: str, usage: Optional[Dict[str, int]] = None
+    ) -> LLMResponse:
+        """Wrap provider output with the provider, model and token usage"""
+        return LLMResponse(text, provider["name"], model=provider["model"], usage=usage)
+    
+    def generate_stream(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        preferred_provider: Optional[str] = None,
+        bypass_cache: bool = False,
+        priority: str = "interactive",
+        task: str = "default",
+        deadline_seconds: Optional[float] = None
+    ) -> Iterator[str]:
+        """
+        Stream generated text as it arrives, yielding text deltas
+        
+        Transient failures before any text arrives are retried on the same
+        provider, then the next provider is tried; a failure mid-stream is
+        raised to the caller. The request deadline bounds the time until the
+        stream starts. Cached responses are yielded in one piece, and
+        completed streams are written to the cache.
+        """
+        temperature, max_tokens, preferred_provider = self._resolve_task(
+            task, temperature, max_tokens, preferred_provider
+        )
+        start = time.time()
+        ttft = None
+        result: Dict[str, Any] = {}
+        error: Optional[Exception] = None
+        finished = False
+        stream = self._generate_stream(
+            prompt, temperature, max_tokens, preferred_provider,
+            bypass_cache, priority, task, result, deadline_seconds
+        )
+        try:
+            for delta in stream:
+                if ttft is None:
+                    ttft = time.time() - start
+                yield delta
+            finished = True
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Close the inner stream first so an early stop leaves its partial response
+            stream.close()
+            self._emit_metrics(
+                task, start, result.get("response"), error=error,
+                bypass_cache=bypass_cache, stream=True, ttft=ttft,
+                cancelled=not finished and error is None
+            )
+    
+    def _generate_stream(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        preferred_provider: Optional[str],
+        bypass_cache: bool,
+        priority: str,
+        task: str,
+        result: Dict[str, Any],
+        deadline_seconds: Optional[float] = None
+    ) -> Iterator[str]:
+        """Streaming implementation; the final LLMResponse is left in result["response"]"""
+        from utils.llm_ratelimit import estimate_request_tokens
+        from utils.llm_retry import get_request_deadline
+        deadline = get_request_deadline(deadline_seconds)
+        providers_to_try = self._providers_for_request(preferred_provider, task)
+        
+        cache_key, cached = self._cache_lookup(
+            prompt, temperature, max_tokens, providers_to_try, bypass_cache
+        )
+        if cached is not None:
+            result["response"] = cached
+            yield cached
+            return
+        
+        errors = []
+        for provider in self._route(providers_to_try, preferred_provider):
+            if deadline is not None and time.time() >= deadline:
+                errors.append("request deadline exceeded")
+                break
+            name = provider["name"]
+            tokens = estimate_request_tokens(prompt, max_tokens, provider["type"])
+            delay = None
+            for attempt in range(self.retry_policy.max_retries + 1):
+                try:
+                    self._acquire_capacity(name, tokens, priority, deadline)
+                except Exception as e:
+                    errors.append(f"{name}: {str(e)}")
+                    break
+                start = time.time()
+                chunks = []
+                usage: Dict[str, int] = {}
+                try:
+                    for delta in self._stream_with_provider(
+                        provider, prompt, temperature, max_tokens, usage, task, deadline
+                    ):
+                        if delta:
+                            chunks.append(delta)
+                            yield delta
+                except GeneratorExit:
+                    # Consumer stopped early: keep the partial response for the metrics record
+                    result["response"] = self._make_response(provider, "".join(chunks), usage or None)
+                    result["response"].attempts = len(errors) + 1
+                    result["response"].retries = attempt
+                    raise
+                except Exception as e:
+                    if chunks:
+                        # Text already reached the caller: no retry or fallback
+                        self.router.record_failure(name, str(e))
+                        result["response"] = self._make_response(provider, "".join(chunks), usage or None)
+                        result["response"].attempts = len(errors) + 1
+                        result["response"].retries = attempt
+                        raise
+                    kind, delay = self._retry_delay(name, e, attempt, delay, deadline)
+                    if delay is None:
+                        errors.append(f"{name}: {str(e)}")
+                        break
+                    if kind != "rate_limit":
+                        time.sleep(delay)
+                    continue
+                response = self._make_response(provider, "".join(chunks), usage or None)
+                response.attempts = len(errors) + 1
+                response.retries = attempt
+                result["response"] = response
+                self.router.record_success(name, time.time() - start)
+                self._reconcile_capacity(name, tokens, response)
+                self._record(provider, prompt, temperature, max_tokens, response, time.time() - start)
+                self._cache_store(cache_key, response, name)
+                return
+        
+        raise Exception(f"All LLM providers failed. Errors: {'; '.join(errors)}")
+    
+    def _stream_with_provider(
+        self,
+        provider: Dict[str, Any],
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        usage: Optional[Dict[str, int]] = None,
+        task: str = "default",
+        deadline: Optional[float] = None
+    ) -> Iterator[str]:
+        """
+        Stream text deltas from a specific provider
+        
+        If `usage` is given it is filled with the token counts the provider
+        reports once the stream completes.
+        """
+        usage = {} if usage is None else usage
+        
+        if provider["type"] in ("groq", "openai"):
+            extra = {}
+            if provider["type"] == "openai":
+                # OpenAI only reports usage on streams when asked to (in a final chunk)
+                extra["stream_options"] = {"include_usage": True}
+            stream = self._get_client(provider).chat.completions.create(
+                model=provider["model"],
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                timeout=self._request_timeout(provider, task, deadline),
+                **extra
+            )
+            for chunk in stream:
+                # Groq reports usage on the last chunk under x_groq
+                usage.update(
+                    _usage_from_response(chunk)
+                    or _usage_from_response(getattr(chunk, "x_groq", None))
+                    or {}
+                )
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        
+        elif provider["type"] == "gemini":
+            model = self._get_gemini_model(provider)
+            generation_config = self._get_client(provider).GenerationConfig(
                 temperature=temperature,
                 max_output_tokens=max_tokens
             )
-            response = model.generate_content(prompt, generation_config=generation_config)
-            return response.text
+            response = model.generate_content(
+                prompt,
+                generation_config=generation_config,
+                stream=True,
+                request_options={"timeout": self.http.read_timeout(task, time_left(deadline))}
+            )
+            for chunk in response:
+                if chunk.parts:
+                    yield chunk.text
+            usage.update(_usage_from_response(response) or {})
         
-        elif provider["type"] == "openai":
-            response = provider["client"].chat.completions.create(
+        elif provider["type"] == "anthropic":
+            with self._get_client(provider).messages.stream(
+                model=provider["model"],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": _anthropic_content(prompt)}],
+                timeout=self._request_timeout(provider, task, deadline)
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+                usage.update(_usage_from_response(stream.get_final_message()) or {})
+        
+        elif provider["type"] == "fake":
+            chunks = []
+            for delta in self.fake.stream(prompt, temperature, max_tokens):
+                chunks.append(delta)
+                yield delta
+            usage.update(_estimate_usage(prompt, "".join(chunks)))
+        
+        else:
+            # Provider without a streaming mode: yield the full response at once
+            response = self._generate_with_provider(
+                provider, prompt, temperature, max_tokens, task, deadline
+            )
+            usage.update(response.usage or {})
+            yield response
+    
+    async def generate_content_async(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        preferred_provider: Optional[str] = None,
+        bypass_cache: bool = False,
+        hedge: Optional[bool] = None,
+        task: str = "default",
+        priority: str = "interactive",
+        deadline_seconds: Optional[float] = None
+    ) -> LLMResponse:
+        """
+        Async version of generate_content with the same fallback, retries, caching and hedging
+        
+        Uses each provider's native async client; providers without one run
+        the blocking call in a worker thread.
+        """
+        temperature, max_tokens, preferred_provider = self._resolve_task(
+            task, temperature, max_tokens, preferred_provider
+        )
+        start = time.time()
+        try:
+            response = await self._generate_content_async(
+                prompt, temperature, max_tokens, preferred_provider,
+                bypass_cache, hedge, task, priority, deadline_seconds
+            )
+        except Exception as e:
+            self._emit_metrics(task, start, error=e, bypass_cache=bypass_cache)
+            raise
+        self._emit_metrics(task, start, response, bypass_cache=bypass_cache)
+        return response
+    
+    async def _generate_content_async(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        preferred_provider: Optional[str],
+        bypass_cache: bool,
+        hedge: Optional[bool],
+        task: str,
+        priority: str,
+        deadline_seconds: Optional[float] = None
+    ) -> LLMResponse:
+        from utils.llm_retry import get_request_deadline
+        providers_to_try = self._providers_for_request(preferred_provider, task)
+        
+        cache_key, cached = await asyncio.to_thread(
+            self._cache_lookup, prompt, temperature, max_tokens, providers_to_try, bypass_cache
+        )
+        if cached is not None:
+            return cached
+        
+        async def _generate() -> LLMResponse:
+            deadline = get_request_deadline(deadline_seconds)
+            if self.hedge_enabled if hedge is None else hedge:
+                response = await self._with_deadline(
+                    self._generate_hedged_async(
+                        self._route(providers_to_try, preferred_provider),
+                        prompt, temperature, max_tokens, task, priority, deadline
+                    ),
+                    deadline,
+                )
+                await asyncio.to_thread(
+                    self._cache_store, cache_key, response, response.provider
+                )
+                return response
+            
+            errors = []
+            for provider in self._route(providers_to_try, preferred_provider):
+                if deadline is not None and time.time() >= deadline:
+                    errors.append("request deadline exceeded")
+                    break
+                try:
+                    response = await self._call_provider_async(
+                        provider, prompt, temperature, max_tokens, priority, task, deadline
+                    )
+                    response.attempts = len(errors) + 1
+                    await asyncio.to_thread(
+                        self._cache_store, cache_key, response, provider["name"]
+                    )
+                    return response
+                except Exception as e:
+                    errors.append(f"{provider['name']}: {str(e)}")
+                    continue
+            
+            raise Exception(f"All LLM providers failed. Errors: {'; '.join(errors)}")
+        
+        if bypass_cache:
+            return await _generate()
+        
+        flight_key = cache_key or self._request_key(
+            prompt, temperature, max_tokens, providers_to_try
+        )
+        response, shared = await self.single_flight.do_async(flight_key, _generate)
+        if shared:
+            return LLMResponse(response, response.provider, coalesced=True, model=response.model)
+        return response
+    
+    @staticmethod
+    async def _with_deadline(coro, deadline: Optional[float]):
+        """Await `coro`, cancelling it once the request deadline passes"""
+        from utils.llm_retry import time_left
+        try:
+            return await asyncio.wait_for(coro, time_left(deadline))
+        except asyncio.TimeoutError:
+            raise Exception("All LLM providers failed. Errors: request deadline exceeded")
+    
+    def _hedge_delay(self, provider_name: str) -> float:
+        """Seconds to wait on a provider before hedging: its recent latency percentile"""
+        delay = self.router.latency_percentile(
+            provider_name, self.hedge_percentile, min_samples=5
+        )
+        if delay is None:
+            delay = self.hedge_default_delay
+        return max(self.hedge_min_delay, delay)
+    
+    async def _generate_hedged_async(
+        self,
+        providers: List[Dict[str, Any]],
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        task: str = "default",
+        priority: str = "interactive",
+        deadline: Optional[float] = None
+    ) -> LLMResponse:
+        """
+        Race providers: start the next one when the current one is slow
+        
+        The first provider gets `_hedge_delay` seconds; if it has not answered
+        and the task's hedge budget allows, the next provider is started too.
+        The first successful answer wins and the other request is cancelled.
+        A failed request falls through to the next provider as usual.
+        
+        Returns:
+            The winning LLMResponse, with .attempts (providers started) and
+            .hedged (whether a backup request was sent) set
+        """
+        self.hedge_budget.record_request(task)
+        pending = list(providers)
+        running: Dict[asyncio.Task, Dict[str, Any]] = {}
+        errors = []
+        hedged = False
+        
+        def _start_next() -> bool:
+            if not pending:
+                return False
+            provider = pending.pop(0)
+            attempt = self._call_provider_async(
+                provider, prompt, temperature, max_tokens, priority, task, deadline
+            )
+            running[asyncio.ensure_future(attempt)] = provider
+            return True
+        
+        try:
+            _start_next()
+            while running:
+                done = set()
+                if len(running) == 1 and pending:
+                    (only_provider,) = running.values()
+                    done, _ = await asyncio.wait(
+                        running.keys(), timeout=self._hedge_delay(only_provider["name"])
+                    )
+                    if not done and self.hedge_budget.try_acquire(task) and _start_next():
+                        hedged = True
+                        continue
+                if not done:
+                    done, _ = await asyncio.wait(
+                        running.keys(), return_when=asyncio.FIRST_COMPLETED
+                    )
+                for finished in done:
+                    provider = running.pop(finished)
+                    if finished.exception() is None:
+                        response = finished.result()
+                        response.attempts = len(providers) - len(pending)
+                        response.hedged = hedged
+                        return response
+                    errors.append(f"{provider['name']}: {finished.exception()}")
+                if not running:
+                    _start_next()
+        finally:
+            for loser in running:
+                loser.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+        
+        raise Exception(f"All LLM providers failed. Errors: {'; '.join(errors)}")
+    
+    def _get_async_client(self, provider: Dict[str, Any]):
+        """
+        Get the provider's async client for the running event loop
+        
+        Async SDK clients hold connection pools bound to the loop they were
+        created on, so one client is kept per loop, built on that loop's
+        shared httpx.AsyncClient.
+        """
+        provider = provider.get("base", provider)
+        loop = asyncio.get_running_loop()
+        clients = provider.setdefault("async_clients", weakref.WeakKeyDictionary())
+        client = clients.get(loop)
+        if client is None:
+            from utils.llm_http import http_package_for
+            api_key = provider["api_key"]
+            if provider["type"] == "groq":
+                import groq
+                provider["http_package"] = http_package_for(groq)
+                client = groq.AsyncGroq(
+                    api_key=api_key,
+                    http_client=self.http.async_client(provider["http_package"]),
+                    max_retries=0
+                )
+            elif provider["type"] == "openai":
+                import openai
+                provider["http_package"] = http_package_for(openai)
+                client = openai.AsyncOpenAI(
+                    api_key=api_key,
+                    http_client=self.http.async_client(provider["http_package"]),
+                    max_retries=0
+                )
+            elif provider["type"] == "anthropic":
+                import anthropic
+                provider["http_package"] = http_package_for(anthropic)
+                client = anthropic.AsyncAnthropic(
+                    api_key=api_key,
+                    http_client=self.http.async_client(provider["http_package"]),
+                    max_retries=0
+                )
+            else:
+                return None
+            clients[loop] = client
+        return client
+    
+    async def _generate_with_provider_async(
+        self,
+        provider: Dict[str, Any],
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        task: str = "default",
+        deadline: Optional[float] = None
+    ) -> LLMResponse:
+        """Generate content with a specific provider without blocking the event loop"""
+        
+        if provider["type"] in ("groq", "openai"):
+            client = self._get_async_client(provider)
+            response = await client.chat.completions.create(
                 model=provider["model"],
                 messages=[{"role": "user", "content": prompt}],
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                timeout=self._request_timeout(provider, task, deadline),
+                **_openai_json_kwargs(prompt)
+            )
+            return self._make_response(
+                provider, response.choices[0].message.content, _usage_from_response(response)
+            )
+        
+        elif provider["type"] == "gemini":
+            model = self._get_gemini_model(provider)
+            generation_config = self._get_client(provider).GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+                **_gemini_json_kwargs(prompt)
             )
-            return response.choices[0].message.content
+            response = await model.generate_content_async(
+                prompt,
+                generation_config=generation_config,
+                request_options={"timeout": self.http.read_timeout(task, time_left(deadline))}
+            )
+            return self._make_response(provider, response.text, _usage_from_response(response))
         
         elif provider["type"] == "anthropic":
-            response = provider["client"].messages.create(
+            client = self._get_async_client(provider)
+            response = await client.messages.create(
                 model=provider["model"],
                 max_tokens=max_tokens,
                 temperature=temperature,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": _anthropic_content(prompt)}],
+                timeout=self._request_timeout(provider, task, deadline),
+                **_anthropic_tool_kwargs(prompt)
+            )
+            return self._make_response(
+                provider, _anthropic_text(response), _usage_from_response(response)
             )
-            return response.content[0].text
         
-        else:
-            raise Exception(f"Unknown provider type: {provider['type']}")
+        elif provider["type"] == "fake":
+            text = await self.fake.agenerate(prompt, temperature, max_tokens)
+            return self._make_response(provider, text, _estimate_usage(prompt, text))
+        
+        # No async client for this provider type: use a worker thread
+        return await asyncio.to_thread(
+            self._generate_with_provider, provider, prompt, temperature, max_tokens, task, deadline
+        )
+    
+    async def generate_many_async(
+        self,
+        prompts: List[str],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        preferred_provider: Optional[str] = None,
+        max_concurrency: int = 4,
+        bypass_cache: bool = False,
+        priority: str = "interactive",
+        task: str = "default"
+    ) -> List[Union[LLMResponse, Exception]]:
+        """
+        Generate responses for several prompts concurrently
+        
+        Returns:
+            One entry per prompt, in input order. Failed items hold the
+            Exception instead of a response so one failure does not sink the batch.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def _run(prompt: str):
+            async with semaphore:
+                return await self.generate_content_async(
+                    prompt, temperature, max_tokens, preferred_provider, bypass_cache,
+                    task=task, priority=priority
+                )
+        
+        return await asyncio.gather(*(_run(p) for p in prompts), return_exceptions=True)
+    
+    def generate_many(
+        self,
+        prompts: List[str],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        preferred_provider: Optional[str] = None,
+        max_concurrency: int = 4,
+        bypass_cache: bool = False,
+        priority: str = "interactive",
+        task: str = "default"
+    ) -> List[Union[LLMResponse, Exception]]:
+        """
+        Blocking fan-out over several prompts; wall time is roughly the slowest call
+        
+        Runs on the async clients on the shared background event loop (the
+        one hedged requests use, so every async client lives on one loop)
+        when no event loop is active in this thread, otherwise on a bounded
+        thread pool.
+        
+        Returns:
+            One entry per prompt, in input order. Failed items hold the Exception.
+        """
+        if not prompts:
+            return []
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run_coroutine_threadsafe(
+                self.generate_many_async(
+                    prompts, temperature, max_tokens, preferred_provider,
+                    max_concurrency, bypass_cache, priority, task
+                ),
+                _get_background_loop(),
+            ).result()
+        
+        def _run(prompt: str):
+            try:
+                return self.generate_content(
+                    prompt, temperature, max_tokens, preferred_provider, bypass_cache,
+                    task=task, priority=priority
+                )
+            except Exception as e:
+                return e
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            return list(pool.map(_run, prompts))
     
     def get_available_providers(self) -> List[str]:
-        """Get list of available provider names"""
-        return [p["name"] for p in self.providers]
+        """
+        Get list of available provider names in current routing order
+        
+        Healthy providers come first (fastest first); providers whose circuit
+        is open are listed last.
+        """
+        routed = [p["name"] for p in self.router.order(self.providers, count_request=False)]
+        tripped = [p["name"] for p in self.providers if p["name"] not in routed]
+        return routed + tripped
+    
+    def get_provider_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-provider routing stats (model, rank, circuit state, EWMA latency, error rate)"""
+        health = self.router.stats()
+        routed = [p["name"] for p in self.router.order(self.providers, count_request=False)]
+        stats = {}
+        for provider in self.providers:
+            name = provider["name"]
+            stats[name] = {
+                "model": provider["model"],
+                "rank": routed.index(name) + 1 if name in routed else None,
+                **health.get(name, {"state": "closed", "ewma_latency": None, "error_rate": 0.0, "requests": 0}),
+            }
+        return stats
     
     def is_available(self) -> bool:
         """Check if any provider is available"""
         return len(self.providers) > 0
+    
+    def get_fake_stats(self) -> Dict[str, Any]:
+        """Get record/replay counters of the fake provider (empty dict when not in use)"""
+        return self.fake.stats() if self.fake is not None else {}
+    
+    def get_single_flight_stats(self) -> Dict[str, int]:
+        """Get the number of calls currently in flight and requests coalesced so far"""
+        return {
+            "in_flight": self.single_flight.in_flight(),
+            "coalesced": self.single_flight.coalesced,
+        }
+    
+    def get_task_routes(self) -> Dict[str, Dict[str, Any]]:
+        """Get the routing table: per-task provider, model tier, max_tokens and temperature"""
+        return self.task_routes.stats()
+    
+    def get_http_pool_stats(self) -> Dict[str, Any]:
+        """Shared HTTP connection pool size, open/idle connections and reuse rate"""
+        return self.http.stats()
+    
+    def get_rate_limit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-provider rate limit budgets, queue depth and time spent waiting"""
+        return self.scheduler.stats()
+    
+    def get_hedge_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get per-task hedging counters (requests seen, hedges fired)"""
+        return self.hedge_budget.stats()
+    
+    def _emit_metrics(
+        self,
+        task: str,
+        start: float,
+        response: Optional[LLMResponse] = None,
+        error: Optional[Exception] = None,
+        bypass_cache: bool = False,
+        stream: bool = False,
+        ttft: Optional[float] = None,
+        cancelled: bool = False
+    ):
+        """Record one generate call with the metrics sinks"""
+        from utils.llm_metrics import build_call_record
+        cache_status = "bypass" if bypass_cache or self.cache is None else "miss"
+        try:
+            self.metrics.emit(build_call_record(
+                task, start, response, error=error,
+                cache_status=cache_status, stream=stream, ttft=ttft,
+                cancelled=cancelled
+            ))
+        except Exception as e:
+            print(f"LLM metrics failed: {e}")
+    
+    def get_metrics_summary(self) -> Dict[str, Any]:
+        """Aggregate call metrics (latency percentiles, tokens, cache hit rate, fallbacks)"""
+        return self.metrics.summary()
+    
+    def get_recent_calls(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent per-call metric records"""
+        return self.metrics.recent(limit)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache statistics (empty dict if caching is disabled)"""
+        if self.cache is None:
+            return {}
+        return self.cache.stats()
 
 
 # Global singleton instance
 _llm_instance = None
 
+# Shared event loop used to run async work (hedged requests) from sync callers
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Get or start the background event loop thread"""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None or _background_loop.is_closed():
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_background_loop.run_forever, name="llm-event-loop", daemon=True
+            ).start()
+    return _background_loop
+
 
 def get_llm() -> MultiModelLLM:
     """Get or create the global LLM instance"""
@@ -192,10 +1700,15 @@ def get_llm() -> MultiModelLLM:
 
 def generate_text(
     prompt: str, 
-    temperature: float = 0.7,
-    max_tokens: int = 2048,
-    preferred_provider: Optional[str] = None
-) -> str:
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    preferred_provider: Optional[str] = None,
+    bypass_cache: bool = False,
+    hedge: Optional[bool] = None,
+    task: str = "default",
+    priority: str = "interactive",
+    deadline_seconds: Optional[float] = None
+) -> LLMResponse:
     """
     Convenience function to generate text using the global LLM instance
     
@@ -204,9 +1717,98 @@ def generate_text(
         temperature: Sampling temperature (0.0 to 1.0)
         max_tokens: Maximum tokens to generate
         preferred_provider: Preferred provider name (groq, gemini, openai, anthropic)
+        bypass_cache: Skip the response cache for this call
+        hedge: Enable hedged requests for this call (defaults to LLM_HEDGE_ENABLED)
+        task: Task name used for the hedging budget and call metrics
+        priority: "interactive" or "batch" (queue order under rate limits)
+        deadline_seconds: Overall time budget across retries and fallbacks
+            (defaults to LLM_REQUEST_DEADLINE_SECONDS)
+    
+    Returns:
+        Generated text response (an LLMResponse; check .cache_hit / .coalesced / .provider)
+    """
+    llm = get_llm()
+    return llm.generate_content(
+        prompt, temperature, max_tokens, preferred_provider,
+        bypass_cache=bypass_cache, hedge=hedge, task=task, priority=priority,
+        deadline_seconds=deadline_seconds
+    )
+
+
+def generate_json(
+    prompt: str,
+    schema: Dict[str, Any],
+    schema_name: str = "result",
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    preferred_provider: Optional[str] = None,
+    bypass_cache: bool = False,
+    task: str = "default",
+    priority: str = "interactive",
+    deadline_seconds: Optional[float] = None
+) -> Tuple[Optional[Any], LLMResponse]:
+    """
+    Generate a JSON object in the providers' structured output mode
+    
+    The result is parsed but not validated; check it with
+    utils.llm_structured.validate_json so that valid parts of a partly
+    invalid answer can be kept.
+    
+    Returns:
+        (parsed JSON or None if the response is not JSON, raw LLMResponse)
+    """
+    from utils.llm_structured import parse_json
+    llm = get_llm()
+    response = llm.generate_content(
+        with_json_schema(prompt, schema, schema_name), temperature, max_tokens,
+        preferred_provider, bypass_cache=bypass_cache, task=task, priority=priority,
+        deadline_seconds=deadline_seconds
+    )
+    return parse_json(response), response
+
+
+def generate_text_stream(
+    prompt: str,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    preferred_provider: Optional[str] = None,
+    bypass_cache: bool = False,
+    priority: str = "interactive",
+    task: str = "default",
+    deadline_seconds: Optional[float] = None
+) -> Iterator[str]:
+    """
+    Convenience function to stream text deltas using the global LLM instance
+    
+    Suitable for passing straight to st.write_stream.
+    """
+    llm = get_llm()
+    return llm.generate_stream(
+        prompt, temperature, max_tokens, preferred_provider,
+        bypass_cache=bypass_cache, priority=priority, task=task,
+        deadline_seconds=deadline_seconds
+    )
+
+
+def generate_many(
+    prompts: List[str],
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    preferred_provider: Optional[str] = None,
+    max_concurrency: int = 4,
+    bypass_cache: bool = False,
+    priority: str = "interactive",
+    task: str = "default"
+) -> List[Union[LLMResponse, Exception]]:
+    """
+    Convenience function to generate several texts concurrently using the global LLM instance
     
     Returns:
-        Generated text response
+        One entry per prompt, in input order. Failed items hold the Exception.
     """
     llm = get_llm()
-    return llm.generate_content(prompt, temperature, max_tokens, preferred_provider)
+    return llm.generate_many(
+        prompts, temperature, max_tokens, preferred_provider,
+        max_concurrency=max_concurrency, bypass_cache=bypass_cache, priority=priority,
+        task=task
+    )
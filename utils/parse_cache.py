@@ -0,0 +1,292 @@
+"""
+Resume Parse Cache
+Extracted text, parse manifest and structured JSON of uploaded resumes keyed
+by the SHA-256 of the file bytes, in memory with an optional SQLite tier
+"""
+
+import os
+import copy
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterator
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+DEFAULT_PARSE_CACHE_PATH = os.path.join("data", "cache", "parse_cache.db")
+
+
+def hash_file_bytes(data: bytes) -> str:
+    """SHA-256 hex digest of a file's content"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _extension(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext or ".txt"
+
+
+class ResumeParseCache:
+    """
+    Parse results per file content, shared by every page that ingests a resume
+
+    Streamlit reruns the whole page on every widget interaction, and each
+    page (and the Gradio tabs) used to extract the upload again. Results are
+    keyed by the hash of the bytes plus the file extension, so the same file
+    uploaded under another name or on another page is parsed once.
+
+    The memory tier is an LRU of PARSE_CACHE_MEMORY_SIZE entries. The SQLite
+    tier (PARSE_CACHE_DISK_ENABLED, PARSE_CACHE_PATH, PARSE_CACHE_TTL_SECONDS)
+    survives restarts; it is off by default since it stores resume contents.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        path: Optional[str] = None,
+        disk_enabled: Optional[bool] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        self.max_entries = max(1, int(
+            max_entries if max_entries is not None
+            else os.getenv("PARSE_CACHE_MEMORY_SIZE", 32)
+        ))
+        self.disk_enabled = (
+            disk_enabled if disk_enabled is not None
+            else os.getenv("PARSE_CACHE_DISK_ENABLED", "false").lower() in ("1", "true", "yes")
+        )
+        self.path = path or os.getenv("PARSE_CACHE_PATH", DEFAULT_PARSE_CACHE_PATH)
+        self.ttl_seconds = int(
+            ttl_seconds if ttl_seconds is not None
+            else os.getenv("PARSE_CACHE_TTL_SECONDS", 30 * 24 * 3600)
+        )
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per key being parsed, so concurrent reruns wait instead of parsing twice
+        self._parsing: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.disk_enabled:
+            try:
+                self._init_db()
+            except Exception as e:
+                print(f"Parse cache disk tier unavailable: {e}")
+                self.disk_enabled = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection for one transaction: committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        """Create the parses table if it does not exist"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS parses (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+
+    def get_or_parse(self, data: bytes, filename: str = "", image_ocr: bool = True) -> Dict[str, Any]:
+        """
+        Parse result for a file's content, parsing it only on a miss
+
+        Args:
+            data: Raw bytes of the uploaded file
+            filename: Original file name; its extension selects the parser
+            image_ocr: OCR embedded images even when the text layer is usable
+                (text-only parses are cached separately)
+
+        Returns:
+            Dict with sha256, filename, text, manifest (see
+            services.docx_parser.parse_document) and parsed (structured JSON).
+            A copy, so callers may modify it.
+        """
+        digest = hash_file_bytes(data)
+        key = f"{digest}{_extension(filename)}"
+        if not image_ocr:
+            key += ":text"
+
+        result = self._get(key)
+        if result is None:
+            with self._lock:
+                key_lock = self._parsing.setdefault(key, threading.Lock())
+            with key_lock:
+                result = self._get(key)
+                if result is None:
+                    self.misses += 1
+                    result = _parse_bytes(data, filename, image_ocr)
+                    result["sha256"] = digest
+                    self._set(key, result)
+            with self._lock:
+                self._parsing.pop(key, None)
+        return copy.deepcopy(result)
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+        if not self.disk_enabled:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT result, created_at FROM parses WHERE key = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            print(f"Parse cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        if self.ttl_seconds > 0 and time.time() - row[1] > self.ttl_seconds:
+            return None
+        result = json.loads(row[0])
+        self._remember(key, result)
+        self.disk_hits += 1
+        return result
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _set(self, key: str, result: Dict[str, Any]):
+        self._remember(key, result)
+        if not self.disk_enabled:
+            return
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO parses (key, result, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(result), now),
+                )
+                if self.ttl_seconds > 0:
+                    conn.execute(
+                        "DELETE FROM parses WHERE created_at < ?", (now - self.ttl_seconds,)
+                    )
+        except Exception as e:
+            print(f"Parse cache write failed: {e}")
+
+    def clear(self):
+        """Remove every cached parse (memory and disk)"""
+        with self._lock:
+            self._entries.clear()
+        if self.disk_enabled:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM parses")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current sizes"""
+        disk_entries = 0
+        if self.disk_enabled:
+            with self._connect() as conn:
+                disk_entries = conn.execute("SELECT COUNT(*) FROM parses").fetchone()[0]
+        with self._lock:
+            memory_entries = len(self._entries)
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": memory_entries,
+            "max_entries": self.max_entries,
+            "disk_enabled": self.disk_enabled,
+            "disk_entries": disk_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / total, 3) if total else 0.0,
+        }
+
+
+def _parse_bytes(data: bytes, filename: str, image_ocr: bool = True) -> Dict[str, Any]:
+    """Extract and structure a resume from raw bytes (the uncached path)"""
+    from services.docx_parser import parse_document, _save_bytes_to_tempfile
+    from services.resume_parser import parse_resume_to_json
+
+    tmp_path = _save_bytes_to_tempfile(data, suffix=_extension(filename))
+    try:
+        text, manifest = parse_document(tmp_path, image_ocr=image_ocr)
+
+        # Scanned PDFs without embedded text, when parse_document could not
+        # plan per-page OCR (no PyMuPDF): OCR the whole file
+        if not text.strip() and _extension(filename) == ".pdf" and "ocr_plan" not in manifest:
+            try:
+                from services.mistral_ocr import MistralOCR
+
+                text = MistralOCR().extract_text(tmp_path) or ""
+                if text.strip():
+                    manifest["sources"].append("ocr_fallback")
+            except Exception as e:
+                manifest["errors"].append(f"ocr_fallback_error:{e}")
+                text = ""
+    finally:
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
+
+    manifest["file_path"] = filename
+    return {
+        "filename": filename,
+        "text": text,
+        "manifest": manifest,
+        "parsed": parse_resume_to_json(text),
+    }
+
+
+_parse_cache = None
+
+
+def get_parse_cache() -> ResumeParseCache:
+    """Process-wide parse cache"""
+    global _parse_cache
+    if _parse_cache is None:
+        _parse_cache = ResumeParseCache()
+    return _parse_cache
+
+
+def parse_resume_bytes(data: bytes, filename: str = "", image_ocr: bool = True) -> Dict[str, Any]:
+    """Cached parse of an uploaded file's bytes (see ResumeParseCache.get_or_parse)"""
+    return get_parse_cache().get_or_parse(data, filename, image_ocr)
+
+
+def parse_resume_file(file_path: str, image_ocr: bool = True) -> Dict[str, Any]:
+    """Cached parse of a file on disk"""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    return get_parse_cache().get_or_parse(data, os.path.basename(file_path), image_ocr)
+
+
+def parse_uploaded_file(uploaded_file) -> Dict[str, Any]:
+    """Cached parse of a Streamlit UploadedFile (or any object with getvalue()/read() and name)"""
+    if hasattr(uploaded_file, "getvalue"):
+        data = uploaded_file.getvalue()
+    else:
+        data = uploaded_file.read()
+    return parse_resume_bytes(data, getattr(uploaded_file, "name", ""))
@@ -0,0 +1,230 @@
+"""
+Project Suggestion Pool
+Pre-generated project suggestion variants keyed by normalized skill set and
+project count, served in rotation and refilled in the background
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Callable, Iterator
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+DEFAULT_POOL_PATH = os.path.join("data", "cache", "project_pool.db")
+
+
+def normalize_skills(skills_list: List[str]) -> List[str]:
+    """Lowercase, whitespace-collapsed, de-duplicated and sorted skills"""
+    return sorted({" ".join(str(skill).split()).lower() for skill in skills_list if str(skill).strip()})
+
+
+def make_pool_key(skills_list: List[str], num_projects: int) -> str:
+    """Key shared by every request for the same skills (in any order or case) and count"""
+    payload = json.dumps({"skills": normalize_skills(skills_list), "num_projects": int(num_projects)})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ProjectSuggestionPool:
+    """
+    Pool of generated project suggestion sets per skill set
+
+    Project suggestions are creative (high temperature), so a plain response
+    cache would show everyone the same ideas. Instead each skill set keeps
+    several independently generated variants: requests are served the least
+    shown variant, and when fewer than `low_water` unseen variants remain a
+    background thread generates `pool_size` new ones at batch priority. Only
+    the very first request for a skill set waits for a live LLM call.
+
+    Stored in SQLite so the pool is shared by all sessions and survives
+    restarts. Configured with LLM_PROJECT_POOL_PATH, LLM_PROJECT_POOL_SIZE,
+    LLM_PROJECT_POOL_LOW_WATER and LLM_PROJECT_POOL_TTL_SECONDS.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[..., List[Dict[str, Any]]],
+        path: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        low_water: Optional[int] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        """
+        Args:
+            generate: generate(skills_list, num_projects, priority=...) returning
+                a list of projects; must raise instead of returning placeholders
+        """
+        self.generate = generate
+        self.path = path or os.getenv("LLM_PROJECT_POOL_PATH", DEFAULT_POOL_PATH)
+        self.pool_size = max(1, int(
+            pool_size if pool_size is not None else os.getenv("LLM_PROJECT_POOL_SIZE", 3)
+        ))
+        self.low_water = max(1, int(
+            low_water if low_water is not None else os.getenv("LLM_PROJECT_POOL_LOW_WATER", 1)
+        ))
+        self.ttl_seconds = int(
+            ttl_seconds if ttl_seconds is not None
+            else os.getenv("LLM_PROJECT_POOL_TTL_SECONDS", 7 * 24 * 3600)
+        )
+        self._lock = threading.Lock()
+        self._refilling = set()
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection for one transaction: committed (or rolled back) and closed on exit"""
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        """Create the variants table if it does not exist"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS variants (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT NOT NULL,
+                    projects TEXT NOT NULL,
+                    served INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    last_served REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_variants_key ON variants(key)")
+
+    def get(self, skills_list: List[str], num_projects: int) -> List[Dict[str, Any]]:
+        """
+        Project suggestions for a skill set: a pooled variant, or a live generation on a miss
+
+        Raises whatever `generate` raises when nothing is pooled yet.
+        """
+        key = make_pool_key(skills_list, num_projects)
+        projects = self._take(key)
+        if projects is None:
+            self.misses += 1
+            projects = self.generate(skills_list, num_projects)
+            self._add(key, projects, served=1)
+        else:
+            self.hits += 1
+        self._maybe_refill(key, skills_list, num_projects)
+        return projects
+
+    def _take(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Serve the least shown variant (oldest first among equals), or None if the pool is empty"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            if self.ttl_seconds > 0:
+                conn.execute(
+                    "DELETE FROM variants WHERE key = ? AND created_at < ?",
+                    (key, now - self.ttl_seconds),
+                )
+            row = conn.execute(
+                "SELECT id, projects FROM variants WHERE key = ? "
+                "ORDER BY served ASC, last_served ASC, created_at ASC LIMIT 1",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE variants SET served = served + 1, last_served = ? WHERE id = ?",
+                (now, row[0]),
+            )
+        return json.loads(row[1])
+
+    def _add(self, key: str, projects: List[Dict[str, Any]], served: int = 0):
+        """Store a variant, keeping at most 2 x pool_size per key (most shown dropped first)"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO variants (key, projects, served, created_at, last_served) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(projects), served, now, now if served else 0),
+            )
+            conn.execute(
+                "DELETE FROM variants WHERE key = ? AND id NOT IN ("
+                "SELECT id FROM variants WHERE key = ? "
+                "ORDER BY served ASC, created_at DESC LIMIT ?)",
+                (key, key, self.pool_size * 2),
+            )
+
+    def _unseen(self, key: str) -> int:
+        with self._lock, self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM variants WHERE key = ? AND served = 0", (key,)
+            ).fetchone()[0]
+
+    def _maybe_refill(self, key: str, skills_list: List[str], num_projects: int):
+        """Start a background refill if the pool is running low and none is running"""
+        if self._unseen(key) >= self.low_water:
+            return
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+        threading.Thread(
+            target=self._refill, args=(key, list(skills_list), num_projects), daemon=True
+        ).start()
+
+    def _refill(self, key: str, skills_list: List[str], num_projects: int):
+        """Generate variants until pool_size unseen ones are stored (at most pool_size calls)"""
+        try:
+            for _ in range(self.pool_size):
+                if self._unseen(key) >= self.pool_size:
+                    break
+                self._add(key, self.generate(skills_list, num_projects, priority="batch"))
+                self.refills += 1
+        except Exception as e:
+            print(f"Project suggestion pool refill failed: {e}")
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    def refilling(self) -> int:
+        """Number of skill sets currently being refilled"""
+        with self._lock:
+            return len(self._refilling)
+
+    def clear(self):
+        """Remove every pooled variant"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM variants")
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/refill counters and pool size"""
+        with self._lock, self._connect() as conn:
+            variants, skill_sets = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT key) FROM variants"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "path": self.path,
+            "skill_sets": skill_sets,
+            "variants": variants,
+            "pool_size": self.pool_size,
+            "low_water": self.low_water,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "refills": self.refills,
+            "refilling": self.refilling(),
+        }
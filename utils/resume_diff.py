@@ -0,0 +1,148 @@
+"""
+Resume Diff
+Line/bullet-level diff between an original and a rewritten resume, with a
+linear-time similarity score
+"""
+
+import re
+import hashlib
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Any, List, Optional
+
+
+# Bullet markers and numbering stripped before lines are compared
+_BULLET_PREFIX = re.compile(r"^\s*(?:[-*•▪◦‣●○■□➢➤►>]+|\(?\d{1,2}[.)])\s*")
+_WORD = re.compile(r"[a-z0-9%$+#.]+")
+
+# Changed lines at least this similar are reported as "modified", not removed + added
+MODIFIED_THRESHOLD = 0.4
+# How many upcoming added lines a removed line is compared with (keeps pairing linear)
+PAIRING_WINDOW = 8
+
+
+def normalize_line(line: str) -> str:
+    """Lowercased line without bullet marker and with collapsed whitespace"""
+    return " ".join(_BULLET_PREFIX.sub("", line).split()).lower()
+
+
+def _line_hash(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _shingles(text: str) -> Counter:
+    """Multiset of word bigrams (single words for one-word text)"""
+    words = _WORD.findall(text.lower())
+    if len(words) < 2:
+        return Counter(words)
+    return Counter(zip(words, words[1:]))
+
+
+def _dice(shingles_a: Counter, shingles_b: Counter) -> float:
+    total = sum(shingles_a.values()) + sum(shingles_b.values())
+    if not total:
+        return 1.0
+    return 2 * sum((shingles_a & shingles_b).values()) / total
+
+
+def similarity(a: str, b: str) -> float:
+    """
+    Dice coefficient of the word-bigram multisets of two texts (0.0 - 1.0)
+
+    Linear in the length of the texts, unlike character-level SequenceMatcher.
+    """
+    return _dice(_shingles(a), _shingles(b))
+
+
+def _content_lines(text: str) -> List[Dict[str, Any]]:
+    lines = []
+    for number, line in enumerate(text.splitlines(), 1):
+        normalized = normalize_line(line)
+        if normalized:
+            lines.append({
+                "number": number,
+                "text": line.strip(),
+                "normalized": normalized,
+                "hash": _line_hash(normalized),
+                "shingles": _shingles(normalized),
+            })
+    return lines
+
+
+def _pair_changed(removed: List[Dict[str, Any]], added: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Turn one replaced block into modified / removed / added records, in order"""
+    changes = []
+    remaining = list(added)
+    for old in removed:
+        best, best_score = None, 0.0
+        for new in remaining[:PAIRING_WINDOW]:
+            score = _dice(old["shingles"], new["shingles"])
+            # Strictly greater: on a tie the earliest candidate keeps the pairing
+            if score >= MODIFIED_THRESHOLD and (best is None or score > best_score):
+                best, best_score = new, score
+        if best is None:
+            changes.append({"type": "removed", "before": old["text"], "old_line": old["number"]})
+            continue
+        # Lines added before the matched one stay in order ahead of it
+        index = remaining.index(best)
+        for new in remaining[:index]:
+            changes.append({"type": "added", "after": new["text"], "new_line": new["number"]})
+        remaining = remaining[index + 1:]
+        changes.append({
+            "type": "modified",
+            "before": old["text"],
+            "after": best["text"],
+            "old_line": old["number"],
+            "new_line": best["number"],
+            "similarity": round(best_score, 3),
+        })
+    for new in remaining:
+        changes.append({"type": "added", "after": new["text"], "new_line": new["number"]})
+    return changes
+
+
+def diff_resume(original: str, rewritten: str, max_changes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compare a resume with its rewrite, bullet by bullet
+
+    Lines are normalized (bullet markers, case and spacing ignored) and
+    hashed, aligned on the hashes, and lines inside changed blocks are
+    paired up as modifications when they are similar enough.
+
+    Args:
+        original: Resume text before the rewrite
+        rewritten: Rewritten resume text
+        max_changes: Keep at most this many change records (None: all)
+
+    Returns:
+        Dict with:
+          - similarity: 0.0 - 1.0 over the whole text (linear-time Dice score)
+          - changes: list of {"type": "added" | "removed" | "modified",
+            "before", "after", "old_line", "new_line", "similarity"} records
+            in resume order ("before" / "after" only where they apply)
+          - counts: number of unchanged, modified, added and removed lines
+    """
+    old_lines, new_lines = _content_lines(original or ""), _content_lines(rewritten or "")
+    matcher = SequenceMatcher(
+        None, [line["hash"] for line in old_lines], [line["hash"] for line in new_lines], autojunk=False
+    )
+
+    changes = []
+    unchanged = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            unchanged += i2 - i1
+        else:
+            changes.extend(_pair_changed(old_lines[i1:i2], new_lines[j1:j2]))
+
+    counts = Counter(change["type"] for change in changes)
+    return {
+        "similarity": round(similarity(original or "", rewritten or ""), 4),
+        "changes": changes if max_changes is None else changes[:max_changes],
+        "counts": {
+            "unchanged": unchanged,
+            "modified": counts["modified"],
+            "added": counts["added"],
+            "removed": counts["removed"],
+        },
+    }